@@ -0,0 +1,256 @@
+"""
+本地事件 broker: 基于 Unix socket 的轻量消息代理，作为 Redis Streams / NATS 的替身，
+供单机多 worker 部署与测试使用。
+
+    python -m app.adapters.event_transport.broker --path /tmp/neodth_events.sock --partitions 16
+
+模型:
+    topic:     事件类名；每个 topic 固定 partitions 个分区，事件按分区键哈希（客户端计算）取模分区
+    消费组:    同一消费组内每个分区只分配给一个成员（按加入顺序轮转分配），不同消费组各自收到全部事件；
+               成员加入或断开时重新分配
+    顺序:      同一分区的事件经同一连接按发布顺序投递
+    投递语义:  至多一次。topic 尚无任何消费组时事件暂存在该 topic 的有界积压队列，
+               首个消费组加入时转入该组；消费组暂无成员时事件暂存在该组的有界积压队列，
+               成员加入后补投（积压超出上限时丢弃最旧并计数）；成员断开时已写入其连接的事件不再重投
+
+帧格式: u32 大端长度 | msgpack(list)
+    客户端 -> broker: ["hello", group, [topic, ...]]        加入消费组并订阅（group 为空时只发布）
+                      ["pub", topic, [[key_hash, body], ...]]
+    broker -> 客户端: ["welcome", partitions]
+                      ["msg", topic, [body, ...]]
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import struct
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+import msgpack
+from app.core.logger import get_logger, get_sampled_logger
+
+logger = get_logger("event_broker", event_type="event_bus")
+sampled_logger = get_sampled_logger("event_broker", event_type="event_bus")
+
+LENGTH = struct.Struct(">I")
+MAX_FRAME = 16 * 1024 * 1024
+# 单个连接写缓冲超过该字节数时等待对端读取
+WRITE_HIGH_WATER = 1024 * 1024
+
+
+def pack_frame(message: list) -> bytes:
+    data = msgpack.packb(message, use_bin_type=True)
+    return LENGTH.pack(len(data)) + data
+
+
+async def read_frame(reader: asyncio.StreamReader) -> list:
+    (length,) = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+    if length > MAX_FRAME:
+        raise ValueError(f"帧过大: {length}")
+    return msgpack.unpackb(await reader.readexactly(length), raw=False)
+
+
+class _Member:
+    __slots__ = ("name", "writer")
+
+    def __init__(self, name: str, writer: asyncio.StreamWriter):
+        self.name = name
+        self.writer = writer
+
+    async def send(self, message: list) -> None:
+        writer = self.writer
+        if writer.is_closing():
+            raise ConnectionResetError("连接已关闭")
+        writer.write(pack_frame(message))
+        if writer.transport.get_write_buffer_size() > WRITE_HIGH_WATER:
+            await writer.drain()
+
+
+class _Group:
+    """
+    某个 topic 上的一个消费组: 成员列表、分区分配表与无成员时的积压队列。
+    """
+
+    def __init__(self, name: str, partitions: int, backlog: int):
+        self.name = name
+        self.partitions = partitions
+        self.members: List[_Member] = []
+        self.owners: List[Optional[_Member]] = [None] * partitions
+        self.backlog: Deque[Tuple[int, bytes]] = deque(maxlen=backlog)
+        self.delivered = 0
+        self.dropped = 0
+
+    def rebalance(self) -> None:
+        members = self.members
+        self.owners = [members[p % len(members)] if members else None for p in range(self.partitions)]
+
+    def stats(self) -> dict:
+        return {
+            "members": [member.name for member in self.members],
+            "backlog": len(self.backlog),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+
+class LocalBroker:
+    def __init__(self, path: str, partitions: int = 16, backlog: int = 100000):
+        self.path = path
+        self.partitions = max(1, partitions)
+        self.backlog = backlog
+        # topic -> 消费组名 -> _Group
+        self._topics: Dict[str, Dict[str, _Group]] = {}
+        # topic -> 尚无消费组时的积压事件
+        self._pending: Dict[str, Deque[Tuple[int, bytes]]] = {}
+        self.dropped = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._members: Set[_Member] = set()
+        self._connections = 0
+        self.published = 0
+
+    def _group(self, topic: str, group: str) -> _Group:
+        groups = self._topics.setdefault(topic, {})
+        state = groups.get(group)
+        if state is None:
+            state = groups[group] = _Group(group, self.partitions, self.backlog)
+            pending = self._pending.pop(topic, None)
+            if pending:
+                state.backlog.extend(pending)
+        return state
+
+    async def _join(self, member: _Member, group: str, topics: List[str]) -> None:
+        for topic in topics:
+            state = self._group(topic, group)
+            state.members.append(member)
+            state.rebalance()
+            logger.info("消费组 %s 成员 %s 加入 topic %s，当前 %d 个成员", group, member.name, topic, len(state.members))
+            if state.backlog:
+                backlog = list(state.backlog)
+                state.backlog.clear()
+                await self._route(topic, state, backlog)
+
+    def _leave(self, member: _Member) -> None:
+        for topic, groups in self._topics.items():
+            for state in groups.values():
+                if member in state.members:
+                    state.members.remove(member)
+                    state.rebalance()
+                    logger.info("消费组 %s 成员 %s 离开 topic %s，当前 %d 个成员",
+                                state.name, member.name, topic, len(state.members))
+
+    async def _route(self, topic: str, state: _Group, items: List[Tuple[int, bytes]]) -> None:
+        """
+        按分区把事件投递给该组的分区所有者，同一所有者的事件合并为一帧；无所有者时进入积压队列。
+        """
+        outgoing: Dict[_Member, List[bytes]] = {}
+        partitions = self.partitions
+        owners = state.owners
+        for key_hash, body in items:
+            owner = owners[key_hash % partitions]
+            if owner is None:
+                if len(state.backlog) == state.backlog.maxlen:
+                    state.dropped += 1
+                state.backlog.append((key_hash, body))
+                continue
+            bodies = outgoing.get(owner)
+            if bodies is None:
+                outgoing[owner] = [body]
+            else:
+                bodies.append(body)
+        for owner, bodies in outgoing.items():
+            try:
+                await owner.send(["msg", topic, bodies])
+                state.delivered += len(bodies)
+            except (ConnectionError, OSError) as e:
+                state.dropped += len(bodies)
+                sampled_logger.warning(owner.name, "投递到 %s 失败，丢弃 %d 条: %s", owner.name, len(bodies), e)
+
+    def _hold(self, topic: str, items: List[Tuple[int, bytes]]) -> None:
+        pending = self._pending.get(topic)
+        if pending is None:
+            pending = self._pending[topic] = deque(maxlen=self.backlog)
+        overflow = len(pending) + len(items) - self.backlog
+        if overflow > 0:
+            self.dropped += overflow
+            sampled_logger.warning(topic, "topic %s 尚无消费组，积压已满，累计丢弃 %d 条", topic, self.dropped)
+        pending.extend(items)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._connections += 1
+        member = _Member(f"conn-{self._connections}", writer)
+        self._members.add(member)
+        try:
+            await member.send(["welcome", self.partitions])
+            while True:
+                message = await read_frame(reader)
+                kind = message[0]
+                if kind == "pub":
+                    _, topic, items = message
+                    self.published += len(items)
+                    groups = self._topics.get(topic)
+                    if not groups:
+                        self._hold(topic, items)
+                        continue
+                    for state in list(groups.values()):
+                        await self._route(topic, state, items)
+                elif kind == "hello":
+                    _, group, topics = message
+                    if group:
+                        member.name = f"{group}/{member.name}"
+                        await self._join(member, group, topics)
+                else:
+                    sampled_logger.warning("kind", "未知消息类型: %r", kind)
+        except asyncio.IncompleteReadError:
+            pass
+        except Exception as e:
+            logger.error("broker 连接 %s 异常: %s", member.name, e)
+        finally:
+            self._members.discard(member)
+            self._leave(member)
+            writer.close()
+
+    async def start(self) -> None:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+        logger.info("事件 broker 已启动: %s, partitions=%d", self.path, self.partitions)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # wait_closed() 会等待全部连接关闭
+            for member in list(self._members):
+                member.writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def stats(self) -> dict:
+        return {
+            "published": self.published,
+            "dropped": self.dropped,
+            "pending": {topic: len(pending) for topic, pending in self._pending.items()},
+            "topics": {
+                topic: {name: state.stats() for name, state in groups.items()}
+                for topic, groups in self._topics.items()
+            },
+        }
+
+
+async def _main(args: argparse.Namespace) -> None:
+    broker = LocalBroker(args.path, partitions=args.partitions, backlog=args.backlog)
+    await broker.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await broker.stop()
+
+
+if __name__ == "__main__":
+    from app.core.settings import settings
+
+    parser = argparse.ArgumentParser(description="本地事件 broker（Unix socket）")
+    parser.add_argument("--path", default=settings.event_bus_broker_path)
+    parser.add_argument("--partitions", type=int, default=settings.event_bus_broker_partitions)
+    parser.add_argument("--backlog", type=int, default=100000, help="消费组无成员时每组最多积压的事件数")
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,125 @@
+import asyncio
+import contextlib
+import zlib
+from typing import Any, Awaitable, Callable, List, Optional, Sequence
+from app.adapters.event_transport.broker import pack_frame, read_frame
+from app.adapters.event_transport.codec import EventCodec
+from app.core.event_bus import EventTransport, KeyFunc, patient_key
+from app.core.logger import get_logger, get_sampled_logger
+
+logger = get_logger("event_transport", event_type="event_bus")
+sampled_logger = get_sampled_logger("event_transport", event_type="event_bus")
+
+
+class BrokerTransport(EventTransport):
+    """
+    连接 LocalBroker 的事件传输: 以 group 加入消费组，事件按 key(event)（默认患者）
+    的稳定哈希（crc32，跨进程一致）分区，同一患者的事件总由消费组内同一进程按序处理。
+
+    连接断开时后台按指数退避重连并重新加入消费组；断开期间 publish() 返回 False，
+    由 EventBus 退回本进程分发（不丢事件，但该期间不保证跨进程的一致归属）。
+    """
+
+    def __init__(self, path: str, group: str, key: Optional[KeyFunc] = None, codec: Optional[EventCodec] = None):
+        self.path = path
+        self.group = group
+        self.key = key or patient_key
+        self.codec = codec or EventCodec()
+        self._topics: List[str] = []
+        self._deliver: Optional[Callable[[str, List[Any]], Awaitable[None]]] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._connected = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.partitions = 0
+        self.sent = 0
+        self.received = 0
+        self.deliver_errors = 0
+        self.reconnects = 0
+
+    async def start(self, topics: Sequence[str], deliver: Callable[[str, List[Any]], Awaitable[None]]) -> None:
+        self._topics = list(topics)
+        self._deliver = deliver
+        self._task = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._connected.wait(), 5.0)
+        except asyncio.TimeoutError:
+            logger.warning("事件 broker %s 暂不可用，后台继续重连，期间事件在本进程分发", self.path)
+
+    async def _connect(self) -> asyncio.StreamReader:
+        delay = 0.1
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+                kind, partitions = await read_frame(reader)
+                if kind != "welcome":
+                    raise ConnectionError(f"broker 握手异常: {kind!r}")
+                writer.write(pack_frame(["hello", self.group, self._topics]))
+                await writer.drain()
+                self.partitions = partitions
+                self._writer = writer
+                self._connected.set()
+                logger.info("事件 broker 已连接: %s, group=%s, partitions=%d", self.path, self.group, partitions)
+                return reader
+            except (OSError, ConnectionError, asyncio.IncompleteReadError) as e:
+                logger.warning("事件 broker 连接失败: %s，%.1fs 后重试", e, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 5.0)
+
+    async def _run(self) -> None:
+        while True:
+            reader = await self._connect()
+            try:
+                while True:
+                    kind, topic, bodies = await read_frame(reader)
+                    if kind != "msg":
+                        continue
+                    decode = self.codec.decode
+                    events = [decode(body) for body in bodies]
+                    self.received += len(events)
+                    try:
+                        await self._deliver(topic, events)
+                    except Exception as e:
+                        self.deliver_errors += len(events)
+                        sampled_logger.error(topic, "事件分发异常(%s, %d 条): %s", topic, len(events), e)
+            except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+                logger.warning("事件 broker 连接断开: %s，准备重连", e)
+            finally:
+                self._connected.clear()
+                writer, self._writer = self._writer, None
+                if writer is not None:
+                    writer.close()
+            self.reconnects += 1
+
+    async def publish(self, topic: str, events: Sequence[Any]) -> bool:
+        writer = self._writer
+        if writer is None or writer.is_closing():
+            return False
+        key, encode = self.key, self.codec.encode
+        items = [[zlib.crc32(str(key(event)).encode()), encode(event)] for event in events]
+        try:
+            writer.write(pack_frame(["pub", topic, items]))
+            await writer.drain()
+        except (OSError, ConnectionError) as e:
+            sampled_logger.warning("publish", "事件发布到 broker 失败: %s", e)
+            return False
+        self.sent += len(items)
+        return True
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "group": self.group,
+            "connected": self._connected.is_set(),
+            "partitions": self.partitions,
+            "sent": self.sent,
+            "received": self.received,
+            "deliver_errors": self.deliver_errors,
+            "reconnects": self.reconnects,
+        }
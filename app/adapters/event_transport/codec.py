@@ -0,0 +1,73 @@
+import struct
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Type
+import msgpack
+from pydantic import BaseModel
+from app.domain.shared.base_model import DomainBaseModel
+
+# 事件体: msgpack([事件类名, 字段字典])；非 pydantic 对象为 msgpack([None, 对象])
+# topic 是订阅配置中的事件类名，子类事件经其基类的 topic 传输，因此具体类名随事件体携带
+# datetime 编码为扩展类型: int64 UTC 微秒时间戳 + 1 字节是否带时区
+_DATETIME_EXT = 1
+_DATETIME = struct.Struct("<q?")
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _pack_default(obj):
+    if isinstance(obj, datetime):
+        if obj.tzinfo is None:
+            return msgpack.ExtType(_DATETIME_EXT, _DATETIME.pack((obj - _EPOCH) // _MICROSECOND, False))
+        return msgpack.ExtType(_DATETIME_EXT, _DATETIME.pack((obj - _EPOCH_UTC) // _MICROSECOND, True))
+    raise TypeError(f"无法序列化的类型: {type(obj)!r}")
+
+
+def _unpack_ext(code: int, data: bytes):
+    if code == _DATETIME_EXT:
+        micros, aware = _DATETIME.unpack(data)
+        return (_EPOCH_UTC if aware else _EPOCH) + micros * _MICROSECOND
+    return msgpack.ExtType(code, data)
+
+
+class EventCodec:
+    """
+    领域事件的 msgpack 编解码。
+    编码: pydantic 模型记录类名并取字段字典，其它对象（如网关原始 payload 字典）原样编码；
+    解码: 类名对应 DomainBaseModel 子类时以 model_construct 重建（数据来自本系统，跳过校验），
+    否则返回原始字段。
+    """
+
+    def __init__(self):
+        self._types: Dict[str, Optional[Type[BaseModel]]] = {}
+
+    def encode(self, event: Any) -> bytes:
+        if isinstance(event, BaseModel):
+            message = [type(event).__name__, event.model_dump()]
+        else:
+            message = [None, event]
+        return msgpack.packb(message, default=_pack_default, use_bin_type=True)
+
+    def decode(self, body: bytes) -> Any:
+        name, fields = msgpack.unpackb(body, ext_hook=_unpack_ext, raw=False)
+        cls = self.resolve(name) if name is not None else None
+        if cls is None or type(fields) is not dict:
+            return fields
+        return cls.model_construct(**fields)
+
+    def resolve(self, name: str) -> Optional[Type[BaseModel]]:
+        """
+        按类名查找 DomainBaseModel 子类（已导入的事件类），结果缓存；未找到时同样缓存为 None。
+        """
+        if name in self._types:
+            return self._types[name]
+        found = None
+        pending = list(DomainBaseModel.__subclasses__())
+        while pending:
+            cls = pending.pop()
+            if cls.__name__ == name:
+                found = cls
+                break
+            pending.extend(cls.__subclasses__())
+        self._types[name] = found
+        return found
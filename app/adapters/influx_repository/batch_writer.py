@@ -0,0 +1,298 @@
+import asyncio
+import contextlib
+import random
+import struct
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Optional, Sequence, Tuple
+from influxdb_client import WritePrecision
+from influxdb_client.client.write_api import SYNCHRONOUS
+from influxdb_client.rest import ApiException
+from app.adapters.influx_repository.influx_client import InfluxClient
+from app.adapters.influx_repository.line_protocol import LineProtocolEncoder
+from app.adapters.spool.drainer import PermanentReplayError
+from app.adapters.spool.segment_spool import WriteAheadSpool, write_spool
+from app.core.logger import get_logger, get_sampled_logger
+from app.core.metrics import LatencyHistogram, get_histogram
+from app.core.settings import settings
+
+logger = get_logger("influx_writer", event_type="influx")
+sampled_logger = get_sampled_logger("influx_writer", event_type="influx")
+
+# spool 记录类型与负载头（数据点数）
+SPOOL_KIND = 1
+_SPOOL_HEADER = struct.Struct("<I")
+# InfluxDB 拒绝数据本身的响应码（行协议格式错误、请求过大、字段类型冲突），重试不会成功
+_PERMANENT_STATUS = frozenset((400, 413, 422))
+
+
+class InfluxBatchWriter:
+    """
+    InfluxDB 批量写入器。调用方通过 reserve() 占位后，把数据点编码进 encoder（行协议缓冲区），
+    或通过 encode_many() 批量占位并编码，立即返回；encoder 满 batch_size 个数据点即封存为一批，
+    后台任务在有封存批次或距上次写入超过 flush_interval(+随机抖动) 时
+    在专用线程池（write_threads 个线程）中调用同步 write_api 写入，HTTP 请求不占用事件循环，
+    也不占用 asyncio.to_thread 共用的默认线程池。
+
+    单次 HTTP 写入超过 write_timeout 秒按失败处理（超时的写入可能已生效，重试/重放后数据点重复，
+    InfluxDB 对相同数据点幂等）；客户端 HTTP 超时同为 write_timeout，超时后线程随请求结束，
+    InfluxDB 故障期间不会堆积阻塞线程。每次写入耗时记录在延迟直方图 store_write.influx 中。
+    写入失败按指数退避重试 max_retries 次，仍失败则转存到 spool（未配置 spool 时丢弃并计数），
+    由 SpoolDrainer 在 InfluxDB 恢复后经 replay() 重放。
+    待写入数据超过 max_pending 时把最早的封存批次转存到 spool，未配置 spool 时丢弃新数据，
+    避免 InfluxDB 故障时内存无限增长。
+    """
+
+    def __init__(
+        self,
+        client: InfluxClient,
+        bucket: str,
+        batch_size: int = 5000,
+        flush_interval: float = 1.0,
+        jitter: float = 0.0,
+        max_retries: int = 5,
+        retry_interval: float = 0.5,
+        max_retry_delay: float = 30.0,
+        max_pending: int = 100000,
+        write_timeout: float = 10.0,
+        write_threads: int = 2,
+        spool: Optional[WriteAheadSpool] = None,
+    ):
+        self.client = client
+        self.bucket = bucket
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.jitter = jitter
+        self.max_retries = max_retries
+        self.retry_interval = retry_interval
+        self.max_retry_delay = max_retry_delay
+        self.max_pending = max_pending
+        self.write_timeout = write_timeout
+        self.write_threads = max(1, write_threads)
+        self.spool = spool
+        self.encoder = LineProtocolEncoder()
+        self._sealed: Deque[Tuple[bytes, int]] = deque()
+        self._sealed_points = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._write_api = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._histogram: LatencyHistogram = get_histogram("store_write.influx")
+        # 指标
+        self.written = 0
+        self.batches = 0
+        self.retries = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.dropped = 0
+        self.spooled = 0
+        self.last_write_seconds = 0.0
+
+    @property
+    def pending(self) -> int:
+        return self._sealed_points + self.encoder.count
+
+    def reserve(self) -> bool:
+        """
+        写入一个数据点前调用: 返回 True 后调用方应立即向 self.encoder 编码一个数据点；
+        超过 max_pending 时计入丢弃并返回 False。
+        """
+        encoder = self.encoder
+        if encoder.count >= self.batch_size:
+            self._seal()
+        if self._sealed_points + encoder.count >= self.max_pending:
+            if self._sealed and self._spool_oldest():
+                return True
+            self.dropped += 1
+            sampled_logger.warning("dropped", "Influx待写入数据已满，丢弃数据点，累计丢弃 %d 个", self.dropped)
+            return False
+        return True
+
+    def encode_many(self, rows: Sequence, encode: Callable[[Sequence], None]) -> int:
+        """
+        批量写入: 按当前批次的剩余容量切分 rows，逐段占位后调用 encode(片段) 编码进 self.encoder，
+        每批不超过 batch_size 个数据点；超过 max_pending 的部分计入丢弃。返回已编码的行数。
+        """
+        encoder = self.encoder
+        done, total = 0, len(rows)
+        while done < total:
+            if encoder.count >= self.batch_size:
+                self._seal()
+            while self._sealed_points + encoder.count >= self.max_pending and self._sealed and self._spool_oldest():
+                pass
+            room = min(self.batch_size - encoder.count, self.max_pending - self._sealed_points - encoder.count)
+            if room <= 0:
+                break
+            n = min(room, total - done)
+            encode(rows[done:done + n])
+            done += n
+        if done < total:
+            self.dropped += total - done
+            sampled_logger.warning("dropped", "Influx待写入数据已满，丢弃数据点，累计丢弃 %d 个", self.dropped)
+        return done
+
+    def _seal(self) -> None:
+        if self.encoder.count:
+            batch = self.encoder.take()
+            self._sealed.append(batch)
+            self._sealed_points += batch[1]
+            self._wakeup.set()
+
+    def _to_spool(self, data: bytes, count: int) -> bool:
+        if self.spool is None or not self.spool.append(SPOOL_KIND, _SPOOL_HEADER.pack(count) + data):
+            return False
+        self.spooled += count
+        return True
+
+    def _spool_oldest(self) -> bool:
+        data, count = self._sealed[0]
+        if not self._to_spool(data, count):
+            return False
+        self._sealed.popleft()
+        self._sealed_points -= count
+        return True
+
+    async def replay(self, payload: bytes) -> int:
+        """
+        spool 重放: 单次写入一条 spool 记录，失败直接抛出，由 SpoolDrainer 退避重试；
+        负载损坏或 InfluxDB 拒绝该批数据时抛出 PermanentReplayError，记录转入死信文件。
+        """
+        try:
+            (count,) = _SPOOL_HEADER.unpack_from(payload)
+        except struct.error as e:
+            raise PermanentReplayError("spool 记录负载损坏") from e
+        try:
+            await self._timed_write(payload[_SPOOL_HEADER.size:])
+        except ApiException as e:
+            if e.status in _PERMANENT_STATUS:
+                raise PermanentReplayError(f"InfluxDB 拒绝写入: {e.status}") from e
+            raise
+        self.written += count
+        return count
+
+    def _write(self, data: bytes) -> None:
+        if self._write_api is None:
+            self._write_api = self.client.get_client().write_api(write_options=SYNCHRONOUS)
+        self._write_api.write(bucket=self.bucket, record=data, write_precision=WritePrecision.NS)
+
+    async def _timed_write(self, data: bytes) -> None:
+        """
+        在专用线程池中执行一次写入，超过 write_timeout 抛出 TimeoutError（线程内的请求由客户端 HTTP 超时结束），
+        成功与失败的耗时都计入 store_write.influx 直方图。
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.write_threads, thread_name_prefix="influx-write")
+        start = time.perf_counter()
+        try:
+            future = asyncio.get_running_loop().run_in_executor(self._executor, self._write, data)
+            await asyncio.wait_for(future, self.write_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.last_write_seconds = time.perf_counter() - start
+            self._histogram.observe(self.last_write_seconds)
+
+    async def _write_with_retry(self, data: bytes, count: int) -> None:
+        delay = self.retry_interval
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self._timed_write(data)
+                self.written += count
+                self.batches += 1
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    if self._to_spool(data, count):
+                        sampled_logger.warning("write", "Influx批量写入失败，%d 个数据点已转存 spool: %r", count, e)
+                    else:
+                        self.failed += count
+                        sampled_logger.error("write", "Influx批量写入失败，丢弃 %d 个数据点: %r", count, e)
+                    return
+                self.retries += 1
+                sampled_logger.warning("retry", "Influx批量写入失败，%.1fs 后重试(%d/%d): %r",
+                                       delay, attempt + 1, self.max_retries, e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_retry_delay)
+
+    async def flush(self) -> None:
+        """
+        写出当前所有待写入数据。
+        """
+        self._seal()
+        while self._sealed:
+            batch = self._sealed[0]
+            await self._write_with_retry(*batch)
+            # 写入期间该批可能已被 reserve() 转存 spool
+            if self._sealed and self._sealed[0] is batch:
+                self._sealed.popleft()
+                self._sealed_points -= batch[1]
+
+    async def _run(self) -> None:
+        while True:
+            timeout = self.flush_interval + random.uniform(0, self.jitter)
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                sampled_logger.error("flush", "Influx批量写入异常: %s", e)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Influx批量写入已启动: batch_size=%d, flush_interval=%.2fs", self.batch_size, self.flush_interval)
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        停止后台任务并写出剩余数据，超时未写出的数据转存 spool。
+        """
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        try:
+            await asyncio.wait_for(self.flush(), timeout)
+        except asyncio.TimeoutError:
+            self._seal()
+            while self._sealed and self._spool_oldest():
+                pass
+            if self.pending:
+                logger.warning("Influx批量写入关闭超时，剩余 %d 个数据点未写入", self.pending)
+        if self._executor is not None:
+            # 不等待超时未返回的线程，其请求由客户端 HTTP 超时结束
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "written": self.written,
+            "batches": self.batches,
+            "retries": self.retries,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "dropped": self.dropped,
+            "skipped": self.encoder.skipped,
+            "spooled": self.spooled,
+            "last_write_ms": round(self.last_write_seconds * 1000, 2),
+        }
+
+
+influx_writer = InfluxBatchWriter(
+    InfluxClient(),
+    bucket=settings.influx_bucket,
+    batch_size=settings.influx_batch_size,
+    flush_interval=settings.influx_flush_interval,
+    jitter=settings.influx_flush_jitter,
+    max_retries=settings.influx_max_retries,
+    retry_interval=settings.influx_retry_interval,
+    max_retry_delay=settings.influx_max_retry_delay,
+    max_pending=settings.influx_max_pending,
+    write_timeout=settings.influx_write_timeout,
+    write_threads=settings.influx_write_threads,
+    spool=write_spool if settings.spool_enabled else None,
+)
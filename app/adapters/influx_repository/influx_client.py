@@ -1,18 +1,55 @@
+from typing import Optional
 from influxdb_client import InfluxDBClient
 from app.core.settings import settings
 
 class InfluxClient:
+    """
+    InfluxDB 客户端。底层 InfluxDBClient（含 HTTP 连接池）为进程级共享，
+    首次 get_client() 时创建，关闭时调用 InfluxClient.close()；该同步客户端只用于批量写入，
+    HTTP 超时取 influx_write_timeout，写入线程不会因 InfluxDB 无响应而长期阻塞。
+    查询使用的异步客户端（依赖 aiohttp）同样共享，由 get_async_client()/close_async() 管理。
+    """
+
+    _client: Optional[InfluxDBClient] = None
+    _async_client = None
+
     def __init__(self):
         self.url = settings.influx_url
         self.token = settings.influx_token
         self.org = settings.influx_org
 
-    def get_client(self):
-        return InfluxDBClient(
-            url=self.url,
-            token=self.token,
-            org=self.org
-        )
+    def get_client(self) -> InfluxDBClient:
+        if InfluxClient._client is None:
+            InfluxClient._client = InfluxDBClient(
+                url=self.url,
+                token=self.token,
+                org=self.org,
+                timeout=int(settings.influx_write_timeout * 1000),
+            )
+        return InfluxClient._client
+
+    async def get_async_client(self):
+        if InfluxClient._async_client is None:
+            from influxdb_client.client.influxdb_client_async import InfluxDBClientAsync
+
+            InfluxClient._async_client = InfluxDBClientAsync(
+                url=self.url,
+                token=self.token,
+                org=self.org
+            )
+        return InfluxClient._async_client
+
+    @classmethod
+    def close(cls) -> None:
+        client, cls._client = cls._client, None
+        if client is not None:
+            client.close()
+
+    @classmethod
+    async def close_async(cls) -> None:
+        client, cls._async_client = cls._async_client, None
+        if client is not None:
+            await client.close()
 
 # 协作模式说明：
 # 1. 高频原始数据优先写入 InfluxDB，适合时序分析与大数据量。
@@ -0,0 +1,181 @@
+from datetime import datetime, timedelta, timezone
+from math import isfinite
+from typing import Dict, Iterable, Tuple, Union
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ONE_US = timedelta(microseconds=1)
+
+# 与 influxdb_client.Point 的转义表一致；未转义的换行会被服务端当作新的一行
+_KEY_ESCAPES = str.maketrans({",": r"\,", "=": r"\=", " ": r"\ ", "\n": r"\n", "\t": r"\t", "\r": r"\r"})
+_MEASUREMENT_ESCAPES = str.maketrans({",": r"\,", " ": r"\ ", "\n": r"\n", "\t": r"\t", "\r": r"\r"})
+_STRING_FIELD_ESCAPES = str.maketrans({'"': r"\"", "\\": r"\\"})
+
+Timestamp = Union[datetime, int]
+
+
+def escape_key(value: str) -> str:
+    """
+    转义 tag key / field key 中的逗号、等号、空格与换行、回车、制表符。
+    """
+    return value.translate(_KEY_ESCAPES)
+
+
+def escape_tag(value: str) -> str:
+    """
+    转义 tag value；以反斜杠结尾时追加空格，避免反斜杠转义其后的分隔符。
+    """
+    value = value.translate(_KEY_ESCAPES)
+    if value.endswith("\\"):
+        value += " "
+    return value
+
+
+def escape_measurement(value: str) -> str:
+    return value.translate(_MEASUREMENT_ESCAPES)
+
+
+def escape_string_field(value: str) -> str:
+    return value.translate(_STRING_FIELD_ESCAPES)
+
+
+def timestamp_ns(ts: Timestamp) -> int:
+    """
+    datetime 转整数纳秒时间戳，整数运算无浮点误差；无时区的 datetime 视为 UTC。
+    已是整数的纳秒时间戳原样返回。
+    """
+    if type(ts) is int:
+        return ts
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return (ts - _EPOCH) // _ONE_US * 1000
+
+
+def format_field(value) -> str:
+    """
+    按 InfluxDB 字段类型格式化: int -> 72i, float -> 36.6, bool -> true, str -> "..."。
+    行协议无法表示 NaN/inf，非有限浮点数抛出 ValueError。
+    """
+    kind = type(value)
+    if kind is int:
+        return f"{value}i"
+    if kind is float:
+        if not isfinite(value):
+            raise ValueError(f"非有限浮点数无法写入行协议: {value!r}")
+        return repr(value)
+    if kind is bool:
+        return "true" if value else "false"
+    return f'"{escape_string_field(str(value))}"'
+
+
+class LineProtocolEncoder:
+    """
+    InfluxDB 行协议编码器，将数据点直接追加到可复用的 bytearray 缓冲区。
+
+    相比 dict 数据点（客户端需再解析 dict、转义、格式化时间）:
+        measurement + tags 前缀按 (measurement, patient_id, device_id) 缓存，转义只做一次；
+        时间戳直接写整数纳秒；
+        heart_rate / temperature / sleep 使用专用方法，字段类型已知，无需逐字段判断。
+    与 influxdb_client.Point 一致，值为 NaN/inf 的浮点字段被忽略，没有字段的数据点整条丢弃并计入 skipped。
+    take() 取出已编码数据并清空缓冲区，可直接作为 write_api.write 的 record（精度为纳秒）。
+    """
+
+    __slots__ = ("buf", "count", "skipped", "_prefixes", "_max_prefixes")
+
+    def __init__(self, max_prefixes: int = 100000):
+        self.buf = bytearray()
+        self.count = 0
+        self.skipped = 0
+        self._prefixes: Dict[Tuple[str, str, str], str] = {}
+        self._max_prefixes = max_prefixes
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _prefix(self, measurement: str, patient_id: str, device_id: str) -> str:
+        key = (measurement, patient_id, device_id)
+        prefix = self._prefixes.get(key)
+        if prefix is None:
+            if len(self._prefixes) >= self._max_prefixes:
+                self._prefixes.clear()
+            # tag 按 key 字典序排列，与 InfluxDB 内部排序一致，写入时免于重排
+            tags = []
+            if device_id:
+                tags.append(f",device_id={escape_tag(device_id)}")
+            if patient_id:
+                tags.append(f",patient_id={escape_tag(patient_id)}")
+            prefix = self._prefixes[key] = escape_measurement(measurement) + "".join(tags) + " "
+        return prefix
+
+    def heart_rate(self, patient_id: str, device_id: str, value: int, ts: Timestamp) -> None:
+        self.buf += (
+            f"{self._prefix('heart_rate', patient_id, device_id)}value={int(value)}i {timestamp_ns(ts)}\n"
+        ).encode()
+        self.count += 1
+
+    def temperature(self, patient_id: str, device_id: str, value: float, ts: Timestamp) -> None:
+        value = float(value)
+        if not isfinite(value):
+            self.skipped += 1
+            return
+        self.buf += (
+            f"{self._prefix('temperature', patient_id, device_id)}value={value!r} {timestamp_ns(ts)}\n"
+        ).encode()
+        self.count += 1
+
+    def sleep(self, patient_id: str, device_id: str, duration_minutes: int, sleep_quality, ts: Timestamp) -> None:
+        fields = f"duration_minutes={int(duration_minutes)}i"
+        if sleep_quality:
+            fields += f',sleep_quality="{escape_string_field(sleep_quality)}"'
+        self.buf += f"{self._prefix('sleep', patient_id, device_id)}{fields} {timestamp_ns(ts)}\n".encode()
+        self.count += 1
+
+    def heart_rate_many(self, rows: Iterable[Tuple[str, str, int, Timestamp]]) -> None:
+        """
+        批量编码 (patient_id, device_id, value, ts)，整批拼接后一次写入缓冲区。
+        """
+        prefix = self._prefix
+        lines = [
+            f"{prefix('heart_rate', patient_id, device_id)}value={int(value)}i {timestamp_ns(ts)}\n"
+            for patient_id, device_id, value, ts in rows
+        ]
+        self.buf += "".join(lines).encode()
+        self.count += len(lines)
+
+    def temperature_many(self, rows: Iterable[Tuple[str, str, float, Timestamp]]) -> None:
+        prefix = self._prefix
+        rows = list(rows)
+        lines = [
+            f"{prefix('temperature', patient_id, device_id)}value={number!r} {timestamp_ns(ts)}\n"
+            for patient_id, device_id, value, ts in rows
+            if isfinite(number := float(value))
+        ]
+        self.buf += "".join(lines).encode()
+        self.count += len(lines)
+        self.skipped += len(rows) - len(lines)
+
+    def point(self, measurement: str, tags: Dict[str, str], fields: Dict[str, object], ts: Timestamp) -> None:
+        """
+        通用数据点编码，tags 中值为空的项与值为 None、NaN/inf 的字段会被忽略。
+        """
+        field_part = ",".join(
+            f"{escape_key(k)}={format_field(v)}"
+            for k, v in fields.items()
+            if v is not None and (type(v) is not float or isfinite(v))
+        )
+        if not field_part:
+            self.skipped += 1
+            return
+        tag_part = "".join(
+            f",{escape_key(k)}={escape_tag(str(v))}" for k, v in sorted(tags.items()) if v not in (None, "")
+        )
+        self.buf += f"{escape_measurement(measurement)}{tag_part} {field_part} {timestamp_ns(ts)}\n".encode()
+        self.count += 1
+
+    def take(self) -> Tuple[bytes, int]:
+        """
+        取出已编码的数据与数据点数，并清空缓冲区。
+        """
+        data, count = bytes(self.buf), self.count
+        self.buf.clear()
+        self.count = 0
+        return data, count
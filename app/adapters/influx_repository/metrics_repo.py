@@ -1,40 +1,51 @@
 from app.adapters.influx_repository.influx_client import InfluxClient
+from app.adapters.influx_repository.batch_writer import InfluxBatchWriter, influx_writer
 from app.domain.health_metrics.heart_rate.events import HeartRateDataReceived
 from app.domain.health_metrics.temperature.events import TemperatureDataReceived
-from typing import Any
+from app.domain.health_metrics.sleep.events import SleepDataReceived
+from typing import Any, Optional, Sequence
 
 class MetricsRepo:
-    def __init__(self, client: InfluxClient):
+    """
+    指标时序数据仓储。write_* 只把数据点编码为行协议追加到批量写入器的缓冲区，
+    不等待 InfluxDB 写入完成。
+    """
+
+    def __init__(self, client: InfluxClient, writer: Optional[InfluxBatchWriter] = None):
         self.client = client
+        self.writer = writer or influx_writer
 
     async def write_heart_rate(self, event: HeartRateDataReceived) -> None:
-        influx = self.client.get_client()
-        point = {
-            "measurement": "heart_rate",
-            "tags": {
-                "patient_id": event.patient_id,
-                "device_id": event.device_id,
-            },
-            "fields": {
-                "value": event.value,
-            },
-            "time": event.timestamp.isoformat(),
-        }
-        write_api = influx.write_api()
-        write_api.write(bucket="neoDTH", record=point)
+        if self.writer.reserve():
+            self.writer.encoder.heart_rate(event.patient_id, event.device_id, event.value, event.timestamp)
 
     async def write_temperature(self, event: TemperatureDataReceived) -> None:
-        influx = self.client.get_client()
-        point = {
-            "measurement": "temperature",
-            "tags": {
-                "patient_id": event.patient_id,
-                "device_id": event.device_id,
-            },
-            "fields": {
-                "value": event.value,
-            },
-            "time": event.timestamp.isoformat(),
-        }
-        write_api = influx.write_api()
-        write_api.write(bucket="neoDTH", record=point)
\ No newline at end of file
+        if self.writer.reserve():
+            self.writer.encoder.temperature(event.patient_id, event.device_id, event.value, event.timestamp)
+
+    async def write_sleep(self, event: SleepDataReceived) -> None:
+        if self.writer.reserve():
+            self.writer.encoder.sleep(
+                event.patient_id, event.device_id, event.duration_minutes, event.sleep_quality, event.timestamp
+            )
+
+    async def write_heart_rate_batch(self, events: Sequence[HeartRateDataReceived]) -> None:
+        encoder = self.writer.encoder
+        self.writer.encode_many(events, lambda chunk: encoder.heart_rate_many(
+            (e.patient_id, e.device_id, e.value, e.timestamp) for e in chunk
+        ))
+
+    async def write_temperature_batch(self, events: Sequence[TemperatureDataReceived]) -> None:
+        encoder = self.writer.encoder
+        self.writer.encode_many(events, lambda chunk: encoder.temperature_many(
+            (e.patient_id, e.device_id, e.value, e.timestamp) for e in chunk
+        ))
+
+    async def write_sleep_batch(self, events: Sequence[SleepDataReceived]) -> None:
+        encoder = self.writer.encoder
+
+        def encode(chunk: Sequence[SleepDataReceived]) -> None:
+            for e in chunk:
+                encoder.sleep(e.patient_id, e.device_id, e.duration_minutes, e.sleep_quality, e.timestamp)
+
+        self.writer.encode_many(events, encode)
@@ -0,0 +1,161 @@
+import re
+from array import array
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+from app.adapters.influx_repository.influx_client import InfluxClient
+from app.adapters.influx_repository.line_protocol import timestamp_ns
+from app.core.settings import settings
+
+try:
+    import numpy as np
+except ImportError:  # numpy 为可选依赖，缺失时以 array 列返回
+    np = None
+
+# 可查询的指标及其默认字段
+MEASUREMENT_FIELDS: Dict[str, str] = {
+    "heart_rate": "value",
+    "temperature": "value",
+    "sleep": "duration_minutes",
+}
+AGGREGATE_FUNCTIONS = ("mean", "min", "max")
+_WINDOW_PATTERN = re.compile(r"^[1-9][0-9]*(ms|s|m|h|d|w)$")
+
+
+class MetricBatch:
+    """
+    列式查询结果: times 为 UTC 纳秒时间戳列，values 为数值列。
+    安装 numpy 时两列为 ndarray(int64 / float64)，否则为 array('q') / array('d')。
+    """
+
+    __slots__ = ("measurement", "field", "times", "values")
+
+    def __init__(self, measurement: str, field: str, times, values):
+        self.measurement = measurement
+        self.field = field
+        self.times = times
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def to_dict(self) -> dict:
+        """
+        JSON 友好的列式表示，时间为毫秒时间戳。
+        """
+        if np is not None:
+            times = (self.times // 1_000_000).tolist()
+        else:
+            times = [t // 1_000_000 for t in self.times]
+        values = self.values.tolist()
+        return {
+            "measurement": self.measurement,
+            "field": self.field,
+            "count": len(times),
+            "times": times,
+            "values": values,
+        }
+
+
+def _columns(times: array, values: array):
+    if np is not None:
+        return np.frombuffer(times, dtype=np.int64).copy(), np.frombuffer(values, dtype=np.float64).copy()
+    return times, values
+
+
+class MetricsQueryRepo:
+    """
+    指标时序数据查询仓储，基于 InfluxDB 异步客户端。
+    支持按患者、时间范围查询原始数据，或按 aggregateWindow(mean/min/max) 降采样；
+    结果按 chunk_size 行分批以列式 MetricBatch 流式返回，避免整段数据物化为字典列表。
+    """
+
+    def __init__(self, client: InfluxClient, bucket: Optional[str] = None, chunk_size: int = 10000):
+        self.client = client
+        self.bucket = bucket or settings.influx_bucket
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def build_query(measurement: str, field: str, window: Optional[str] = None, fn: str = "mean") -> str:
+        """
+        构造 Flux 查询，bucket/患者/时间范围通过 params 传入；窗口与聚合函数经白名单校验后内联。
+        """
+        if measurement not in MEASUREMENT_FIELDS:
+            raise ValueError(f"不支持的指标: {measurement}")
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", field):
+            raise ValueError(f"非法字段名: {field}")
+        lines = [
+            "from(bucket: params.bucket)",
+            "  |> range(start: params.start, stop: params.stop)",
+            f'  |> filter(fn: (r) => r._measurement == "{measurement}" and r._field == "{field}"'
+            " and r.patient_id == params.patient_id)",
+            # 同一患者可能绑定多台设备，合并为一条序列
+            '  |> group(columns: ["_measurement", "_field", "patient_id"])',
+        ]
+        if window:
+            if not _WINDOW_PATTERN.match(window):
+                raise ValueError(f"非法窗口: {window}")
+            if fn not in AGGREGATE_FUNCTIONS:
+                raise ValueError(f"不支持的聚合函数: {fn}")
+            lines.append(f"  |> aggregateWindow(every: {window}, fn: {fn}, createEmpty: false)")
+        else:
+            lines.append('  |> sort(columns: ["_time"])')
+        lines.append('  |> keep(columns: ["_time", "_value"])')
+        return "\n".join(lines)
+
+    async def stream(
+        self,
+        measurement: str,
+        patient_id: str,
+        start: datetime,
+        stop: datetime,
+        field: Optional[str] = None,
+        window: Optional[str] = None,
+        fn: str = "mean",
+    ) -> AsyncIterator[MetricBatch]:
+        """
+        流式查询，每 chunk_size 行产出一个 MetricBatch。
+        """
+        field = field or MEASUREMENT_FIELDS.get(measurement, "value")
+        query = self.build_query(measurement, field, window, fn)
+        params = {"bucket": self.bucket, "patient_id": patient_id, "start": start, "stop": stop}
+        query_api = (await self.client.get_async_client()).query_api()
+        chunk_size = self.chunk_size
+        times, values = array("q"), array("d")
+        async for record in await query_api.query_stream(query, params=params):
+            value = record.get_value()
+            if value is None:
+                continue
+            times.append(timestamp_ns(record.get_time()))
+            values.append(value)
+            if len(times) >= chunk_size:
+                yield MetricBatch(measurement, field, *_columns(times, values))
+                times, values = array("q"), array("d")
+        if times:
+            yield MetricBatch(measurement, field, *_columns(times, values))
+
+    async def query(
+        self,
+        measurement: str,
+        patient_id: str,
+        start: datetime,
+        stop: datetime,
+        field: Optional[str] = None,
+        window: Optional[str] = None,
+        fn: str = "mean",
+    ) -> MetricBatch:
+        """
+        查询并合并为单个 MetricBatch。
+        """
+        field = field or MEASUREMENT_FIELDS.get(measurement, "value")
+        batches: List[MetricBatch] = [
+            batch async for batch in self.stream(measurement, patient_id, start, stop, field, window, fn)
+        ]
+        if np is not None:
+            times = np.concatenate([b.times for b in batches]) if batches else np.empty(0, dtype=np.int64)
+            values = np.concatenate([b.values for b in batches]) if batches else np.empty(0, dtype=np.float64)
+        else:
+            times, values = array("q"), array("d")
+            for b in batches:
+                times.extend(b.times)
+                values.extend(b.values)
+        return MetricBatch(measurement, field, times, values)
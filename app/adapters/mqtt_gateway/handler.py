@@ -1,11 +1,13 @@
 import json
+import logging
 from datetime import datetime
-from typing import Callable, Dict, Awaitable
-from  app.core.logger import get_logger
+from typing import Callable, Dict, Awaitable, List, Union
+from  app.core.logger import get_logger, get_sampled_logger
 from  app.core.event_bus import event_bus
 from app.domain.health_metrics.heart_rate.events import HeartRateDataReceived
 
 logger = get_logger("mqtt_gateway.handler", event_type="mqtt")
+sampled_logger = get_sampled_logger("mqtt_gateway.handler", event_type="mqtt")
 
 class MqttMessageRouter:
     def __init__(self):
@@ -20,21 +22,31 @@ class MqttMessageRouter:
             if topic in self._routes:
                 await self._routes[topic](data)
             else:
-                logger.warning(f"Unhandled topic: {topic}")
+                sampled_logger.warning(f"topic:{topic}", "Unhandled topic: %s", topic)
         except Exception as e:
-            logger.error(f"Failed to handle MQTT message: {e}")
+            sampled_logger.error("handle", "Failed to handle MQTT message: %s", e)
 
 router = MqttMessageRouter()
 
-# 注册心率事件
-async def handle_heart_rate(data: dict):
-    event = HeartRateDataReceived(
+def _heart_rate_event(data: dict) -> HeartRateDataReceived:
+    return HeartRateDataReceived(
         patient_id=data["patient_id"],
         device_id=data["device_id"],
         value=int(data["value"]),
         timestamp=datetime.fromisoformat(data["timestamp"])
     )
+
+# 注册心率事件: 消息体为单个采样对象，或采样对象数组（整批发布）
+async def handle_heart_rate(data: Union[dict, List[dict]]):
+    if type(data) is list:
+        events = [_heart_rate_event(item) for item in data]
+        await event_bus.publish_many(HeartRateDataReceived, events)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Published %d HeartRateDataReceived", len(events))
+        return
+    event = _heart_rate_event(data)
     await event_bus.publish(HeartRateDataReceived, event)
-    logger.info(f"Published HeartRateDataReceived: {event}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Published HeartRateDataReceived: %s", event)
 
 router.register("health/heart_rate", handle_heart_rate)
\ No newline at end of file
@@ -0,0 +1,277 @@
+import asyncio
+import contextlib
+import struct
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+import asyncpg
+import msgpack
+from app.adapters.pg_repository.pgsql_client import PgSQLClient
+from app.adapters.spool.drainer import PermanentReplayError
+from app.adapters.spool.segment_spool import WriteAheadSpool, write_spool
+from app.core.logger import get_logger, get_sampled_logger
+from app.core.metrics import LatencyHistogram, get_histogram
+from app.core.settings import settings
+
+logger = get_logger("event_log_writer", event_type="pgsql")
+sampled_logger = get_sampled_logger("event_log_writer", event_type="pgsql")
+
+# spool 记录类型；负载为 msgpack([table, rows])，datetime 编码为扩展类型（UTC 微秒时间戳）
+SPOOL_KIND = 2
+_DATETIME_EXT = 1
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_INT64 = struct.Struct("<q")
+# 数据本身无法写入的错误（类型/取值非法、违反约束；asyncpg 客户端编码错误为 ValueError 子类），重试不会成功
+_PERMANENT_ERRORS = (ValueError, TypeError, asyncpg.DataError, asyncpg.IntegrityConstraintViolationError)
+
+
+def _pack_default(obj):
+    if isinstance(obj, datetime):
+        return msgpack.ExtType(_DATETIME_EXT, _INT64.pack((to_utc_naive(obj) - _EPOCH) // _MICROSECOND))
+    raise TypeError(f"无法序列化的类型: {type(obj)!r}")
+
+
+def _unpack_ext(code: int, data: bytes):
+    if code == _DATETIME_EXT:
+        return _EPOCH + _INT64.unpack(data)[0] * _MICROSECOND
+    return msgpack.ExtType(code, data)
+
+
+def to_utc_naive(ts: datetime) -> datetime:
+    """
+    事件日志表的 TIMESTAMP 列（无时区）不接受带时区的 datetime，统一换算为 UTC 后去掉时区。
+    """
+    if ts.tzinfo is None:
+        return ts
+    return ts.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class EventLogWriter:
+    """
+    PostgreSQL 事件日志批量写入器。append() 只把行追加到对应表的内存缓冲，立即返回；
+    后台任务在任一表累计 batch_size 行或每隔 flush_interval 秒时，
+    用 copy_records_to_table（COPY 二进制协议）整批写入，替代逐行 INSERT。
+
+    至少一次语义: 一批行只有在 COPY 成功后才从缓冲移除，失败时转存到 spool 由 SpoolDrainer 重放，
+    未配置 spool 时原样放回队首等待下次重试；单次 COPY 超过 write_timeout 秒按失败处理，
+    每次 COPY 耗时记录在延迟直方图 store_write.pgsql 中；stop() 会在关闭连接池前写出全部剩余数据。
+    缓冲总行数超过 max_pending 时把该表最早的一批转存 spool，未配置 spool 时丢弃新数据。
+    """
+
+    def __init__(
+        self,
+        client: PgSQLClient,
+        batch_size: int = 2000,
+        flush_interval: float = 1.0,
+        max_pending: int = 200000,
+        write_timeout: float = 10.0,
+        spool: Optional[WriteAheadSpool] = None,
+    ):
+        self.client = client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.write_timeout = write_timeout
+        self.spool = spool
+        self._columns: Dict[str, Tuple[str, ...]] = {}
+        self._rows: Dict[str, List[tuple]] = {}
+        self._pending = 0
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._histogram: LatencyHistogram = get_histogram("store_write.pgsql")
+        # 指标
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.dropped = 0
+        self.spooled = 0
+        self.last_copy_seconds = 0.0
+
+    def register(self, table: str, columns: Sequence[str]) -> None:
+        """
+        登记表及其列顺序，append() 的 record 需按此顺序排列。
+        """
+        self._columns[table] = tuple(columns)
+        self._rows.setdefault(table, [])
+
+    def append(self, table: str, record: tuple) -> bool:
+        """
+        追加一行，缓冲已满时计入丢弃并返回 False。
+        """
+        if self._pending >= self.max_pending and not self._spool_oldest(table):
+            self.dropped += 1
+            sampled_logger.warning("dropped", "事件日志缓冲已满，丢弃数据，累计丢弃 %d 行", self.dropped)
+            return False
+        rows = self._rows[table]
+        rows.append(record)
+        self._pending += 1
+        if len(rows) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def extend(self, table: str, records: Sequence[tuple]) -> int:
+        """
+        批量追加多行，返回实际追加的行数（缓冲已满时超出部分同 append() 处理）。
+        """
+        if self._pending + len(records) <= self.max_pending:
+            rows = self._rows[table]
+            rows.extend(records)
+            self._pending += len(records)
+            if len(rows) >= self.batch_size:
+                self._wakeup.set()
+            return len(records)
+        return sum(1 for record in records if self.append(table, record))
+
+    def _to_spool(self, table: str, batch: List[tuple]) -> bool:
+        if self.spool is None:
+            return False
+        payload = msgpack.packb([table, batch], default=_pack_default, use_bin_type=True)
+        if not self.spool.append(SPOOL_KIND, payload):
+            return False
+        self.spooled += len(batch)
+        return True
+
+    def _spool_oldest(self, table: str) -> bool:
+        rows = self._rows[table]
+        batch = rows[:self.batch_size]
+        if not batch or not self._to_spool(table, batch):
+            return False
+        del rows[:len(batch)]
+        self._pending -= len(batch)
+        return True
+
+    async def replay(self, payload: bytes) -> int:
+        """
+        spool 重放: 单次 COPY 一条 spool 记录，失败直接抛出，由 SpoolDrainer 退避重试；
+        负载损坏、表未登记或数据被 PostgreSQL 拒绝时抛出 PermanentReplayError，记录转入死信文件。
+        """
+        try:
+            table, batch = msgpack.unpackb(payload, ext_hook=_unpack_ext, raw=False)
+            rows = [tuple(row) for row in batch]
+        except Exception as e:
+            raise PermanentReplayError("spool 记录负载损坏") from e
+        if table not in self._columns:
+            raise PermanentReplayError(f"事件日志表未登记: {table}")
+        try:
+            await self._copy(table, rows)
+        except _PERMANENT_ERRORS as e:
+            raise PermanentReplayError(f"事件日志写入被拒绝({table})") from e
+        self.written += len(batch)
+        return len(batch)
+
+    async def _copy(self, table: str, batch: List[tuple]) -> None:
+        """
+        单次 COPY，超过 write_timeout 抛出 TimeoutError（asyncpg 取消该语句），
+        成功与失败的耗时（含获取连接）都计入 store_write.pgsql 直方图。
+        """
+        start = time.perf_counter()
+        try:
+            pool = await self.client.get_pool()
+            async with pool.acquire(timeout=self.write_timeout) as conn:
+                await conn.copy_records_to_table(
+                    table, records=batch, columns=self._columns[table], timeout=self.write_timeout
+                )
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.last_copy_seconds = time.perf_counter() - start
+            self._histogram.observe(self.last_copy_seconds)
+
+    async def _flush_table(self, table: str) -> bool:
+        rows = self._rows[table]
+        if not rows:
+            return True
+        batch = rows[:self.batch_size]
+        del rows[:self.batch_size]
+        try:
+            await self._copy(table, batch)
+        except Exception as e:
+            self.failures += 1
+            if self._to_spool(table, batch):
+                self._pending -= len(batch)
+                sampled_logger.warning(table, "事件日志写入失败(%s)，%d 行已转存 spool: %r", table, len(batch), e)
+            else:
+                # 放回队首，保持顺序并在下次刷新时重试
+                rows[:0] = batch
+                sampled_logger.error(table, "事件日志写入失败(%s)，%d 行待重试: %r", table, len(batch), e)
+            return False
+        self._pending -= len(batch)
+        self.written += len(batch)
+        self.batches += 1
+        return True
+
+    async def flush(self) -> bool:
+        """
+        写出所有表的缓冲数据，任一表写入失败即停止该表并返回 False。
+        """
+        ok = True
+        async with self._lock:
+            for table, rows in self._rows.items():
+                while rows:
+                    if not await self._flush_table(table):
+                        ok = False
+                        break
+        return ok
+
+    async def _run(self) -> None:
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                sampled_logger.error("flush", "事件日志刷新异常: %s", e)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("事件日志批量写入已启动: batch_size=%d, flush_interval=%.2fs", self.batch_size, self.flush_interval)
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        停止后台任务并写出剩余数据，失败时按 flush_interval 重试直至超时。
+        """
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        deadline = time.monotonic() + timeout
+        while not await self.flush():
+            if time.monotonic() + self.flush_interval > deadline:
+                for table in self._rows:
+                    while self._spool_oldest(table):
+                        pass
+                if not self._pending:
+                    return
+                logger.error("事件日志关闭时写入失败，%d 行未写入", self._pending)
+                return
+            await asyncio.sleep(self.flush_interval)
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._pending,
+            "tables": {table: len(rows) for table, rows in self._rows.items()},
+            "written": self.written,
+            "batches": self.batches,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "dropped": self.dropped,
+            "spooled": self.spooled,
+            "last_copy_ms": round(self.last_copy_seconds * 1000, 2),
+        }
+
+
+event_log_writer = EventLogWriter(
+    PgSQLClient(),
+    batch_size=settings.pg_event_log_batch_size,
+    flush_interval=settings.pg_event_log_flush_interval,
+    max_pending=settings.pg_event_log_max_pending,
+    write_timeout=settings.pg_write_timeout,
+    spool=write_spool if settings.spool_enabled else None,
+)
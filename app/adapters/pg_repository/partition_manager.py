@@ -0,0 +1,213 @@
+import asyncio
+import contextlib
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from app.adapters.pg_repository.pgsql_client import PgSQLClient
+from app.core.logger import get_logger
+from app.core.settings import settings
+
+logger = get_logger("partition_manager", event_type="pgsql")
+
+_IDENTIFIER = re.compile(r"^[a-z_][a-z0-9_]*$")
+_PARTITION_SUFFIX = re.compile(r"_p(\d{8})$")
+
+
+class PartitionManager:
+    """
+    事件日志表按时间范围分区（PostgreSQL 原生 RANGE 分区）。
+
+    ensure_table() 创建以 timestamp 为分区键的父表、(patient_id, timestamp) 分区索引
+    （PostgreSQL 自动在每个分区上建立对应索引）以及兜底的 DEFAULT 分区；
+    maintain() 提前创建未来 premake 个分区，并删除结束时间早于保留期的分区。
+    分区按天或按周（周一起始）划分，命名为 {table}_pYYYYMMDD。
+
+    新分区的时间范围如已有数据落入 DEFAULT 分区（设备时钟偏差等），
+    先在同一事务内把这些行迁入新表再 ATTACH，避免 ATTACH 因数据冲突失败。
+    """
+
+    def __init__(
+        self,
+        client: PgSQLClient,
+        interval: str = "day",
+        premake: int = 7,
+        retention_days: int = 90,
+        maintenance_interval: float = 3600.0,
+    ):
+        if interval not in ("day", "week"):
+            raise ValueError("interval 仅支持 day / week")
+        self.client = client
+        self.interval = interval
+        self.premake = premake
+        self.retention_days = retention_days
+        self.maintenance_interval = maintenance_interval
+        self._tables: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.created = 0
+        self.dropped = 0
+
+    def _period_start(self, day: date) -> date:
+        if self.interval == "week":
+            return day - timedelta(days=day.weekday())
+        return day
+
+    def _step(self) -> timedelta:
+        return timedelta(days=7 if self.interval == "week" else 1)
+
+    async def ensure_table(self, table: str, columns_ddl: str) -> None:
+        """
+        创建分区父表、分区索引与 DEFAULT 分区，并登记以便后续维护。
+        columns_ddl 为不含 id 与 timestamp 的其余列定义。
+        已存在的非分区旧表会被重命名为 {table}_legacy 保留，数据需另行迁移。
+        """
+        if not _IDENTIFIER.match(table):
+            raise ValueError(f"非法表名: {table}")
+        pool = await self.client.get_pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                relkind = await conn.fetchval(
+                    "SELECT c.relkind FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+                    "WHERE c.relname = $1 AND n.nspname = current_schema()",
+                    table,
+                )
+                if relkind == "r":
+                    logger.warning("事件日志表 %s 不是分区表，已重命名为 %s_legacy", table, table)
+                    await conn.execute(f"ALTER TABLE {table} RENAME TO {table}_legacy")
+                await conn.execute(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        id BIGSERIAL,
+                        {columns_ddl},
+                        timestamp TIMESTAMP NOT NULL,
+                        PRIMARY KEY (id, timestamp)
+                    ) PARTITION BY RANGE (timestamp)
+                    """
+                )
+                await conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {table}_patient_ts_idx ON {table} (patient_id, timestamp)"
+                )
+                await conn.execute(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT")
+        self._tables[table] = columns_ddl
+        await self.create_partitions(table)
+
+    async def _partitions(self, conn, table: str) -> List[Tuple[str, date]]:
+        rows = await conn.fetch(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = $1::regclass",
+            table,
+        )
+        partitions = []
+        for row in rows:
+            match = _PARTITION_SUFFIX.search(row["relname"])
+            if match:
+                partitions.append((row["relname"], datetime.strptime(match.group(1), "%Y%m%d").date()))
+        return partitions
+
+    def bounds(self, table: str, today: date) -> List[Tuple[str, date, date]]:
+        """
+        从 today 所在周期起的 premake + 1 个分区，返回 [(分区名, 下界, 上界)]，区间左闭右开。
+        """
+        step = self._step()
+        start = self._period_start(today)
+        result = []
+        for i in range(self.premake + 1):
+            lower = start + step * i
+            result.append((f"{table}_p{lower:%Y%m%d}", lower, lower + step))
+        return result
+
+    def is_expired(self, lower: date, today: date) -> bool:
+        """
+        下界为 lower 的分区结束时间不晚于 today - retention_days 时视为过期。
+        """
+        return lower + self._step() <= today - timedelta(days=self.retention_days)
+
+    async def create_partitions(self, table: str, today: Optional[date] = None) -> int:
+        """
+        创建从当前周期起的 premake + 1 个分区，已存在的跳过，返回新建数量。
+        """
+        today = today or datetime.now(timezone.utc).date()
+        created = 0
+        pool = await self.client.get_pool()
+        async with pool.acquire() as conn:
+            existing = {name for name, _ in await self._partitions(conn, table)}
+            for name, lower, upper in self.bounds(table, today):
+                if name in existing:
+                    continue
+                async with conn.transaction():
+                    await conn.execute(
+                        f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+                    )
+                    status = await conn.execute(
+                        f"WITH moved AS (DELETE FROM {table}_default WHERE timestamp >= $1 AND timestamp < $2 "
+                        f"RETURNING *) INSERT INTO {name} SELECT * FROM moved",
+                        datetime.combine(lower, datetime.min.time()),
+                        datetime.combine(upper, datetime.min.time()),
+                    )
+                    await conn.execute(
+                        f"ALTER TABLE {table} ATTACH PARTITION {name} "
+                        f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+                    )
+                created += 1
+                # status 形如 "INSERT 0 N"，N 为从 DEFAULT 分区迁入的行数
+                logger.info("创建事件日志分区: %s [%s, %s)，迁入 %s 行", name, lower, upper, status.split()[-1])
+        self.created += created
+        return created
+
+    async def drop_expired(self, table: str, today: Optional[date] = None) -> int:
+        """
+        删除结束时间早于 today - retention_days 的分区，返回删除数量。
+        """
+        today = today or datetime.now(timezone.utc).date()
+        dropped = 0
+        pool = await self.client.get_pool()
+        async with pool.acquire() as conn:
+            for name, lower in await self._partitions(conn, table):
+                if self.is_expired(lower, today):
+                    await conn.execute(f"DROP TABLE IF EXISTS {name}")
+                    dropped += 1
+                    logger.info("删除过期事件日志分区: %s", name)
+        self.dropped += dropped
+        return dropped
+
+    async def maintain(self) -> None:
+        for table in list(self._tables):
+            try:
+                await self.create_partitions(table)
+                await self.drop_expired(table)
+            except Exception as e:
+                logger.error("事件日志分区维护异常: %s, %s", table, e)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.maintenance_interval)
+            await self.maintain()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "tables": list(self._tables),
+            "interval": self.interval,
+            "premake": self.premake,
+            "retention_days": self.retention_days,
+            "created": self.created,
+            "dropped": self.dropped,
+        }
+
+
+event_log_partitions = PartitionManager(
+    PgSQLClient(),
+    interval=settings.pg_event_log_partition_interval,
+    premake=settings.pg_event_log_partition_premake,
+    retention_days=settings.pg_event_log_retention_days,
+    maintenance_interval=settings.pg_event_log_maintenance_interval,
+)
@@ -1,12 +1,69 @@
+import asyncio
+from typing import Optional
 import asyncpg
 from app.core.settings import settings
+from app.core.logger import get_logger
+
+logger = get_logger("pgsql_client")
 
 class PgSQLClient:
+    """
+    PostgreSQL 客户端。连接池为进程级共享（类属性），由 lifespan 调用 init_pool()/close_pool()
+    管理生命周期；各 repo 持有的 PgSQLClient 实例只是访问共享连接池的句柄。
+    """
+
+    _pool: Optional[asyncpg.Pool] = None
+    _lock: Optional[asyncio.Lock] = None
+
     def __init__(self):
         self.dsn = settings.pg_dsn
 
-    async def get_pool(self):
-        return await asyncpg.create_pool(dsn=self.dsn)
+    @classmethod
+    async def init_pool(cls) -> asyncpg.Pool:
+        """
+        创建共享连接池，重复调用返回已有连接池。
+        """
+        if cls._pool is not None:
+            return cls._pool
+        if cls._lock is None:
+            cls._lock = asyncio.Lock()
+        async with cls._lock:
+            if cls._pool is None:
+                cls._pool = await asyncpg.create_pool(
+                    dsn=settings.pg_dsn,
+                    min_size=settings.pg_pool_min_size,
+                    max_size=settings.pg_pool_max_size,
+                    statement_cache_size=settings.pg_statement_cache_size,
+                    max_queries=settings.pg_pool_max_queries,
+                    max_inactive_connection_lifetime=settings.pg_pool_max_inactive_lifetime,
+                )
+                logger.info(
+                    "PostgreSQL连接池已创建: min=%d, max=%d",
+                    settings.pg_pool_min_size,
+                    settings.pg_pool_max_size,
+                )
+        return cls._pool
+
+    @classmethod
+    async def close_pool(cls, timeout: float = 10.0) -> None:
+        """
+        关闭共享连接池，等待借出的连接归还，超时后强制终止。
+        """
+        pool, cls._pool = cls._pool, None
+        if pool is None:
+            return
+        try:
+            await asyncio.wait_for(pool.close(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("PostgreSQL连接池关闭超时，强制终止剩余连接")
+            pool.terminate()
+        logger.info("PostgreSQL连接池已关闭")
+
+    async def get_pool(self) -> asyncpg.Pool:
+        """
+        返回共享连接池；未经 lifespan 初始化时（脚本、独立进程）按需创建。
+        """
+        return PgSQLClient._pool or await PgSQLClient.init_pool()
 
 # 协作模式说明：
 # 1. 高频原始数据仅写入 InfluxDB，PGSQL 只保留事件日志与元数据。
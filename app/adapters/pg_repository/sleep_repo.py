@@ -0,0 +1,56 @@
+from app.adapters.pg_repository.pgsql_client import PgSQLClient
+from app.domain.health_metrics.sleep.events import SleepDataReceived
+from app.adapters.pg_repository.event_log_writer import EventLogWriter, event_log_writer, to_utc_naive
+from app.adapters.pg_repository.partition_manager import PartitionManager, event_log_partitions
+from typing import Optional, Sequence
+
+class SleepRepo:
+    """
+    事件日志经 EventLogWriter 缓冲后批量 COPY 写入；表按 timestamp 范围分区，由 PartitionManager 维护。
+    """
+
+    TABLE = "sleep_event_log"
+    COLUMNS = ('patient_id', 'device_id', 'duration_minutes', 'sleep_quality', 'timestamp')
+
+    def __init__(
+        self,
+        client: PgSQLClient,
+        writer: Optional[EventLogWriter] = None,
+        partitions: Optional[PartitionManager] = None,
+    ):
+        self.client = client
+        self.writer = writer or event_log_writer
+        self.partitions = partitions or event_log_partitions
+        self.writer.register(self.TABLE, self.COLUMNS)
+
+    async def write_event_log(self, event: SleepDataReceived) -> None:
+        self.writer.append(
+            self.TABLE,
+            (
+                event.patient_id,
+                event.device_id,
+                event.duration_minutes,
+                event.sleep_quality,
+                to_utc_naive(event.timestamp),
+            ),
+        )
+
+    async def write_event_log_batch(self, events: Sequence[SleepDataReceived]) -> None:
+        self.writer.extend(
+            self.TABLE,
+            [
+                (e.patient_id, e.device_id, e.duration_minutes, e.sleep_quality, to_utc_naive(e.timestamp))
+                for e in events
+            ],
+        )
+
+    async def ensure_channel(self) -> None:
+        await self.partitions.ensure_table(
+            self.TABLE,
+            """
+                patient_id VARCHAR(64),
+                device_id VARCHAR(64),
+                duration_minutes INTEGER,
+                sleep_quality VARCHAR(32)
+            """,
+        )
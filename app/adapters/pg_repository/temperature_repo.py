@@ -1,36 +1,45 @@
 from app.adapters.pg_repository.pgsql_client import PgSQLClient
 from app.domain.health_metrics.temperature.events import TemperatureDataReceived
-from typing import Any
+from app.adapters.pg_repository.event_log_writer import EventLogWriter, event_log_writer, to_utc_naive
+from app.adapters.pg_repository.partition_manager import PartitionManager, event_log_partitions
+from typing import Any, Optional, Sequence
 
 class TemperatureRepo:
-    def __init__(self, client: PgSQLClient):
+    """
+    事件日志经 EventLogWriter 缓冲后批量 COPY 写入；表按 timestamp 范围分区，由 PartitionManager 维护。
+    """
+
+    TABLE = "temperature_event_log"
+    COLUMNS = ('patient_id', 'device_id', 'value', 'timestamp')
+
+    def __init__(
+        self,
+        client: PgSQLClient,
+        writer: Optional[EventLogWriter] = None,
+        partitions: Optional[PartitionManager] = None,
+    ):
         self.client = client
+        self.writer = writer or event_log_writer
+        self.partitions = partitions or event_log_partitions
+        self.writer.register(self.TABLE, self.COLUMNS)
 
     async def write_event_log(self, event: TemperatureDataReceived) -> None:
-        pool = await self.client.get_pool()
-        async with pool.acquire() as conn:
-            await conn.execute(
-                """
-                INSERT INTO temperature_event_log (patient_id, device_id, value, timestamp)
-                VALUES ($1, $2, $3, $4)
-                """,
-                event.patient_id,
-                event.device_id,
-                event.value,
-                event.timestamp,
-            )
+        self.writer.append(
+            self.TABLE, (event.patient_id, event.device_id, event.value, to_utc_naive(event.timestamp))
+        )
+
+    async def write_event_log_batch(self, events: Sequence[TemperatureDataReceived]) -> None:
+        self.writer.extend(
+            self.TABLE,
+            [(e.patient_id, e.device_id, e.value, to_utc_naive(e.timestamp)) for e in events],
+        )
 
     async def ensure_channel(self) -> None:
-        pool = await self.client.get_pool()
-        async with pool.acquire() as conn:
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS temperature_event_log (
-                    id SERIAL PRIMARY KEY,
-                    patient_id VARCHAR(64),
-                    device_id VARCHAR(64),
-                    value FLOAT,
-                    timestamp TIMESTAMP
-                )
-                """
-            )
\ No newline at end of file
+        await self.partitions.ensure_table(
+            self.TABLE,
+            """
+                patient_id VARCHAR(64),
+                device_id VARCHAR(64),
+                value FLOAT
+            """,
+        )
@@ -0,0 +1,145 @@
+import asyncio
+import contextlib
+import time
+from typing import Awaitable, Callable, Dict, Optional
+from app.adapters.spool.segment_spool import WriteAheadSpool, write_spool
+from app.core.logger import get_logger, get_sampled_logger
+from app.core.settings import settings
+
+logger = get_logger("spool_drainer", event_type="spool")
+sampled_logger = get_sampled_logger("spool_drainer", event_type="spool")
+
+# 重放处理函数: 接收记录负载，成功返回写入的数据条数，失败抛出异常
+ReplayHandler = Callable[[bytes], Awaitable[int]]
+
+
+class PermanentReplayError(Exception):
+    """
+    重放函数抛出此异常表示记录本身无法写入（负载损坏、存储拒绝数据格式等），重试也不会成功。
+    """
+
+
+class SpoolDrainer:
+    """
+    后台按写入顺序把 spool 中的记录重放回存储。
+
+    每种记录 kind 通过 register() 绑定一个重放函数；重放成功才 commit 推进读取位置，
+    临时性失败（存储不可用、超时）按指数退避（retry_interval 起，最多 max_retry_delay 秒）
+    等待存储恢复后重试同一条记录。
+    重放函数抛出 PermanentReplayError，或同一条记录连续失败 max_attempts 次（0 表示不限）时，
+    记录转入 spool 的死信文件并跳过（计入 skipped），不会阻塞其后的记录。
+    重放速率按数据条数限制为每秒 rate 条，避免存储刚恢复时被积压数据压垮、影响实时写入。
+    """
+
+    def __init__(
+        self,
+        spool: WriteAheadSpool,
+        rate: float = 20000.0,
+        retry_interval: float = 1.0,
+        max_retry_delay: float = 30.0,
+        max_attempts: int = 0,
+    ):
+        self.spool = spool
+        self.rate = rate
+        self.retry_interval = retry_interval
+        self.max_retry_delay = max_retry_delay
+        self.max_attempts = max_attempts
+        self._handlers: Dict[int, ReplayHandler] = {}
+        self._task: Optional[asyncio.Task] = None
+        # 当前队首记录已连续失败的次数
+        self._attempts = 0
+        # 指标
+        self.replayed = 0
+        self.records = 0
+        self.failures = 0
+        self.skipped = 0
+
+    def register(self, kind: int, handler: ReplayHandler) -> None:
+        self._handlers[kind] = handler
+
+    async def drain_once(self) -> int:
+        """
+        重放一条记录，返回写入的数据条数；没有待重放记录或记录转入死信时返回 0，
+        临时性失败时抛出异常（队首记录保留，下次重试）。
+        """
+        record = self.spool.peek()
+        if record is None:
+            return 0
+        kind, payload = record
+        handler = self._handlers.get(kind)
+        if handler is None:
+            await self._dead_letter(kind, payload, "记录类型未注册重放函数")
+            return 0
+        try:
+            count = await handler(payload)
+        except PermanentReplayError as e:
+            await self._dead_letter(kind, payload, repr(e.__cause__ or e))
+            return 0
+        except Exception as e:
+            self._attempts += 1
+            if self.max_attempts and self._attempts >= self.max_attempts:
+                await self._dead_letter(kind, payload, f"连续失败 {self._attempts} 次: {e!r}")
+                return 0
+            raise
+        self._attempts = 0
+        self.spool.commit()
+        self.records += 1
+        self.replayed += count
+        return count
+
+    async def _dead_letter(self, kind: int, payload: bytes, reason: str) -> None:
+        """
+        记录写入死信文件后 commit 跳过；死信写入失败时抛出异常，按临时性失败重试。
+        """
+        await asyncio.to_thread(self.spool.dead_letter, kind, payload)
+        self.spool.commit()
+        self._attempts = 0
+        self.skipped += 1
+        logger.error("spool 记录无法重放，已转入死信文件: kind=%d, %d 字节, %s", kind, len(payload), reason)
+
+    async def _run(self) -> None:
+        delay = self.retry_interval
+        while True:
+            await self.spool.readable.wait()
+            start = time.monotonic()
+            try:
+                count = await self.drain_once()
+            except Exception as e:
+                self.failures += 1
+                sampled_logger.warning("replay", "spool 重放失败，%.1fs 后重试: %s", delay, e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_retry_delay)
+                continue
+            delay = self.retry_interval
+            # 按条数限速: 本批应占用 count / rate 秒
+            wait = count / self.rate - (time.monotonic() - start) if self.rate > 0 else 0
+            await asyncio.sleep(max(wait, 0))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("spool 重放已启动: rate=%.0f/s", self.rate)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "replayed": self.replayed,
+            "records": self.records,
+            "failures": self.failures,
+            "skipped": self.skipped,
+        }
+
+
+spool_drainer = SpoolDrainer(
+    write_spool,
+    rate=settings.spool_drain_rate,
+    retry_interval=settings.spool_retry_interval,
+    max_retry_delay=settings.spool_max_retry_delay,
+    max_attempts=settings.spool_max_attempts,
+)
@@ -0,0 +1,384 @@
+import asyncio
+import contextlib
+import fcntl
+import mmap
+import os
+import re
+import struct
+import zlib
+from collections import deque
+from typing import Deque, Optional, Tuple
+from app.core.logger import get_logger, get_sampled_logger
+from app.core.settings import settings
+
+logger = get_logger("write_spool", event_type="spool")
+sampled_logger = get_sampled_logger("write_spool", event_type="spool")
+
+# 段文件头: 魔数 + 版本
+SEGMENT_MAGIC = b"NDSP"
+SEGMENT_VERSION = 1
+_SEGMENT_HEADER = struct.Struct("<4sI")
+# 记录头: 负载长度、CRC32(kind + 负载)、kind；长度为 0 表示段内数据结束（预分配区域全为 0）
+_RECORD_HEADER = struct.Struct("<IIB")
+_CURSOR = struct.Struct("<QQ")
+_SEGMENT_NAME = re.compile(r"^(\d{12})\.seg$")
+
+
+class _Segment:
+    """
+    单个预分配并 mmap 映射的段文件，write_pos 为下一条记录的写入偏移。
+    """
+
+    __slots__ = ("seq", "path", "size", "fd", "map", "write_pos")
+
+    def __init__(self, seq: int, path: str, size: int, create: bool):
+        self.seq = seq
+        self.path = path
+        flags = os.O_RDWR | (os.O_CREAT | os.O_EXCL if create else 0)
+        self.fd = os.open(path, flags, 0o644)
+        if create:
+            os.ftruncate(self.fd, size)
+        self.size = os.fstat(self.fd).st_size
+        self.map = mmap.mmap(self.fd, self.size)
+        if create:
+            _SEGMENT_HEADER.pack_into(self.map, 0, SEGMENT_MAGIC, SEGMENT_VERSION)
+        elif self.map[:4] != SEGMENT_MAGIC:
+            self.close()
+            raise ValueError(f"非法的 spool 段文件: {path}")
+        self.write_pos = _SEGMENT_HEADER.size
+
+    def read(self, pos: int) -> Optional[Tuple[int, bytes, int]]:
+        """
+        读取 pos 处的记录，返回 (kind, payload, next_pos)；到达数据末尾或 CRC 校验失败时返回 None。
+        """
+        if pos + _RECORD_HEADER.size > self.size:
+            return None
+        length, crc, kind = _RECORD_HEADER.unpack_from(self.map, pos)
+        end = pos + _RECORD_HEADER.size + length
+        if length == 0 or end > self.size:
+            return None
+        payload = self.map[pos + _RECORD_HEADER.size:end]
+        if zlib.crc32(payload, zlib.crc32(bytes((kind,)))) != crc:
+            return None
+        return kind, payload, end
+
+    def recover(self) -> int:
+        """
+        顺序校验全部记录，定位最后一条完整记录之后的位置（崩溃时写了一半的记录被忽略）。
+        """
+        pos = _SEGMENT_HEADER.size
+        while True:
+            record = self.read(pos)
+            if record is None:
+                break
+            pos = record[2]
+        self.write_pos = pos
+        return pos
+
+    def close(self) -> None:
+        with contextlib.suppress(Exception):
+            self.map.close()
+        with contextlib.suppress(OSError):
+            os.close(self.fd)
+
+
+class WriteAheadSpool:
+    """
+    本地追加写磁盘缓冲（write-ahead spool），在 InfluxDB / PostgreSQL 不可用时暂存待写数据。
+
+    数据按段存放在 directory 下的 {seq}.seg 文件中，每段预分配 segment_size 字节并 mmap 映射，
+    append() 只做一次内存拷贝，不发起系统调用，可在事件循环中直接调用；
+    后台任务每 sync_interval 秒在线程池中 msync 脏页，崩溃最多丢失最近一个周期的数据。
+    每条记录带 CRC32，重启时逐条校验定位写入末尾，残缺记录被丢弃。
+
+    读取端（SpoolDrainer）通过 peek()/commit() 按写入顺序消费，已读位置记录在 cursor 文件，
+    整段消费完毕后删除该段。cursor 在重放成功后才推进，崩溃后可能重复重放最后一批（至少一次）。
+    磁盘占用超过 max_bytes 时拒绝写入并计入丢弃。
+
+    open() 对所用目录加排他 flock: directory 已被其他进程占用时依次改用子目录 directory/1 ..
+    directory/{slots-1}，多 worker 共享同一配置时各自写独立的段文件与 cursor；进程退出后锁由内核释放，
+    其目录由下一个启动的进程接管并继续重放。
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_size: int = 64 * 1024 * 1024,
+        max_bytes: int = 2 * 1024 * 1024 * 1024,
+        sync_interval: float = 1.0,
+        slots: int = 16,
+    ):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.max_bytes = max_bytes
+        self.sync_interval = sync_interval
+        self.slots = max(1, slots)
+        # 实际使用的目录（加锁成功的 directory 或其子目录），open() 后确定
+        self.path = directory
+        self._segments: Deque[_Segment] = deque()
+        self._read_pos = 0
+        self._lock_fd: Optional[int] = None
+        self._cursor_fd: Optional[int] = None
+        self._dirty = False
+        self._task: Optional[asyncio.Task] = None
+        self.readable = asyncio.Event()
+        # 指标
+        self.appended = 0
+        self.appended_bytes = 0
+        self.consumed = 0
+        self.dropped = 0
+        self.dead_letters = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self._cursor_fd is not None
+
+    @property
+    def disk_bytes(self) -> int:
+        return sum(segment.size for segment in self._segments)
+
+    def _segment_path(self, seq: int) -> str:
+        return os.path.join(self.path, f"{seq:012d}.seg")
+
+    def _lock(self) -> None:
+        """
+        依次尝试对 directory 及其子目录 1 .. slots-1 加非阻塞排他 flock，全部被占用时抛出 RuntimeError。
+        """
+        for slot in range(self.slots):
+            path = self.directory if slot == 0 else os.path.join(self.directory, str(slot))
+            os.makedirs(path, exist_ok=True)
+            fd = os.open(os.path.join(path, "lock"), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            self.path = path
+            self._lock_fd = fd
+            return
+        raise RuntimeError(f"spool 目录及其 {self.slots - 1} 个子目录均已被其他进程占用: {self.directory}")
+
+    def _unlock(self) -> None:
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def open(self) -> None:
+        """
+        打开（或恢复）spool 目录: 加锁后按序号加载已有段，校验末段写入位置，恢复读取 cursor。
+        """
+        if self.is_open:
+            return
+        self._lock()
+        try:
+            self._load()
+        except BaseException:
+            while self._segments:
+                self._segments.popleft().close()
+            if self._cursor_fd is not None:
+                os.close(self._cursor_fd)
+                self._cursor_fd = None
+            self._unlock()
+            raise
+        if self.backlog_bytes:
+            self.readable.set()
+        logger.info("spool 已打开: %s, %d 个段，待重放 %d 字节",
+                    self.path, len(self._segments), self.backlog_bytes)
+
+    def _load(self) -> None:
+        seqs = sorted(
+            int(m.group(1)) for m in map(_SEGMENT_NAME.match, os.listdir(self.path)) if m
+        )
+        self._cursor_fd = os.open(os.path.join(self.path, "cursor"), os.O_RDWR | os.O_CREAT, 0o644)
+        raw = os.pread(self._cursor_fd, _CURSOR.size, 0)
+        cursor_seq, cursor_pos = _CURSOR.unpack(raw) if len(raw) == _CURSOR.size else (0, 0)
+        for seq in seqs:
+            if seq < cursor_seq:
+                # 已消费完但未来得及删除的段
+                os.remove(self._segment_path(seq))
+                continue
+            try:
+                segment = _Segment(seq, self._segment_path(seq), self.segment_size, create=False)
+            except (OSError, ValueError) as e:
+                logger.error("spool 段文件无法打开，已跳过: %s, %s", seq, e)
+                continue
+            segment.recover()
+            self._segments.append(segment)
+        if self._segments and self._segments[0].seq == cursor_seq:
+            self._read_pos = max(cursor_pos, _SEGMENT_HEADER.size)
+        else:
+            self._read_pos = _SEGMENT_HEADER.size
+
+    @property
+    def backlog_bytes(self) -> int:
+        if not self._segments:
+            return 0
+        total = sum(segment.write_pos for segment in self._segments)
+        return total - _SEGMENT_HEADER.size * len(self._segments) - (self._read_pos - _SEGMENT_HEADER.size)
+
+    def _roll(self, needed: int) -> Optional[_Segment]:
+        size = max(self.segment_size, needed + _SEGMENT_HEADER.size)
+        if self.disk_bytes + size > self.max_bytes:
+            return None
+        seq = self._segments[-1].seq + 1 if self._segments else 1
+        segment = _Segment(seq, self._segment_path(seq), size, create=True)
+        if not self._segments:
+            self._read_pos = _SEGMENT_HEADER.size
+        self._segments.append(segment)
+        return segment
+
+    def append(self, kind: int, payload: bytes) -> bool:
+        """
+        追加一条记录；spool 未打开或磁盘配额已满时计入丢弃并返回 False。
+        """
+        if not self.is_open:
+            self.dropped += 1
+            return False
+        needed = _RECORD_HEADER.size + len(payload)
+        segment = self._segments[-1] if self._segments else None
+        try:
+            if segment is None or segment.write_pos + needed > segment.size:
+                segment = self._roll(needed)
+        except OSError as e:
+            segment = None
+            sampled_logger.error("roll", "spool 新建段失败: %s", e)
+        if segment is None:
+            self.dropped += 1
+            sampled_logger.warning("full", "spool 已满，丢弃 %d 字节，累计丢弃 %d 条", len(payload), self.dropped)
+            return False
+        pos = segment.write_pos
+        crc = zlib.crc32(payload, zlib.crc32(bytes((kind,))))
+        start = pos + _RECORD_HEADER.size
+        end = start + len(payload)
+        # 先在记录之后写入结束标记，避免恢复后覆盖写入时误读到旧的残留记录
+        if end + 4 <= segment.size:
+            segment.map[end:end + 4] = b"\0\0\0\0"
+        segment.map[start:end] = payload
+        # 负载写完后再写记录头，读端看到非零长度时负载已完整
+        _RECORD_HEADER.pack_into(segment.map, pos, len(payload), crc, kind)
+        segment.write_pos = end
+        self.appended += 1
+        self.appended_bytes += len(payload)
+        self._dirty = True
+        self.readable.set()
+        return True
+
+    def peek(self) -> Optional[Tuple[int, bytes]]:
+        """
+        返回最早一条未消费记录 (kind, payload)，没有时返回 None。
+        """
+        while self._segments:
+            segment = self._segments[0]
+            if self._read_pos < segment.write_pos:
+                record = segment.read(self._read_pos)
+                if record is not None:
+                    return record[0], record[1]
+                logger.error("spool 记录校验失败，跳过段剩余数据: %s@%d", segment.seq, self._read_pos)
+                self._read_pos = segment.write_pos
+            if len(self._segments) == 1:
+                self.readable.clear()
+                return None
+            self._drop_head()
+        self.readable.clear()
+        return None
+
+    def commit(self) -> None:
+        """
+        确认 peek() 返回的记录已处理，推进读取位置。
+        """
+        segment = self._segments[0]
+        record = segment.read(self._read_pos)
+        if record is None:
+            return
+        self._read_pos = record[2]
+        self.consumed += 1
+        if self._read_pos >= segment.write_pos and len(self._segments) > 1:
+            self._drop_head()
+        else:
+            os.pwrite(self._cursor_fd, _CURSOR.pack(segment.seq, self._read_pos), 0)
+
+    def dead_letter(self, kind: int, payload: bytes) -> None:
+        """
+        把无法重放的记录追加到死信文件 {path}/deadletter（记录格式与段文件相同，便于人工排查后重放），
+        写入并 fsync 后返回，调用方随后 commit() 跳过该记录（阻塞调用，应通过 asyncio.to_thread 执行）。
+        """
+        header = _RECORD_HEADER.pack(len(payload), zlib.crc32(payload, zlib.crc32(bytes((kind,)))), kind)
+        fd = os.open(os.path.join(self.path, "deadletter"), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, header + payload)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        self.dead_letters += 1
+
+    def _drop_head(self) -> None:
+        segment = self._segments.popleft()
+        segment.close()
+        with contextlib.suppress(OSError):
+            os.remove(segment.path)
+        self._read_pos = _SEGMENT_HEADER.size
+        os.pwrite(self._cursor_fd, _CURSOR.pack(self._segments[0].seq, self._read_pos), 0)
+
+    def sync(self) -> None:
+        """
+        msync 全部段的脏页（阻塞调用，事件循环中应通过 asyncio.to_thread 执行）。
+        """
+        self._dirty = False
+        for segment in list(self._segments):
+            with contextlib.suppress(ValueError):
+                segment.map.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            if self._dirty:
+                try:
+                    await asyncio.to_thread(self.sync)
+                except Exception as e:
+                    sampled_logger.error("sync", "spool 刷盘异常: %s", e)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def close(self) -> None:
+        """
+        刷盘并关闭全部段文件。
+        """
+        if not self.is_open:
+            return
+        self.sync()
+        while self._segments:
+            self._segments.popleft().close()
+        os.close(self._cursor_fd)
+        self._cursor_fd = None
+        self._unlock()
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "segments": len(self._segments),
+            "disk_bytes": self.disk_bytes,
+            "backlog_bytes": self.backlog_bytes,
+            "appended": self.appended,
+            "appended_bytes": self.appended_bytes,
+            "consumed": self.consumed,
+            "dropped": self.dropped,
+            "dead_letters": self.dead_letters,
+        }
+
+
+write_spool = WriteAheadSpool(
+    settings.spool_dir,
+    segment_size=settings.spool_segment_size,
+    max_bytes=settings.spool_max_bytes,
+    sync_interval=settings.spool_sync_interval,
+    slots=settings.spool_slots,
+)
@@ -0,0 +1,107 @@
+"""
+多进程 TCP 网关入口。
+
+N 个 worker 进程以 SO_REUSEPORT 共同监听 TCP_PORT，由内核在进程间分摊连接；
+每个 worker 独立完成帧解析与解码，再把 payload 批量经 Unix socket 转发给应用进程，
+应用进程（TCP_CLUSTER_WORKERS>0 时）在 lifespan 中启动 IPC 接收服务并发布到事件总线。
+
+运行: python -m app.adapters.tcp_gateway.cluster [--workers N]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from typing import Dict
+
+from app.core.logger import get_logger
+from app.core.settings import settings
+
+logger = get_logger("tcp_gateway.cluster", event_type="tcp")
+
+
+async def _worker_main(index: int) -> None:
+    from .ingest import ingestion_queue
+    from .ipc import IpcForwarder
+    from .registry import connection_registry
+    from .server import TCP_PORT, create_gateway_server
+
+    forwarder = IpcForwarder(
+        settings.tcp_ipc_path,
+        batch_size=settings.tcp_ipc_batch_size,
+        flush_interval=settings.tcp_ipc_flush_interval,
+    )
+    await forwarder.start()
+    ingestion_queue.start(sink=forwarder.send)
+    connection_registry.start()
+    server = await create_gateway_server(reuse_port=True)
+    logger.info(f"网关worker#{index} 已启动: pid={os.getpid()}, port={TCP_PORT}")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    async with server:
+        await stop.wait()
+    await connection_registry.stop()
+    await ingestion_queue.stop()
+    await forwarder.close()
+    logger.info(f"网关worker#{index} 已退出")
+
+
+def run_worker(index: int) -> None:
+    asyncio.run(_worker_main(index))
+
+
+def _spawn(ctx, index: int) -> multiprocessing.Process:
+    proc = ctx.Process(target=run_worker, args=(index,), name=f"tcp-gateway-{index}", daemon=False)
+    proc.start()
+    return proc
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="neoDTH 多进程 TCP 网关")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.tcp_cluster_workers or os.cpu_count() or 1,
+        help="worker 进程数，默认取 TCP_CLUSTER_WORKERS 或 CPU 核数",
+    )
+    args = parser.parse_args()
+    if not hasattr(socket, "SO_REUSEPORT"):
+        raise SystemExit("多进程网关依赖 SO_REUSEPORT，仅支持 Linux/BSD")
+
+    # spawn 避免 fork 继承父进程的事件循环与连接状态
+    ctx = multiprocessing.get_context("spawn")
+    procs: Dict[int, multiprocessing.Process] = {i: _spawn(ctx, i) for i in range(args.workers)}
+    logger.info(f"多进程网关启动: workers={args.workers}, ipc={settings.tcp_ipc_path}")
+
+    stopping = False
+
+    def _stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    # 监督循环: worker 异常退出时拉起替补
+    while not stopping:
+        time.sleep(1)
+        for index, proc in list(procs.items()):
+            if not proc.is_alive() and not stopping:
+                logger.warning(f"网关worker#{index} 退出(exitcode={proc.exitcode})，重新拉起")
+                procs[index] = _spawn(ctx, index)
+
+    for proc in procs.values():
+        if proc.is_alive():
+            proc.terminate()
+    for proc in procs.values():
+        proc.join(timeout=10)
+    logger.info("多进程网关已关闭")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import logging
+from typing import Callable, Iterator
+from app.core.logger import get_sampled_logger
+
+MAGIC = b"\xab\xcd"
+HEADER_SIZE = 4
+MAX_PAYLOAD_LENGTH = 256
+_MAGIC_HI, _MAGIC_LO = MAGIC
+_INFO = logging.INFO
+
+sampled_logger = get_sampled_logger("tcp_gateway.decoder", event_type="tcp")
+
+
+class FrameDecoder:
+    """
+    TCP 帧增量解码器，帧格式: MAGIC(2B) | len(1B) | crc8(1B) | msgpack payload。
+    内部使用定长 bytearray 缓冲区 + 读/写游标，已消费数据只移动读游标，
+    累计超过 compact_threshold 后才原地搬移一次，避免每帧重建缓冲区。
+    frames() 以 memoryview 切片返回通过 CRC 校验的 payload，不做拷贝。
+    注意: 切片仅在迭代到下一帧之前有效，需在此之前完成解码。
+
+    数据来源两种方式:
+        feed(data): 供 StreamReader 模式追加已读取的数据。
+        get_buffer()/buffer_updated(): 供 BufferedProtocol 模式由内核直接写入缓冲区。
+    """
+
+    __slots__ = (
+        "_buf",
+        "_pos",
+        "_end",
+        "_crc_func",
+        "_compact_threshold",
+        "_read_size",
+        "_max_read_size",
+        "crc_errors",
+        "length_errors",
+        "discarded_bytes",
+    )
+
+    def __init__(
+        self,
+        crc_func: Callable[[bytes], int],
+        compact_threshold: int = 4096,
+        read_size: int = 1024,
+        max_read_size: int = 64 * 1024,
+    ):
+        self._buf = bytearray(read_size)
+        self._pos = 0
+        self._end = 0
+        self._crc_func = crc_func
+        self._compact_threshold = compact_threshold
+        self._read_size = read_size
+        self._max_read_size = max_read_size
+        self.crc_errors = 0
+        self.length_errors = 0
+        self.discarded_bytes = 0
+
+    def __len__(self) -> int:
+        """
+        当前尚未消费的字节数。
+        """
+        return self._end - self._pos
+
+    def feed(self, data: bytes) -> None:
+        """
+        追加从 socket 读取的数据。
+        """
+        n = len(data)
+        self._reserve(n)
+        end = self._end
+        self._buf[end:end + n] = data
+        self._end = end + n
+
+    def get_buffer(self, sizehint: int = -1) -> memoryview:
+        """
+        返回缓冲区尾部的可写区域，供 BufferedProtocol.get_buffer 使用。
+        可写区域大小自适应: 上次读取填满时翻倍，直至 max_read_size。
+        """
+        self._reserve(max(sizehint, self._read_size))
+        return memoryview(self._buf)[self._end:]
+
+    def buffer_updated(self, nbytes: int) -> None:
+        """
+        登记内核已写入 get_buffer() 返回区域的字节数。
+        """
+        if nbytes >= len(self._buf) - self._end and self._read_size < self._max_read_size:
+            self._read_size = min(self._read_size * 2, self._max_read_size)
+        self._end += nbytes
+
+    def _reserve(self, n: int) -> None:
+        """
+        保证缓冲区尾部至少有 n 字节空闲: 优先原地压缩，不足时再扩容。
+        """
+        pos, end = self._pos, self._end
+        if pos == end:
+            self._pos = self._end = 0
+        elif pos >= self._compact_threshold or len(self._buf) - end < n:
+            # 同长度切片赋值不会改变 bytearray 大小，可原地搬移
+            self._buf[:end - pos] = self._buf[pos:end]
+            self._pos, self._end = 0, end - pos
+        free = len(self._buf) - self._end
+        if free < n:
+            self._buf.extend(bytes(n - free))
+
+    def frames(self) -> Iterator[memoryview]:
+        """
+        迭代缓冲区中所有完整且 CRC 校验通过的帧 payload。
+        不完整的尾帧保留在缓冲区，等待下一次数据到达。
+        """
+        buf = self._buf
+        view = memoryview(buf)
+        crc_func = self._crc_func
+        try:
+            while True:
+                pos = self._pos
+                end = self._end
+                if end - pos < HEADER_SIZE:
+                    return
+                if buf[pos] != _MAGIC_HI or buf[pos + 1] != _MAGIC_LO:
+                    idx = buf.find(MAGIC, pos, end)
+                    if idx == -1:
+                        # 保留末尾可能属于下一个 Magic 头的半个字节
+                        keep = 1 if buf[end - 1] == _MAGIC_HI else 0
+                        if sampled_logger.allow(_INFO, "discard"):
+                            sampled_logger.emit(
+                                _INFO, "discard", "丢弃无效数据: %s", bytes(view[pos:min(pos + 16, end)]).hex()
+                            )
+                        self.discarded_bytes += end - keep - pos
+                        self._pos = end - keep
+                        return
+                    if sampled_logger.allow(_INFO, "skip"):
+                        sampled_logger.emit(_INFO, "skip", "跳过至Magic头: %s", bytes(view[pos:idx]).hex())
+                    self.discarded_bytes += idx - pos
+                    self._pos = pos = idx
+                    if end - pos < HEADER_SIZE:
+                        return
+
+                length = buf[pos + 2]
+                crc_val = buf[pos + 3]
+                if not (1 <= length <= MAX_PAYLOAD_LENGTH):
+                    if sampled_logger.allow(_INFO, "length"):
+                        sampled_logger.emit(
+                            _INFO, "length", "非法长度字段: %d, 包头: %s", length, bytes(view[pos:min(pos + 16, end)]).hex()
+                        )
+                    self.length_errors += 1
+                    self._pos = pos + HEADER_SIZE
+                    continue
+
+                frame_end = pos + HEADER_SIZE + length
+                if end < frame_end:
+                    return
+
+                # 先推进游标，保证消费方中断迭代时不会重复处理该帧
+                self._pos = frame_end
+                payload = view[pos + HEADER_SIZE:frame_end]
+                calc = crc_func(payload)
+                if calc != crc_val:
+                    if sampled_logger.allow(_INFO, "crc"):
+                        sampled_logger.emit(
+                            _INFO, "crc", "CRC校验失败: recv=%d, calc=%d, data=%s", crc_val, calc, payload.hex()
+                        )
+                    self.crc_errors += 1
+                    payload.release()
+                    continue
+                try:
+                    yield payload
+                finally:
+                    payload.release()
+        finally:
+            view.release()
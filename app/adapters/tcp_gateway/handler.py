@@ -1,78 +1,53 @@
 import asyncio
-import msgpack
-import crcmod
-from  app.core.logger import logger
-
-MAGIC = b"\xab\xcd"
-
-_crc8_func = crcmod.mkCrcFun(0x131, initCrc=0x00, xorOut=0x00)
-
-def crc8(data: bytes) -> int:
-    return _crc8_func(data)
-
-async def _unpack_msgpack(data: bytes):
-    try:
-        return msgpack.unpackb(data, raw=False)
-    except Exception as e:
-        logger.warning(f"msgpack解包失败: {e} 原始data={data.hex()}")
-        return None
+import logging
+from typing import List
+from  app.core.logger import logger, get_sampled_logger
+from .crc import crc8
+from .frame_decoder import FrameDecoder
+from .ingest import ingestion_queue
+from .registry import connection_registry
+from .payload_decoder import decode_frames
+
+READ_CHUNK_SIZE = 64 * 1024
+
+sampled_logger = get_sampled_logger("tcp_gateway.handler", event_type="tcp")
+
+async def publish_payload(payload: dict):
+    # 事件管道对接：直接通过 event_bus 发布原始payload
+    from  app.core.event_bus import event_bus
+    await event_bus.publish("tcp_data_received", payload)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("已推送事件: sn=%s, payload=%s", payload["sn"], payload)
+
+async def publish_payloads(payloads: List[dict]):
+    # 摄取队列批量取出的 payload 一次发布，订阅者按批处理
+    from  app.core.event_bus import event_bus
+    await event_bus.publish_many("tcp_data_received", payloads)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("已批量推送事件: %d 条", len(payloads))
 
 async def handle_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
-    buf = b""
-    while True:
-        try:
-            chunk = await reader.read(1024)
-            if not chunk:
-                break
-            buf += chunk
-
-            while len(buf) >= 4:
-                if buf[:2] != MAGIC:
-                    idx = buf.find(MAGIC)
-                    if idx == -1:
-                        logger.info(f"丢弃无效数据: {buf[:16].hex()}")
-                        buf = b""
-                        break
-                    logger.info(f"跳过至Magic头: {buf[:idx].hex()}")
-                    buf = buf[idx:]
-                    if len(buf) < 4:
-                        break
-
-                length = buf[2]
-                crc_val = buf[3]
-
-                if not (1 <= length <= 256):
-                    logger.info(f"非法长度字段: {length}, 包头: {buf[:16].hex()}")
-                    buf = buf[4:]
-                    continue
-
-                if len(buf) < 4 + length:
+    decoder = FrameDecoder(crc8)
+    conn = connection_registry.open(writer.get_extra_info("peername"), writer.close)
+    try:
+        while True:
+            try:
+                chunk = await reader.read(READ_CHUNK_SIZE)
+                if not chunk:
                     break
-
-                data = buf[4 : 4 + length]
-                if crc8(data) != crc_val:
-                    logger.info(f"CRC校验失败: recv={crc_val}, calc={crc8(data)}, data={data.hex()}")
-                    buf = buf[4 + length :]
-                    continue
-
-                payload = await _unpack_msgpack(data)
-                if not payload:
-                    buf = buf[4 + length :]
-                    continue
-
-                sn = payload.get("sn")
-                if not sn:
-                    logger.info(f"缺失sn字段: {payload}")
-                    buf = buf[4 + length :]
-                    continue
-
-                # 事件管道对接：直接通过 event_bus 发布原始payload
-                from  app.core.event_bus import event_bus
-                await event_bus.publish("tcp_data_received", payload)
-                logger.info(f"已推送事件: sn={sn}, payload={payload}")
-
-                buf = buf[4 + length :]
-
-        except Exception as e:
-            logger.error(f"TCP处理异常: {e}")
-            break
\ No newline at end of file
+                decoder.feed(chunk)
+
+                payloads = decode_frames(decoder.frames())
+                if payloads:
+                    connection_registry.touch(conn, payloads[-1]["sn"], len(payloads))
+                for payload in payloads:
+                    await ingestion_queue.put(payload)
+                # 摄取队列高于高水位时暂停读取，由内核缓冲区向设备端施加背压
+                await ingestion_queue.wait_writable()
+
+            except Exception as e:
+                sampled_logger.error("handle", "TCP处理异常: %s", e)
+                break
+    finally:
+        connection_registry.close(conn)
+        writer.close()
@@ -0,0 +1,207 @@
+import asyncio
+from typing import Awaitable, Callable, List, Optional, Set
+from app.core.logger import logger, get_sampled_logger
+from app.core.settings import settings
+
+sampled_logger = get_sampled_logger("tcp_gateway.ingest", event_type="tcp")
+
+
+class IngestionQueue:
+    """
+    TCP 网关与事件总线之间的有界摄取队列。
+    解析循环只负责入队，后台 worker 负责发布到事件总线，存储延迟不再阻塞 socket 读取。
+    配置 sink_many 时，worker 每次取出队列中已有的至多 batch_size 条 payload 整批发布。
+
+    背压策略:
+        队列深度 >= high_watermark 时，暂停正在入队的连接（protocol 模式 pause_reading，
+        stream 模式由 wait_writable() 阻塞读取循环）；
+        深度回落到 <= low_watermark 时统一恢复；
+        队列已满时 stream 模式等待入队，protocol 模式直接丢弃并计数。
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        high_watermark: int,
+        low_watermark: int,
+        workers: int = 1,
+        sink: Optional[Callable[[dict], Awaitable[None]]] = None,
+        sink_many: Optional[Callable[[List[dict]], Awaitable[None]]] = None,
+        batch_size: int = 256,
+    ):
+        if not (0 <= low_watermark < high_watermark <= maxsize):
+            raise ValueError("需满足 0 <= low_watermark < high_watermark <= maxsize")
+        self.maxsize = maxsize
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.workers = workers
+        self._sink = sink
+        self._sink_many = sink_many
+        self.batch_size = max(1, batch_size)
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._paused_transports: Set[asyncio.BaseTransport] = set()
+        self._writable = asyncio.Event()
+        self._writable.set()
+        self._tasks: List[asyncio.Task] = []
+        # 指标
+        self.enqueued = 0
+        self.published = 0
+        self.dropped = 0
+        self.publish_errors = 0
+        self.max_depth = 0
+        self.pause_events = 0
+
+    def put_nowait(self, payload: dict, transport: Optional[asyncio.BaseTransport] = None) -> bool:
+        """
+        入队一条 payload，队列已满返回 False（已计入丢弃数）。供无法 await 的 protocol 回调使用。
+        传入 transport 时，超过高水位会暂停该连接的读取。
+        """
+        try:
+            self._queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            sampled_logger.warning("dropped", "摄取队列已满，丢弃数据，累计丢弃 %d 条", self.dropped)
+            return False
+        self._on_enqueued(transport)
+        return True
+
+    async def put(self, payload: dict) -> None:
+        """
+        入队一条 payload，队列已满时等待而不丢弃。供 stream 模式的读取协程使用。
+        """
+        await self._queue.put(payload)
+        self._on_enqueued(None)
+
+    def _on_enqueued(self, transport: Optional[asyncio.BaseTransport]) -> None:
+        self.enqueued += 1
+        depth = self._queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if depth >= self.high_watermark:
+            if self._writable.is_set():
+                self.pause_events += 1
+                self._writable.clear()
+            if transport is not None and transport not in self._paused_transports:
+                transport.pause_reading()
+                self._paused_transports.add(transport)
+
+    async def wait_writable(self) -> None:
+        """
+        stream 模式下在读取下一批数据前调用，队列高于高水位时阻塞直至回落。
+        """
+        await self._writable.wait()
+
+    def forget(self, transport: asyncio.BaseTransport) -> None:
+        """
+        连接关闭时移除其暂停状态。
+        """
+        self._paused_transports.discard(transport)
+
+    def _maybe_resume(self) -> None:
+        if self._writable.is_set() or self._queue.qsize() > self.low_watermark:
+            return
+        self._writable.set()
+        paused = self._paused_transports
+        self._paused_transports = set()
+        for transport in paused:
+            if not transport.is_closing():
+                transport.resume_reading()
+
+    async def _worker(self) -> None:
+        if self._sink_many is not None:
+            await self._batch_worker()
+            return
+        queue = self._queue
+        sink = self._sink
+        while True:
+            payload = await queue.get()
+            try:
+                self._maybe_resume()
+                await sink(payload)
+                self.published += 1
+            except Exception as e:
+                self.publish_errors += 1
+                sampled_logger.error("publish", "摄取队列发布异常: %s", e)
+            finally:
+                queue.task_done()
+
+    async def _batch_worker(self) -> None:
+        queue = self._queue
+        sink_many = self._sink_many
+        batch_size = self.batch_size
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < batch_size:
+                try:
+                    batch.append(queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                self._maybe_resume()
+                await sink_many(batch)
+                self.published += len(batch)
+            except Exception as e:
+                self.publish_errors += len(batch)
+                sampled_logger.error("publish", "摄取队列批量发布异常(%d 条): %s", len(batch), e)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    def start(
+        self,
+        sink: Optional[Callable[[dict], Awaitable[None]]] = None,
+        sink_many: Optional[Callable[[List[dict]], Awaitable[None]]] = None,
+    ) -> None:
+        """
+        启动 worker。缺省时批量发布到本进程事件总线（event_bus.publish_many），
+        多进程网关中传入 sink 替换为 IPC 转发（逐条交给 IpcForwarder，由其攒批）。
+        """
+        if self._tasks:
+            return
+        if sink is not None or sink_many is not None:
+            self._sink = sink
+            self._sink_many = sink_many
+        if self._sink is None and self._sink_many is None:
+            from .handler import publish_payloads
+            self._sink_many = publish_payloads
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info("摄取队列已启动: maxsize=%d, workers=%d", self.maxsize, self.workers)
+
+    async def stop(self, drain_timeout: float = 5.0) -> None:
+        """
+        停止 worker，先在超时时间内尽量发布完已入队的数据。
+        """
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("摄取队列关闭超时，剩余 %d 条未发布", self._queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict:
+        return {
+            "depth": self._queue.qsize(),
+            "max_depth": self.max_depth,
+            "maxsize": self.maxsize,
+            "high_watermark": self.high_watermark,
+            "low_watermark": self.low_watermark,
+            "enqueued": self.enqueued,
+            "published": self.published,
+            "dropped": self.dropped,
+            "publish_errors": self.publish_errors,
+            "paused_connections": len(self._paused_transports),
+            "pause_events": self.pause_events,
+        }
+
+
+ingestion_queue = IngestionQueue(
+    maxsize=settings.tcp_ingest_queue_size,
+    high_watermark=settings.tcp_ingest_high_watermark,
+    low_watermark=settings.tcp_ingest_low_watermark,
+    workers=settings.tcp_ingest_workers,
+    batch_size=settings.tcp_ingest_batch_size,
+)
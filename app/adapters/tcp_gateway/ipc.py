@@ -0,0 +1,120 @@
+import asyncio
+import contextlib
+import os
+import struct
+from typing import Awaitable, Callable, List, Optional
+import msgpack
+from app.core.logger import logger
+
+# 本地 IPC 帧格式: u32 大端长度 | msgpack(list[payload])
+_LENGTH = struct.Struct(">I")
+MAX_IPC_FRAME = 16 * 1024 * 1024
+
+
+class IpcForwarder:
+    """
+    网关 worker 进程侧: 将解码后的 payload 批量转发到主进程的 Unix socket。
+    作为 IngestionQueue 的 sink 使用，批量满或超过 flush_interval 时发送一次，
+    连接断开时按指数退避重连，期间 send() 阻塞从而向摄取队列施加背压。
+    """
+
+    def __init__(self, path: str, batch_size: int = 256, flush_interval: float = 0.01):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._batch: List[dict] = []
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self.sent_batches = 0
+        self.sent_payloads = 0
+
+    async def _ensure_connected(self) -> asyncio.StreamWriter:
+        delay = 0.1
+        while self._writer is None or self._writer.is_closing():
+            try:
+                _, self._writer = await asyncio.open_unix_connection(self.path)
+                logger.info(f"IPC已连接: {self.path}")
+            except OSError as e:
+                logger.warning(f"IPC连接失败: {e}，{delay:.1f}s 后重试")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 5.0)
+        return self._writer
+
+    async def send(self, payload: dict) -> None:
+        self._batch.append(payload)
+        if len(self._batch) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if not self._batch:
+                return
+            batch, self._batch = self._batch, []
+            data = msgpack.packb(batch, use_bin_type=True)
+            while True:
+                writer = await self._ensure_connected()
+                try:
+                    writer.write(_LENGTH.pack(len(data)) + data)
+                    await writer.drain()
+                    break
+                except (ConnectionError, OSError) as e:
+                    logger.warning(f"IPC发送失败，重连后重发: {e}")
+                    writer.close()
+                    self._writer = None
+            self.sent_batches += 1
+            self.sent_payloads += len(batch)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"IPC定时发送异常: {e}")
+
+    async def start(self) -> None:
+        await self._ensure_connected()
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        if self._flush_task:
+            self._flush_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._flush_task
+        await self.flush()
+        if self._writer:
+            self._writer.close()
+            with contextlib.suppress(Exception):
+                await self._writer.wait_closed()
+
+
+async def start_ipc_receiver(
+    path: str, on_payload: Callable[[dict], Awaitable[None]]
+) -> asyncio.AbstractServer:
+    """
+    主进程侧: 监听 Unix socket，接收各网关 worker 转发的 payload 批次。
+    on_payload 阻塞时不再读取该 worker 的数据，背压经 socket 传回 worker。
+    """
+
+    async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                header = await reader.readexactly(_LENGTH.size)
+                (length,) = _LENGTH.unpack(header)
+                if length > MAX_IPC_FRAME:
+                    logger.error(f"IPC帧过大: {length}，断开连接")
+                    break
+                batch = msgpack.unpackb(await reader.readexactly(length), raw=False)
+                for payload in batch:
+                    await on_payload(payload)
+        except asyncio.IncompleteReadError:
+            pass
+        except Exception as e:
+            logger.error(f"IPC接收异常: {e}")
+        finally:
+            writer.close()
+
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(path)
+    return await asyncio.start_unix_server(_handle, path=path)
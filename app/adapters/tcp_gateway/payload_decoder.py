@@ -0,0 +1,29 @@
+import logging
+from typing import Iterable, List
+from msgpack import unpackb
+from app.core.logger import get_sampled_logger
+
+sampled_logger = get_sampled_logger("tcp_gateway.payload", event_type="tcp")
+
+
+def decode_frames(frames: Iterable[memoryview]) -> List[dict]:
+    """
+    一次遍历解码缓冲区内所有完整帧，返回含 sn 字段的合法 payload 列表。
+    帧已按长度字段切分且通过 CRC 校验，直接对 memoryview 切片 unpackb，
+    既不拷贝也不会因单帧损坏影响后续帧的边界。
+    """
+    payloads = []
+    append = payloads.append
+    for data in frames:
+        try:
+            payload = unpackb(data, raw=False)
+        except Exception as e:
+            if sampled_logger.allow(logging.WARNING, "unpack"):
+                sampled_logger.emit(logging.WARNING, "unpack", "msgpack解包失败: %s 原始data=%s", e, data.hex())
+            continue
+        sn = payload.get("sn") if type(payload) is dict else None
+        if not sn:
+            sampled_logger.info("no_sn", "缺失sn字段: %s", payload)
+            continue
+        append(payload)
+    return payloads
@@ -0,0 +1,55 @@
+import asyncio
+from typing import Optional
+from app.core.logger import logger
+from .frame_decoder import FrameDecoder
+from .handler import crc8
+from .ingest import ingestion_queue
+from .registry import connection_registry, DeviceConnection
+from .payload_decoder import decode_frames
+
+
+class GatewayProtocol(asyncio.BufferedProtocol):
+    """
+    基于 BufferedProtocol 的 TCP 网关连接处理。
+    内核直接 recv_into 帧解码器的缓冲区，无需每次读取唤醒协程，也没有 1 KiB 读取上限；
+    解码后的 payload 直接进入摄取队列，队列超过高水位时暂停本连接读取。
+    """
+
+    __slots__ = ("_transport", "_decoder", "_conn")
+
+    def __init__(self):
+        self._transport: Optional[asyncio.Transport] = None
+        self._decoder = FrameDecoder(crc8)
+        self._conn: Optional[DeviceConnection] = None
+
+    def connection_made(self, transport: asyncio.Transport):
+        self._transport = transport
+        self._conn = connection_registry.open(transport.get_extra_info("peername"), transport.close)
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        return self._decoder.get_buffer(sizehint)
+
+    def buffer_updated(self, nbytes: int):
+        decoder = self._decoder
+        decoder.buffer_updated(nbytes)
+        payloads = decode_frames(decoder.frames())
+        if not payloads:
+            return
+        connection_registry.touch(self._conn, payloads[-1]["sn"], len(payloads))
+        put = ingestion_queue.put_nowait
+        transport = self._transport
+        for payload in payloads:
+            put(payload, transport)
+
+    def eof_received(self) -> bool:
+        # 返回 False 让传输层在对端关闭写方向后关闭连接
+        return False
+
+    def connection_lost(self, exc: Optional[Exception]):
+        conn = self._conn
+        if exc:
+            logger.info("TCP连接异常断开: sn=%s, peer=%s, %s", conn.sn, conn.peer, exc)
+        connection_registry.close(conn)
+        if self._transport is not None:
+            ingestion_queue.forget(self._transport)
+        self._transport = None
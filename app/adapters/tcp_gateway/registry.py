@@ -0,0 +1,194 @@
+import asyncio
+import contextlib
+import itertools
+import math
+import time
+from typing import Callable, Dict, List, Optional, Set
+from app.core.logger import logger
+from app.core.settings import settings
+
+
+class DeviceConnection:
+    """
+    单条设备连接的运行状态。
+    """
+
+    __slots__ = (
+        "conn_id",
+        "sn",
+        "peer",
+        "connected_at",
+        "last_seen",
+        "frames",
+        "frame_rate",
+        "_rate_since",
+        "_rate_frames",
+        "_close",
+    )
+
+    def __init__(self, conn_id: int, peer, close: Callable[[], None], now: float):
+        self.conn_id = conn_id
+        self.sn: Optional[str] = None
+        self.peer = peer
+        self.connected_at = time.time()
+        self.last_seen = now
+        self.frames = 0
+        self.frame_rate = 0.0
+        self._rate_since = now
+        self._rate_frames = 0
+        self._close = close
+
+
+class ConnectionRegistry:
+    """
+    TCP 设备连接注册表，按 sn 索引在线设备并回收空闲连接。
+
+    空闲回收使用时间轮而非每连接一个定时任务:
+        touch() 只更新 last_seen，O(1)；
+        时间轮每 tick 推进一格，只检查到期格子里的连接，
+        仍活跃的按剩余时间重新挂到后续格子，超时的直接关闭。
+    帧率按 1 秒窗口做指数平滑，在 touch() 中顺带更新；
+    stats() 按 last_seen 之后没有收到帧的窗口数衰减，停止上报的设备帧率随之归零。
+    """
+
+    RATE_WINDOW = 1.0
+    RATE_ALPHA = 0.3
+
+    def __init__(self, idle_timeout: float, tick: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        self.idle_timeout = idle_timeout
+        self.tick = tick
+        self._clock = clock
+        self._slots: List[Set[DeviceConnection]] = [
+            set() for _ in range(int(math.ceil(idle_timeout / tick)) + 1)
+        ]
+        self._cursor = 0
+        self._by_id: Dict[int, DeviceConnection] = {}
+        self._by_sn: Dict[str, DeviceConnection] = {}
+        self._ids = itertools.count(1)
+        self._task: Optional[asyncio.Task] = None
+        self.reaped = 0
+
+    def _schedule(self, conn: DeviceConnection, delay: float) -> None:
+        ticks = max(1, min(len(self._slots) - 1, int(math.ceil(delay / self.tick))))
+        self._slots[(self._cursor + ticks) % len(self._slots)].add(conn)
+
+    def open(self, peer, close: Callable[[], None]) -> DeviceConnection:
+        """
+        登记新连接，close 为关闭该连接的回调（transport.close / writer.close）。
+        """
+        conn = DeviceConnection(next(self._ids), peer, close, self._clock())
+        self._by_id[conn.conn_id] = conn
+        self._schedule(conn, self.idle_timeout)
+        return conn
+
+    def touch(self, conn: DeviceConnection, sn: Optional[str], frames: int) -> None:
+        """
+        记录一次读取收到的有效帧，绑定 sn 并刷新活跃时间。
+        """
+        now = self._clock()
+        conn.last_seen = now
+        conn.frames += frames
+        if sn and sn != conn.sn:
+            if conn.sn and self._by_sn.get(conn.sn) is conn:
+                del self._by_sn[conn.sn]
+            conn.sn = sn
+            # 设备重连时旧连接可能尚未超时，索引指向最新连接
+            self._by_sn[sn] = conn
+        elapsed = now - conn._rate_since
+        if elapsed >= self.RATE_WINDOW:
+            rate = (conn.frames - conn._rate_frames) / elapsed
+            conn.frame_rate += self.RATE_ALPHA * (rate - conn.frame_rate)
+            conn._rate_since = now
+            conn._rate_frames = conn.frames
+
+    def frame_rate(self, conn: DeviceConnection, now: float) -> float:
+        """
+        当前帧率: 未结算窗口内的帧按 touch() 的方式平滑一次，其后每个空窗口按 RATE_ALPHA 衰减。
+        """
+        elapsed = now - conn._rate_since
+        if elapsed < self.RATE_WINDOW:
+            return conn.frame_rate
+        rate = (conn.frames - conn._rate_frames) / elapsed
+        rate = conn.frame_rate + self.RATE_ALPHA * (rate - conn.frame_rate)
+        return rate * (1.0 - self.RATE_ALPHA) ** (int(elapsed / self.RATE_WINDOW) - 1)
+
+    def close(self, conn: DeviceConnection) -> None:
+        """
+        连接关闭时注销。时间轮中的残留引用在到期时惰性清除。
+        """
+        self._by_id.pop(conn.conn_id, None)
+        if conn.sn and self._by_sn.get(conn.sn) is conn:
+            del self._by_sn[conn.sn]
+
+    def get(self, sn: str) -> Optional[DeviceConnection]:
+        return self._by_sn.get(sn)
+
+    def _advance(self) -> None:
+        self._cursor = (self._cursor + 1) % len(self._slots)
+        due = self._slots[self._cursor]
+        if not due:
+            return
+        self._slots[self._cursor] = set()
+        now = self._clock()
+        for conn in due:
+            if conn.conn_id not in self._by_id:
+                continue
+            idle = now - conn.last_seen
+            if idle >= self.idle_timeout:
+                logger.info("回收空闲TCP连接: sn=%s, peer=%s, idle=%.0fs", conn.sn, conn.peer, idle)
+                self.reaped += 1
+                self.close(conn)
+                with contextlib.suppress(Exception):
+                    conn._close()
+            else:
+                self._schedule(conn, self.idle_timeout - idle)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.tick)
+            try:
+                self._advance()
+            except Exception as e:
+                logger.error(f"连接回收异常: {e}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def stats(self, limit: int = 100) -> dict:
+        """
+        在线连接统计，devices 按帧率降序截取前 limit 个。
+        """
+        now = self._clock()
+        rates = {c: self.frame_rate(c, now) for c in self._by_sn.values()}
+        devices = sorted(rates, key=rates.__getitem__, reverse=True)[:limit]
+        return {
+            "connections": len(self._by_id),
+            "devices": len(self._by_sn),
+            "reaped": self.reaped,
+            "idle_timeout": self.idle_timeout,
+            "top_devices": [
+                {
+                    "sn": c.sn,
+                    "peer": str(c.peer),
+                    "connected_at": c.connected_at,
+                    "idle_seconds": round(now - c.last_seen, 1),
+                    "frames": c.frames,
+                    "frame_rate": round(rates[c], 2),
+                }
+                for c in devices
+            ],
+        }
+
+
+connection_registry = ConnectionRegistry(
+    idle_timeout=settings.tcp_idle_timeout,
+    tick=settings.tcp_reaper_tick,
+)
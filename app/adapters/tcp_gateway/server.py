@@ -1,15 +1,43 @@
 import asyncio
 from .handler import handle_client
+from .protocol import GatewayProtocol
+from .ingest import ingestion_queue
+from .ipc import start_ipc_receiver
+from .registry import connection_registry
+from app.core.settings import settings
 import logging
 
 TCP_PORT = 5858
 
 logger = logging.getLogger("tcp_gateway.server")
 
+async def create_gateway_server(reuse_port: bool = False) -> asyncio.AbstractServer:
+    """
+    按 tcp_gateway_mode 创建监听；多进程网关的 worker 以 reuse_port=True 共享同一端口。
+    """
+    if settings.tcp_gateway_mode == "protocol":
+        loop = asyncio.get_running_loop()
+        return await loop.create_server(
+            GatewayProtocol,
+            host="0.0.0.0",
+            port=TCP_PORT,
+            backlog=settings.tcp_backlog,
+            reuse_port=reuse_port,
+        )
+    return await asyncio.start_server(
+        handle_client,
+        host="0.0.0.0",
+        port=TCP_PORT,
+        backlog=settings.tcp_backlog,
+        reuse_port=reuse_port,
+    )
+
 async def start_tcp_server():
     logger.info("准备启动TCP服务")
-    server = await asyncio.start_server(handle_client, host="0.0.0.0", port=TCP_PORT)
-    logger.info(f"TCP监听端口: {TCP_PORT}")
+    ingestion_queue.start()
+    connection_registry.start()
+    server = await create_gateway_server()
+    logger.info(f"TCP监听端口: {TCP_PORT}, 模式: {settings.tcp_gateway_mode}")
     try:
         async with server:
             logger.info("TCP服务已启动，进入事件循环")
@@ -17,4 +45,23 @@ async def start_tcp_server():
     except Exception as e:
         logger.error(f"TCP服务启动异常: {e}")
     finally:
-        logger.info("TCP服务关闭，清理资源")
\ No newline at end of file
+        await connection_registry.stop()
+        await ingestion_queue.stop()
+        logger.info("TCP服务关闭，清理资源")
+
+async def start_ipc_server():
+    """
+    多进程网关模式: TCP 由独立的网关 worker 进程监听，本进程只接收其 IPC 转发的数据。
+    """
+    logger.info("准备启动网关IPC接收服务")
+    ingestion_queue.start()
+    server = await start_ipc_receiver(settings.tcp_ipc_path, ingestion_queue.put)
+    logger.info(f"网关IPC监听: {settings.tcp_ipc_path}")
+    try:
+        async with server:
+            await server.serve_forever()
+    except Exception as e:
+        logger.error(f"网关IPC服务异常: {e}")
+    finally:
+        await ingestion_queue.stop()
+        logger.info("网关IPC服务关闭，清理资源")
@@ -1,10 +1,12 @@
 from app.api.dependencies import setup_cors
 from fastapi import FastAPI
 from app.api.routes.patient import router as patient_router
+from app.api.routes.patient_metrics import router as patient_metrics_router
 from app.api.routes.device import router as device_router
 from app.api.routes.patient_device import router as patient_device_router
 from app.api.routes.alert import router as alert_router
 from app.api.routes.healthcheck import router as health_router
+from app.api.routes.gateway import router as gateway_router
 
 def register_routers(app: FastAPI):
     """
@@ -15,6 +17,11 @@ def register_routers(app: FastAPI):
         prefix="/patients",
         tags=["患者管理"]
     )
+    app.include_router(
+        patient_metrics_router,
+        prefix="/patients",
+        tags=["患者指标"]
+    )
     app.include_router(
         device_router,
         prefix="/devices",
@@ -30,6 +37,11 @@ def register_routers(app: FastAPI):
         prefix="/alerts",
         tags=["告警管理"]
     )
+    app.include_router(
+        gateway_router,
+        prefix="/gateway",
+        tags=["网关状态"]
+    )
     app.include_router(
         health_router,
         tags=["健康检查"]
@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Query
+from app.adapters.tcp_gateway.ingest import ingestion_queue
+from app.adapters.tcp_gateway.registry import connection_registry
+from app.adapters.influx_repository.batch_writer import influx_writer
+from app.adapters.pg_repository.event_log_writer import event_log_writer
+from app.adapters.spool.drainer import spool_drainer
+from app.adapters.spool.segment_spool import write_spool
+from app.core.event_bus import event_bus
+from app.core.metrics import histogram_snapshots
+
+router = APIRouter()
+
+@router.get("/connections")
+async def list_connections(
+    limit: int = Query(100, ge=1, le=1000, description="返回帧率最高的设备数量"),
+):
+    """
+    TCP 网关在线连接统计。
+    返回:
+        connections: 当前连接数（含尚未上报 sn 的连接）
+        devices: 已绑定 sn 的在线设备数
+        reaped: 累计回收的空闲连接数
+        top_devices: 按帧率降序的设备列表，含 sn、最近活跃、累计帧数、帧率(帧/秒)
+    说明:
+        多进程网关模式下连接由独立进程持有，此处仅反映本进程监听的连接。
+    """
+    return connection_registry.stats(limit=limit)
+
+@router.get("/ingest")
+async def ingest_stats():
+    """
+    TCP 摄取队列指标：队列深度、入队/发布/丢弃计数与背压暂停情况。
+    """
+    return ingestion_queue.stats()
+
+@router.get("/storage")
+async def storage_stats():
+    """
+    存储写入指标：Influx / PostgreSQL 批量写入器、spool 与重放进度，以及各存储写入延迟直方图。
+    """
+    return {
+        "influx": influx_writer.stats(),
+        "pgsql": event_log_writer.stats(),
+        "spool": write_spool.stats(),
+        "drainer": spool_drainer.stats(),
+        "latency": histogram_snapshots("store_write."),
+    }
+
+@router.get("/event-bus")
+async def event_bus_stats():
+    """
+    事件总线指标：直接订阅者数量，各队列模式订阅者的队列深度、处理/丢弃/异常计数与排队延迟，
+    同步 handler 执行器的排队与执行耗时，以及跨进程事件传输状态。
+    """
+    return event_bus.stats()
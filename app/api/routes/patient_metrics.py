@@ -0,0 +1,95 @@
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from fastapi.responses import StreamingResponse
+from app.adapters.influx_repository.influx_client import InfluxClient
+from app.adapters.influx_repository.query_repo import (
+    AGGREGATE_FUNCTIONS,
+    MEASUREMENT_FIELDS,
+    MetricsQueryRepo,
+)
+from app.core.logger import get_logger
+
+logger = get_logger("patient_metrics_api")
+
+router = APIRouter()
+
+_MEASUREMENT_PATTERN = "^(" + "|".join(MEASUREMENT_FIELDS) + ")$"
+_FN_PATTERN = "^(" + "|".join(AGGREGATE_FUNCTIONS) + ")$"
+
+def get_repo():
+    return MetricsQueryRepo(InfluxClient())
+
+def _time_range(start: Optional[datetime], stop: Optional[datetime]):
+    stop = stop or datetime.now(timezone.utc)
+    start = start or stop - timedelta(days=1)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    if stop.tzinfo is None:
+        stop = stop.replace(tzinfo=timezone.utc)
+    if start >= stop:
+        raise HTTPException(status_code=422, detail="start 必须早于 stop")
+    return start, stop
+
+@router.get("/{patient_id}/metrics/{measurement}")
+async def get_patient_metric(
+    patient_id: str,
+    measurement: str = Path(..., pattern=_MEASUREMENT_PATTERN, description="指标: heart_rate / temperature / sleep"),
+    start: Optional[datetime] = Query(None, description="起始时间，默认 stop 前 24 小时"),
+    stop: Optional[datetime] = Query(None, description="结束时间，默认当前时间"),
+    window: Optional[str] = Query(None, pattern=r"^[1-9][0-9]*(ms|s|m|h|d|w)$", description="降采样窗口，如 1m、1h"),
+    fn: str = Query("mean", pattern=_FN_PATTERN, description="窗口聚合函数: mean / min / max"),
+    repo: MetricsQueryRepo = Depends(get_repo),
+):
+    """
+    查询患者指标时间序列，返回列式结果。
+    Args:
+        patient_id (str): 患者ID
+        measurement (str): 指标名
+        start/stop (datetime): 时间范围
+        window (str): 降采样窗口，为空时返回原始数据
+        fn (str): 窗口聚合函数
+    Returns:
+        dict: {measurement, field, count, times: [毫秒时间戳], values: [数值]}
+    """
+    start, stop = _time_range(start, stop)
+    try:
+        batch = await repo.query(measurement, patient_id, start, stop, window=window, fn=fn)
+        return batch.to_dict()
+    except ValueError as ve:
+        raise HTTPException(status_code=422, detail=str(ve))
+    except Exception as e:
+        logger.error(f"查询患者指标异常: {e}")
+        raise HTTPException(status_code=500, detail="查询患者指标失败")
+
+@router.get("/{patient_id}/metrics/{measurement}/stream")
+async def stream_patient_metric(
+    patient_id: str,
+    measurement: str = Path(..., pattern=_MEASUREMENT_PATTERN, description="指标: heart_rate / temperature / sleep"),
+    start: Optional[datetime] = Query(None, description="起始时间，默认 stop 前 24 小时"),
+    stop: Optional[datetime] = Query(None, description="结束时间，默认当前时间"),
+    window: Optional[str] = Query(None, pattern=r"^[1-9][0-9]*(ms|s|m|h|d|w)$", description="降采样窗口，如 1m、1h"),
+    fn: str = Query("mean", pattern=_FN_PATTERN, description="窗口聚合函数: mean / min / max"),
+    repo: MetricsQueryRepo = Depends(get_repo),
+):
+    """
+    流式查询患者指标时间序列，适合长时间范围的原始数据导出。
+    Returns:
+        application/x-ndjson: 每行一个列式批次，格式同非流式接口
+    """
+    start, stop = _time_range(start, stop)
+    try:
+        repo.build_query(measurement, MEASUREMENT_FIELDS[measurement], window, fn)
+    except ValueError as ve:
+        raise HTTPException(status_code=422, detail=str(ve))
+
+    async def _lines():
+        try:
+            async for batch in repo.stream(measurement, patient_id, start, stop, window=window, fn=fn):
+                yield json.dumps(batch.to_dict(), separators=(",", ":")) + "\n"
+        except Exception as e:
+            logger.error(f"流式查询患者指标异常: {e}")
+            raise
+
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
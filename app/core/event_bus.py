@@ -1,38 +1,516 @@
 import asyncio
-from typing import Callable, Dict, List, Any, Type
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
+from app.core.executors import HandlerExecutor, executor_stats, get_executor, shutdown_executors
+from app.core.logger import get_logger, get_sampled_logger
+from app.core.settings import settings
+from app.core.micro_batcher import MicroBatcher
+
+logger = get_logger("event_bus", event_type="event_bus")
+sampled_logger = get_sampled_logger("event_bus", event_type="event_bus")
+
+KeyFunc = Callable[[Any], Any]
+ExecutorSpec = Union[str, HandlerExecutor, None]
+
+DEFAULT_EXECUTOR = "default"
+# 传输解码出的非领域对象（msgpack 原生类型），按 topic 分发
+_PLAIN_TYPES = (dict, list, tuple, str, int, float, bool, bytes, type(None))
+
+
+def patient_key(event: Any) -> Any:
+    """
+    默认分区键: 领域事件取 patient_id；网关原始 payload(dict) 取 pid，缺省时取设备 sn。
+    """
+    if type(event) is dict:
+        key = event.get("pid")
+        return event.get("sn") if key is None else key
+    return getattr(event, "patient_id", None)
+
+
+class QueuedSubscriber:
+    """
+    队列模式订阅者: 发布方只把事件放入该订阅者的队列即返回，由独立 worker 异步执行 handler
+    （handler 为协程函数；同步 handler 由 EventBus 包装为在执行器中运行的协程函数后传入）。
+
+    事件按 key(event) 哈希到 shards 个分片，每个分片一个有界队列与一个 worker，
+    同一 key（如同一患者）的事件按发布顺序串行处理，不同 key 之间并发。
+    分片队列已满时: overflow="block" 等待入队（向发布方施加背压），overflow="drop" 丢弃并计数。
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Any], Any],
+        key: Optional[KeyFunc] = None,
+        shards: int = 1,
+        maxsize: int = 10000,
+        overflow: str = "block",
+        name: Optional[str] = None,
+    ):
+        if overflow not in ("block", "drop"):
+            raise ValueError("overflow 仅支持 block / drop")
+        self.handler = handler
+        self.key = key or patient_key
+        self.shards = max(1, shards)
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.name = name or getattr(handler, "__qualname__", repr(handler))
+        self._queues: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+        # 指标
+        self.enqueued = 0
+        self.processed = 0
+        self.errors = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.avg_lag = 0.0
+
+    def _start(self) -> None:
+        self._queues = [asyncio.Queue(self.maxsize) for _ in range(self.shards)]
+        self._tasks = [asyncio.create_task(self._worker(queue)) for queue in self._queues]
+
+    def _queue_for(self, event: Any) -> asyncio.Queue:
+        if not self._tasks:
+            self._start()
+        if self.shards == 1:
+            return self._queues[0]
+        return self._queues[hash(self.key(event)) % self.shards]
+
+    def _on_enqueued(self, queue: asyncio.Queue) -> None:
+        self.enqueued += 1
+        depth = queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def put_nowait(self, event: Any) -> bool:
+        """
+        入队，分片队列已满时返回 False（不等待、不计丢弃）。
+        """
+        queue = self._queue_for(event)
+        try:
+            queue.put_nowait((time.monotonic(), event))
+        except asyncio.QueueFull:
+            return False
+        self._on_enqueued(queue)
+        return True
+
+    async def put(self, event: Any) -> None:
+        if self.put_nowait(event):
+            return
+        if self.overflow == "drop":
+            self.dropped += 1
+            sampled_logger.warning(self.name, "订阅者 %s 队列已满，丢弃事件，累计丢弃 %d 条", self.name, self.dropped)
+            return
+        queue = self._queue_for(event)
+        await queue.put((time.monotonic(), event))
+        self._on_enqueued(queue)
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        handler = self.handler
+        while True:
+            enqueued_at, event = await queue.get()
+            lag = time.monotonic() - enqueued_at
+            self.last_lag = lag
+            if lag > self.max_lag:
+                self.max_lag = lag
+            self.avg_lag += 0.05 * (lag - self.avg_lag)
+            try:
+                await handler(event)
+                self.processed += 1
+            except Exception as e:
+                self.errors += 1
+                sampled_logger.error(self.name, "订阅者 %s 处理异常: %s", self.name, e)
+            finally:
+                queue.task_done()
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """
+        在超时时间内处理完已入队事件后停止 worker。
+        """
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(asyncio.gather(*(queue.join() for queue in self._queues)), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("订阅者 %s 关闭超时，剩余 %d 条未处理", self.name, self.depth)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queues = []
+
+    @property
+    def depth(self) -> int:
+        return sum(queue.qsize() for queue in self._queues)
+
+    def stats(self) -> dict:
+        return {
+            "shards": self.shards,
+            "depth": self.depth,
+            "shard_depths": [queue.qsize() for queue in self._queues],
+            "max_depth": self.max_depth,
+            "maxsize": self.maxsize,
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "errors": self.errors,
+            "dropped": self.dropped,
+            "lag_ms": {
+                "last": round(self.last_lag * 1000, 3),
+                "avg": round(self.avg_lag * 1000, 3),
+                "max": round(self.max_lag * 1000, 3),
+            },
+        }
+
+
+class Subscription(NamedTuple):
+    """
+    直接模式订阅项，调用入口在订阅时确定:
+        handler:   订阅时传入的原始 handler（用于取消订阅）
+        call:      发布单个事件的异步入口
+        call_many: 发布一批事件的异步入口
+        batcher:   合并模式下的 MicroBatcher，否则为 None
+    """
+
+    handler: Callable[[Any], Any]
+    call: Callable[[Any], Awaitable[Any]]
+    call_many: Callable[[Sequence[Any]], Awaitable[Any]]
+    batcher: Optional[MicroBatcher]
+
+
+class EventTransport(ABC):
+    """
+    跨进程事件传输。EventBus 挂载传输后，指定的事件类型不再在本进程直接分发，
+    而是经传输发布到 topic（事件类名），再由传输按消费组与分区投递给某个进程的 EventBus 分发。
+    实现需保证同一分区键（患者）的事件按发布顺序投递给同一消费者。
+    """
+
+    @abstractmethod
+    async def start(self, topics: Sequence[str], deliver: Callable[[str, List[Any]], Awaitable[None]]) -> None:
+        """连接并订阅 topics，收到事件时调用 deliver(topic, events)"""
+
+    @abstractmethod
+    async def publish(self, topic: str, events: Sequence[Any]) -> bool:
+        """发布事件，传输不可用时返回 False（由 EventBus 退回本进程分发）"""
+
+    @abstractmethod
+    async def stop(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {}
+
+
+class Route(NamedTuple):
+    """
+    某个发布键解析后的全部订阅者（直接模式与队列模式），按订阅键的匹配顺序排列。
+    remote 非空时该事件经传输发布到此 topic，由传输投递回各进程后再分发给订阅者。
+    """
+
+    subscriptions: Tuple[Subscription, ...]
+    queued: Tuple[QueuedSubscriber, ...]
+    remote: Optional[str] = None
+
 
 class EventBus:
+    """
+    事件类型可为类或字符串别名（类的 __name__），两者等价:
+    发布 HeartRateHighAlert 与发布 "HeartRateHighAlert" 到达相同的订阅者。
+    以类（或已知类的别名）发布时，订阅其基类（或基类别名）的订阅者同样收到事件。
+
+    每个发布键首次发布时解析为一个 Route 并缓存，之后发布只查一次字典；
+    subscribe / unsubscribe 或出现新的事件类时清空缓存。
+    """
+
     def __init__(self):
-        # 支持事件类型为字符串或类
-        self._subscribers: Dict[Any, List[Callable[[Any], None]]] = {}
+        # 订阅登记: 订阅键（类或字符串）-> 订阅项
+        self._subscribers: Dict[Any, List[Subscription]] = {}
+        # 队列模式订阅: 事件类型 -> [(原始 handler, QueuedSubscriber)]
+        self._queued: Dict[Any, List[Tuple[Callable[[Any], Any], QueuedSubscriber]]] = {}
+        # 已知事件类: 别名 -> 类，用于把字符串发布键解析到类层次
+        self._types: Dict[str, type] = {}
+        # 发布键 -> 解析后的订阅者
+        self._routes: Dict[Any, Route] = {}
+        # 跨进程传输及经其发布的事件类名
+        self._transport: Optional[EventTransport] = None
+        self._remote: Set[str] = set()
+        self.fallbacks = 0
+
+    def subscribe(
+        self,
+        event_type: Any,
+        handler: Callable[[Any], None],
+        queued: bool = False,
+        key: Optional[KeyFunc] = None,
+        shards: Optional[int] = None,
+        maxsize: Optional[int] = None,
+        overflow: str = "block",
+        executor: ExecutorSpec = None,
+        batch: bool = False,
+        coalesce: bool = False,
+        max_delay: Optional[float] = None,
+        max_size: Optional[int] = None,
+    ):
+        """
+        订阅事件类型，可为字符串或类。
+        handler 是否为协程函数在订阅时确定: 同步 handler 在 executor 中执行，
+        executor 可为执行器名称或 HandlerExecutor 实例（如 CPU 密集分析使用 kind="process" 的进程池），
+        缺省时使用总线专用的 "default" 线程池，不占用事件循环默认线程池。
+        queued=True 时为队列模式: 发布方入队即返回，
+        事件按 key（默认 patient_key）分到 shards 个有序分片，由独立 worker 处理。
+        batch=True 时 handler 接收事件列表: publish() 传入单元素列表，publish_many() 整批传入。
+        coalesce=True 时（隐含 batch）事件先进入 MicroBatcher，攒满 max_delay 秒或 max_size 条后
+        整批调用 handler，发布方追加后即返回，适合高频采样类主题。
+        """
+        call = self._invoker(handler, executor)
+        if queued:
+            if batch or coalesce:
+                raise ValueError("队列模式订阅不支持 batch / coalesce")
+            subscriber = QueuedSubscriber(
+                call,
+                key=key,
+                shards=shards or settings.event_bus_shards,
+                maxsize=maxsize or settings.event_bus_queue_size,
+                overflow=overflow,
+                name=self._name(event_type, handler),
+            )
+            self._queued.setdefault(event_type, []).append((handler, subscriber))
+            self._register_type(event_type)
+            self._routes.clear()
+            return
+        batcher = None
+        if coalesce:
+            batcher = MicroBatcher(
+                self._name(event_type, handler),
+                call,
+                max_delay=settings.event_bus_coalesce_delay if max_delay is None else max_delay,
+                max_size=max_size or settings.event_bus_coalesce_size,
+            )
+            subscription = Subscription(handler, batcher.submit, batcher.extend, batcher)
+        elif batch:
+            async def call_one(event: Any, call=call) -> Any:
+                return await call([event])
+
+            subscription = Subscription(handler, call_one, call, None)
+        else:
+            async def call_many(events: Sequence[Any], call=call) -> Any:
+                return await asyncio.gather(*[call(event) for event in events])
+
+            subscription = Subscription(handler, call, call_many, None)
+        self._subscribers.setdefault(event_type, []).append(subscription)
+        self._register_type(event_type)
+        self._routes.clear()
+
+    def _register_type(self, event_type: Any) -> None:
+        """
+        登记事件类及其基类的别名；别名对应的类发生变化时清空路由缓存。
+        """
+        if not isinstance(event_type, type):
+            return
+        for cls in event_type.__mro__[:-1]:
+            known = self._types.get(cls.__name__)
+            if known is cls:
+                continue
+            if known is not None:
+                logger.warning("事件类别名冲突: %s 已对应 %s，忽略 %s", cls.__name__, known, cls)
+                continue
+            self._types[cls.__name__] = cls
+            self._routes.clear()
+
+    def _resolve(self, event_type: Any) -> Route:
+        """
+        解析发布键: 类（或已知类的别名）按 MRO 依次匹配各层的类与别名，未知字符串只匹配自身。
+        同一订阅项只出现一次。
+        """
+        cls = event_type if isinstance(event_type, type) else self._types.get(event_type)
+        if cls is None:
+            keys: List[Any] = [event_type]
+        else:
+            self._register_type(cls)
+            keys = []
+            for base in cls.__mro__[:-1]:
+                keys.append(base)
+                keys.append(base.__name__)
+        # 经传输发布到匹配的已配置 topic（子类事件发往其基类的 topic，各进程正是订阅了这些 topic）
+        remote = None
+        if self._remote:
+            remote = next((k for k in keys if isinstance(k, str) and k in self._remote), None)
+        subscriptions: List[Subscription] = []
+        queued: List[QueuedSubscriber] = []
+        seen = set()
+        for key in keys:
+            for sub in self._subscribers.get(key, ()):
+                if id(sub) not in seen:
+                    seen.add(id(sub))
+                    subscriptions.append(sub)
+            for _, subscriber in self._queued.get(key, ()):
+                if id(subscriber) not in seen:
+                    seen.add(id(subscriber))
+                    queued.append(subscriber)
+        return Route(tuple(subscriptions), tuple(queued), remote)
 
-    def subscribe(self, event_type: Any, handler: Callable[[Any], None]):
-        """订阅事件类型，可为字符串或类"""
-        if event_type not in self._subscribers:
-            self._subscribers[event_type] = []
-        self._subscribers[event_type].append(handler)
+    def _route(self, event_type: Any) -> Route:
+        route = self._routes.get(event_type)
+        if route is None:
+            route = self._resolve(event_type)
+            self._routes[event_type] = route
+        return route
+
+    @staticmethod
+    def _name(event_type: Any, handler: Callable[[Any], Any]) -> str:
+        return f"{getattr(event_type, '__name__', event_type)}:{getattr(handler, '__qualname__', handler)}"
+
+    @staticmethod
+    def _invoker(handler: Callable[[Any], Any], executor: ExecutorSpec) -> Callable[[Any], Any]:
+        if asyncio.iscoroutinefunction(handler):
+            return handler
+        if not isinstance(executor, HandlerExecutor):
+            executor = get_executor(
+                executor or DEFAULT_EXECUTOR,
+                max_workers=settings.event_bus_sync_workers,
+                max_queue=settings.event_bus_executor_queue_size,
+            )
+        return executor.bind(handler)
 
     def unsubscribe(self, event_type: Any, handler: Callable[[Any], None]):
-        """取消订阅"""
+        """
+        取消订阅（队列模式订阅者中已入队的事件、合并模式中已攒批的事件仍会被处理，
+        需 stop() 才会停止 worker、写出批次）
+        """
         if event_type in self._subscribers:
             self._subscribers[event_type] = [
-                h for h in self._subscribers[event_type] if h != handler
+                sub for sub in self._subscribers[event_type] if sub.handler != handler
             ]
             if not self._subscribers[event_type]:
                 del self._subscribers[event_type]
+        if event_type in self._queued:
+            self._queued[event_type] = [
+                (h, s) for h, s in self._queued[event_type] if h != handler
+            ]
+            if not self._queued[event_type]:
+                del self._queued[event_type]
+        self._routes.clear()
 
     async def publish(self, event_type: Any, event: Any):
-        """异步发布事件，支持并发执行所有 handler"""
-        handlers = self._subscribers.get(event_type, [])
-        tasks = []
-        for handler in handlers:
-            if asyncio.iscoroutinefunction(handler):
-                tasks.append(handler(event))
+        """异步发布事件: 队列模式订阅者只入队，其余 handler 并发执行"""
+        route = self._routes.get(event_type) or self._route(event_type)
+        if route.remote is not None and await self._publish_remote(route.remote, (event,)):
+            return
+        await self._dispatch(route, event)
+
+    async def _dispatch(self, route: Route, event: Any) -> None:
+        for subscriber in route.queued:
+            if not subscriber.put_nowait(event):
+                await subscriber.put(event)
+        if route.subscriptions:
+            await asyncio.gather(*[sub.call(event) for sub in route.subscriptions])
+
+    async def publish_many(self, event_type: Any, events: Sequence[Any]):
+        """
+        批量发布同一类型的事件: 每个订阅者只调用一次批量入口
+        （batch/coalesce 订阅者整批接收，普通订阅者逐条并发执行，队列模式订阅者逐条入队）。
+        """
+        if not events:
+            return
+        route = self._routes.get(event_type) or self._route(event_type)
+        if route.remote is not None and await self._publish_remote(route.remote, events):
+            return
+        await self._dispatch_many(route, events)
+
+    async def _dispatch_many(self, route: Route, events: Sequence[Any]) -> None:
+        for subscriber in route.queued:
+            for event in events:
+                if not subscriber.put_nowait(event):
+                    await subscriber.put(event)
+        if route.subscriptions:
+            await asyncio.gather(*[sub.call_many(events) for sub in route.subscriptions])
+
+    async def _publish_remote(self, topic: str, events: Sequence[Any]) -> bool:
+        try:
+            if await self._transport.publish(topic, events):
+                return True
+        except Exception as e:
+            sampled_logger.error(topic, "事件传输发布异常(%s): %s", topic, e)
+        self.fallbacks += len(events)
+        sampled_logger.warning(topic, "事件传输不可用，%s 退回本进程分发，累计 %d 条", topic, self.fallbacks)
+        return False
+
+    async def _deliver(self, topic: str, events: List[Any]) -> None:
+        """
+        传输投递的事件只在本进程分发，不再经传输发布。
+        事件已还原为具体类时按该类分发（子类事件也到达其自身的订阅者），否则按 topic 分发；
+        连续的同类事件合并为一次批量分发，保持投递顺序。
+        """
+        start = 0
+        while start < len(events):
+            event_type = topic if type(events[start]) in _PLAIN_TYPES else type(events[start])
+            end = start + 1
+            while end < len(events) and (
+                topic if type(events[end]) in _PLAIN_TYPES else type(events[end])
+            ) is event_type:
+                end += 1
+            route = self._routes.get(event_type) or self._route(event_type)
+            if end - start == 1:
+                await self._dispatch(route, events[start])
             else:
-                # 同步 handler 包装为线程任务
-                loop = asyncio.get_running_loop()
-                tasks.append(loop.run_in_executor(None, handler, event))
-        if tasks:
-            await asyncio.gather(*tasks)
+                await self._dispatch_many(route, events[start:end])
+            start = end
+
+    async def attach_transport(self, transport: EventTransport, event_types: Iterable[Any]) -> None:
+        """
+        挂载跨进程传输: event_types（类或别名，含其子类）此后经传输发布，
+        由传输按消费组、按患者分区投递，保证多进程部署时同一患者的事件由同一进程按序处理。
+        """
+        if self._transport is not None:
+            raise RuntimeError("事件总线已挂载传输")
+        names = set()
+        for event_type in event_types:
+            self._register_type(event_type)
+            names.add(getattr(event_type, "__name__", event_type))
+        await transport.start(sorted(names), self._deliver)
+        self._transport = transport
+        self._remote = names
+        self._routes.clear()
+        logger.info("事件总线已挂载传输 %s: %s", type(transport).__name__, ", ".join(sorted(names)))
+
+    def _batchers(self) -> List[MicroBatcher]:
+        return [sub.batcher for subs in self._subscribers.values() for sub in subs if sub.batcher is not None]
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """
+        写出合并模式订阅者的剩余批次，停止全部队列模式订阅者（先尽量处理完已入队事件），
+        再卸载跨进程传输、关闭同步 handler 执行器。
+        """
+        for batcher in self._batchers():
+            await batcher.stop()
+        subscribers = [s for subs in self._queued.values() for _, s in subs]
+        await asyncio.gather(*(s.stop(timeout) for s in subscribers))
+        if self._transport is not None:
+            transport, self._transport = self._transport, None
+            self._remote = set()
+            self._routes.clear()
+            await transport.stop()
+        await asyncio.to_thread(shutdown_executors)
+
+    def stats(self) -> dict:
+        return {
+            "direct": {
+                str(getattr(t, "__name__", t)): len(subs) for t, subs in self._subscribers.items()
+            },
+            "queued": {s.name: s.stats() for subs in self._queued.values() for _, s in subs},
+            "routes": {
+                str(getattr(t, "__name__", t)): len(route.subscriptions) + len(route.queued)
+                for t, route in self._routes.items()
+            },
+            "coalesced": {batcher.name: batcher.stats() for batcher in self._batchers()},
+            "transport": {
+                "type": type(self._transport).__name__ if self._transport is not None else None,
+                "remote": sorted(self._remote),
+                "fallbacks": self.fallbacks,
+                **(self._transport.stats() if self._transport is not None else {}),
+            },
+            "executors": executor_stats(),
+        }
 
-event_bus = EventBus()
\ No newline at end of file
+event_bus = EventBus()
@@ -0,0 +1,136 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from app.core.logger import get_logger
+from app.core.metrics import LatencyHistogram, get_histogram
+
+logger = get_logger("executors", event_type="event_bus")
+
+
+def _timed_call(fn: Callable[[Any], Any], arg: Any) -> Tuple[float, Any]:
+    """
+    在线程/子进程中执行 fn(arg)，同时返回开始执行的墙钟时间，用于计算排队等待。
+    需为模块级函数，进程池才能序列化。
+    """
+    return time.time(), fn(arg)
+
+
+class HandlerExecutor:
+    """
+    命名、限容的同步 handler 执行器，避免同步 handler 占满事件循环默认线程池
+    （asyncio.to_thread、run_in_executor(None) 共用该池）。
+
+        kind="thread":  线程池，适合阻塞 IO 型 handler
+        kind="process": 进程池，适合 CPU 密集的分析型 handler；handler 必须是可 pickle 的
+                        模块级函数，事件对象需可 pickle
+    同时提交的任务数上限为 max_workers + max_queue，超出时 run() 等待（向发布方施加背压）。
+    指标: 提交/完成/异常计数、排队中与执行中任务数，以及排队等待与执行耗时直方图
+    （event_bus.executor.{name}.wait / .run）。
+    """
+
+    def __init__(self, name: str, max_workers: int = 4, kind: str = "thread", max_queue: int = 1000):
+        if kind not in ("thread", "process"):
+            raise ValueError("kind 仅支持 thread / process")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._wait_histogram: LatencyHistogram = get_histogram(f"event_bus.executor.{name}.wait")
+        self._run_histogram: LatencyHistogram = get_histogram(f"event_bus.executor.{name}.run")
+        self.submitted = 0
+        self.completed = 0
+        self.errors = 0
+        self.throttled = 0
+        self.inflight = 0
+
+    def _ensure(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix=f"event-{self.name}"
+                )
+            self._slots = asyncio.Semaphore(self.max_workers + self.max_queue)
+        return self._executor
+
+    async def run(self, fn: Callable[[Any], Any], arg: Any) -> Any:
+        executor = self._ensure()
+        slots = self._slots
+        if slots.locked():
+            self.throttled += 1
+        async with slots:
+            self.submitted += 1
+            self.inflight += 1
+            submitted_at = time.time()
+            try:
+                started_at, result = await asyncio.get_running_loop().run_in_executor(
+                    executor, _timed_call, fn, arg
+                )
+            except Exception:
+                self.errors += 1
+                raise
+            finally:
+                self.inflight -= 1
+            self.completed += 1
+            self._wait_histogram.observe(max(started_at - submitted_at, 0.0))
+            self._run_histogram.observe(max(time.time() - started_at, 0.0))
+            return result
+
+    def bind(self, fn: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        """
+        把同步函数包装为在本执行器中运行的协程函数。
+        """
+        async def call(arg: Any) -> Any:
+            return await self.run(fn, arg)
+
+        return call
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._executor = None
+            self._slots = None
+
+    def stats(self) -> dict:
+        # 执行中的任务数不超过 max_workers，超出部分在池内排队
+        running = min(self.inflight, self.max_workers)
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": running,
+            "queued": self.inflight - running,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "errors": self.errors,
+            "throttled": self.throttled,
+            "wait": self._wait_histogram.snapshot(),
+            "run": self._run_histogram.snapshot(),
+        }
+
+
+_executors: Dict[str, HandlerExecutor] = {}
+
+
+def get_executor(name: str, max_workers: int = 4, kind: str = "thread", max_queue: int = 1000) -> HandlerExecutor:
+    """
+    按名称获取（不存在时创建）共享的 handler 执行器；已存在时忽略其余参数。
+    """
+    executor = _executors.get(name)
+    if executor is None:
+        executor = _executors[name] = HandlerExecutor(name, max_workers, kind, max_queue)
+        logger.info("创建 handler 执行器 %s: %s x%d，排队上限 %d", name, kind, executor.max_workers, executor.max_queue)
+    return executor
+
+
+def executor_stats() -> Dict[str, dict]:
+    return {name: executor.stats() for name, executor in _executors.items()}
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    for executor in _executors.values():
+        executor.shutdown(wait=wait)
@@ -4,6 +4,7 @@ import contextlib
 
 from app.core.event_bus import event_bus
 import asyncio
+import inspect
 import logging
 from asyncpg import connect as pg_connect
 from influxdb_client import InfluxDBClient
@@ -63,6 +64,19 @@ async def verify_all_dependencies():
 from app.core.settings import settings
 from app.core.logger import logger
 
+async def _shutdown_step(name, step):
+    """
+    执行一个关闭步骤（同步或异步），异常与取消只记录日志，保证后续步骤继续执行。
+    """
+    try:
+        result = step()
+        if inspect.isawaitable(result):
+            await result
+    except asyncio.CancelledError:
+        logger.warning(f"关闭步骤 {name} 被取消")
+    except Exception as e:
+        logger.error(f"关闭步骤 {name} 异常: {e}")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("FastAPI 启动，初始化事件总线")
@@ -72,6 +86,14 @@ async def lifespan(app: FastAPI):
         
         _ = settings  # 强制触发 settings 加载
         _ = event_bus  # 强制触发 event_bus 加载
+        from app.adapters.pg_repository.pgsql_client import PgSQLClient
+
+        await PgSQLClient.init_pool()
+        from app.adapters.spool.segment_spool import write_spool
+
+        if settings.spool_enabled:
+            write_spool.open()
+            write_spool.start()
         logger.info("注册 API 路由")
         from app.api.router_registry import register_routers
 
@@ -80,19 +102,63 @@ async def lifespan(app: FastAPI):
         from app.services.bootstrap_services import init_all_services
 
         await init_all_services()
+        if settings.event_bus_transport == "broker":
+            from app.adapters.event_transport.broker_transport import BrokerTransport
+
+            # 多 worker 部署: 告警事件经 broker 按患者分区，同一患者的聚合状态只在一个进程中
+            await event_bus.attach_transport(
+                BrokerTransport(settings.event_bus_broker_path, settings.event_bus_consumer_group),
+                [name.strip() for name in settings.event_bus_remote_events.split(",") if name.strip()],
+            )
+        from app.adapters.influx_repository.batch_writer import SPOOL_KIND as INFLUX_SPOOL_KIND, influx_writer
+        from app.adapters.influx_repository.influx_client import InfluxClient
+
+        influx_writer.start()
+        from app.adapters.pg_repository.event_log_writer import SPOOL_KIND as PG_SPOOL_KIND, event_log_writer
+
+        event_log_writer.start()
+        from app.adapters.pg_repository.partition_manager import event_log_partitions
+
+        event_log_partitions.start()
+        from app.adapters.spool.drainer import spool_drainer
+
+        if settings.spool_enabled:
+            spool_drainer.register(INFLUX_SPOOL_KIND, influx_writer.replay)
+            spool_drainer.register(PG_SPOOL_KIND, event_log_writer.replay)
+            spool_drainer.start()
         # 启动 TCP Gateway 服务（事件驱动架构）
         import asyncio
         from app.adapters.tcp_gateway import server as tcp_server
 
-        tcp_task = asyncio.create_task(tcp_server.start_tcp_server())
-        logger.info(f"msgpack监听服务启动: {getattr(tcp_server, 'TCP_PORT', '5858')}")
+        if settings.tcp_cluster_workers > 0:
+            # 多进程网关模式：TCP 由独立网关进程监听，这里只接收 IPC 转发
+            tcp_task = asyncio.create_task(tcp_server.start_ipc_server())
+            logger.info(f"网关IPC接收服务启动: {settings.tcp_ipc_path}")
+        else:
+            tcp_task = asyncio.create_task(tcp_server.start_tcp_server())
+            logger.info(f"msgpack监听服务启动: {getattr(tcp_server, 'TCP_PORT', '5858')}")
         logger.info("初始化完成，准备启动服务")
         try:
             yield
         finally:
             tcp_task.cancel()
-            with contextlib.suppress(Exception):
+            # 被取消的任务 await 时抛出 CancelledError（BaseException），需单独捕获
+            with contextlib.suppress(asyncio.CancelledError, Exception):
                 await tcp_task
+            from app.services.health_metrics.payload_router import payload_router
+
+            # 各关闭步骤相互独立，任一步骤异常不影响后续缓冲数据的写出与连接释放
+            await _shutdown_step("spool_drainer", spool_drainer.stop)
+            await _shutdown_step("payload_router", payload_router.stop)
+            await _shutdown_step("event_bus", event_bus.stop)
+            await _shutdown_step("event_log_partitions", event_log_partitions.stop)
+            await _shutdown_step("influx_writer", influx_writer.stop)
+            await _shutdown_step("event_log_writer", event_log_writer.stop)
+            await _shutdown_step("write_spool", write_spool.stop)
+            await _shutdown_step("write_spool.close", write_spool.close)
+            await _shutdown_step("InfluxClient", InfluxClient.close)
+            await _shutdown_step("InfluxClient.async", InfluxClient.close_async)
+            await _shutdown_step("PgSQLClient", PgSQLClient.close_pool)
     except Exception as e:
         logger.error(f"初始化阶段异常: {e}")
         raise
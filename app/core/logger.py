@@ -1,5 +1,6 @@
 import logging
-from typing import Optional
+import time
+from typing import Callable, Dict, Optional
 
 try:
     from .settings import settings
@@ -31,4 +32,102 @@ def get_logger(name: str, event_type: Optional[str] = None) -> logging.Logger:
         logger = logging.LoggerAdapter(logger, {"event_type": event_type})
     return logger
 
-logger = get_logger("neoDTH")
\ No newline at end of file
+
+class TokenBucket:
+    """
+    令牌桶：每秒补充 rate 个令牌，最多积攒 burst 个。
+    """
+
+    __slots__ = ("rate", "burst", "tokens", "last", "suppressed", "clock")
+
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = float(burst)
+        self.last = clock()
+        self.suppressed = 0
+
+    def consume(self) -> bool:
+        now = self.clock()
+        tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        if tokens >= 1.0:
+            self.tokens = tokens - 1.0
+            return True
+        self.tokens = tokens
+        self.suppressed += 1
+        return False
+
+
+class SampledLogger:
+    """
+    热路径日志：按 key 独立限流，参数使用 % 惰性格式化。
+    先用 isEnabledFor 过滤等级，再消耗对应 key 的令牌，被限流的条数会在下一条放行日志中附带。
+    参数构造本身有开销时（如 hex 转储），先 allow() 判断，通过后再构造参数并 emit()。
+    """
+
+    def __init__(
+        self, logger, rate: float, burst: int, max_keys: int = 10000, clock: Callable[[], float] = time.monotonic
+    ):
+        self._logger = logger
+        self._rate = rate
+        self._burst = burst
+        self._max_keys = max_keys
+        self._clock = clock
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def allow(self, level: int, key: str) -> bool:
+        if not self._logger.isEnabledFor(level):
+            return False
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self._max_keys:
+                # key 基数失控（如按 sn 限流）时整体重置，限制内存占用
+                self._buckets.clear()
+            bucket = self._buckets[key] = TokenBucket(self._rate, self._burst, self._clock)
+        return bucket.consume()
+
+    def emit(self, level: int, key: str, msg: str, *args) -> None:
+        """
+        输出一条已通过 allow() 的日志。
+        """
+        bucket = self._buckets.get(key)
+        if bucket is not None and bucket.suppressed:
+            msg = f"{msg} (已抑制 {bucket.suppressed} 条)"
+            bucket.suppressed = 0
+        self._logger.log(level, msg, *args)
+
+    def log(self, level: int, key: str, msg: str, *args) -> None:
+        if self.allow(level, key):
+            self.emit(level, key, msg, *args)
+
+    def debug(self, key: str, msg: str, *args) -> None:
+        self.log(logging.DEBUG, key, msg, *args)
+
+    def info(self, key: str, msg: str, *args) -> None:
+        self.log(logging.INFO, key, msg, *args)
+
+    def warning(self, key: str, msg: str, *args) -> None:
+        self.log(logging.WARNING, key, msg, *args)
+
+    def error(self, key: str, msg: str, *args) -> None:
+        self.log(logging.ERROR, key, msg, *args)
+
+
+def get_sampled_logger(
+    name: str,
+    event_type: Optional[str] = None,
+    rate: Optional[float] = None,
+    burst: Optional[int] = None,
+) -> SampledLogger:
+    """
+    获取按 key 限流的日志器，默认速率与突发量由 settings 控制。
+    """
+    if rate is None:
+        rate = getattr(settings, "log_sample_rate", 1.0) if settings else 1.0
+    if burst is None:
+        burst = getattr(settings, "log_sample_burst", 10) if settings else 10
+    return SampledLogger(get_logger(name, event_type), rate, burst)
+
+logger = get_logger("neoDTH")
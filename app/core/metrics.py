@@ -0,0 +1,76 @@
+import bisect
+from typing import Dict, List, Optional, Sequence
+
+# 默认延迟分桶上界（秒）: 50µs 起按 2 倍递增至约 13s，超出最后一个上界的计入溢出桶
+DEFAULT_LATENCY_BOUNDS: List[float] = [0.00005 * 2 ** i for i in range(19)]
+
+
+class LatencyHistogram:
+    """
+    固定分桶的延迟直方图，observe() 只做一次二分查找与计数，适合热路径。
+    分位数按所在桶的上界估算。
+    """
+
+    __slots__ = ("name", "bounds", "counts", "count", "total", "max")
+
+    def __init__(self, name: str, bounds: Optional[Sequence[float]] = None):
+        self.name = name
+        self.bounds = list(bounds or DEFAULT_LATENCY_BOUNDS)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+        return self.max
+
+    def reset(self) -> None:
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def snapshot(self) -> dict:
+        buckets = {f"{bound * 1000:g}": n for bound, n in zip(self.bounds, self.counts) if n}
+        if self.counts[-1]:
+            buckets["+Inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.50) * 1000, 3),
+            "p99_ms": round(self.percentile(0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "buckets_le_ms": buckets,
+        }
+
+
+_histograms: Dict[str, LatencyHistogram] = {}
+
+
+def get_histogram(name: str) -> LatencyHistogram:
+    """
+    按名称获取（不存在时创建）进程内共享的延迟直方图。
+    """
+    histogram = _histograms.get(name)
+    if histogram is None:
+        histogram = _histograms[name] = LatencyHistogram(name)
+    return histogram
+
+
+def histogram_snapshots(prefix: str = "") -> Dict[str, dict]:
+    return {name: h.snapshot() for name, h in _histograms.items() if name.startswith(prefix)}
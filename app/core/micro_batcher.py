@@ -0,0 +1,139 @@
+import asyncio
+import contextlib
+from typing import Awaitable, Callable, Generic, List, Optional, Sequence, Set, TypeVar
+from app.core.logger import get_logger, get_sampled_logger
+
+logger = get_logger("MicroBatcher", event_type="batch")
+sampled_logger = get_sampled_logger("MicroBatcher", event_type="batch")
+
+T = TypeVar("T")
+BatchHandler = Callable[[List[T]], Awaitable[None]]
+
+
+class MicroBatcher(Generic[T]):
+    """
+    微批聚合: submit() 把数据追加到当前批次后返回，
+    批次第一条数据到达 max_delay 秒后或累计 max_size 条时，按每批最多 max_size 条交给 handler
+    （如 Processor.handle_batch）处理。
+
+    有界:
+        同时处理中的批次数不超过 max_inflight（handler 需可并发调用），已到期的批次等待前一批完成；
+        未处理的数据不超过 max_pending 条，超出时 submit() / extend() 等待（向发布方施加背压）。
+    stop() 会写出全部数据并等待处理完成。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: BatchHandler,
+        max_delay: float = 0.1,
+        max_size: int = 1000,
+        max_inflight: int = 4,
+        max_pending: Optional[int] = None,
+    ):
+        self.name = name
+        self.handler = handler
+        self.max_delay = max_delay
+        self.max_size = max(1, max_size)
+        self.max_inflight = max(1, max_inflight)
+        self.max_pending = max(max_pending or self.max_size * self.max_inflight, self.max_size)
+        self._items: List[T] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight: Set[asyncio.Task] = set()
+        self._space = asyncio.Event()
+        self._space.set()
+        # 指标
+        self.batches = 0
+        self.items = 0
+        self.failures = 0
+        self.throttled = 0
+
+    async def submit(self, item: T) -> None:
+        if len(self._items) >= self.max_pending:
+            await self._wait_space()
+        self._items.append(item)
+        self._schedule()
+
+    async def extend(self, items: Sequence[T]) -> None:
+        """
+        追加一批数据，超过 max_pending 的部分等待已有数据开始处理后再追加。
+        """
+        pos = 0
+        while pos < len(items):
+            room = self.max_pending - len(self._items)
+            if room <= 0:
+                await self._wait_space()
+                continue
+            self._items.extend(items[pos:pos + room])
+            pos += room
+            self._schedule()
+
+    async def _wait_space(self) -> None:
+        self.throttled += 1
+        while len(self._items) >= self.max_pending:
+            self._space.clear()
+            await self._space.wait()
+
+    def _schedule(self) -> None:
+        if len(self._items) >= self.max_size:
+            self._start(full_only=True)
+        if self._items and self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay, self._flush)
+
+    def _flush(self) -> None:
+        """
+        当前数据全部到期: 在 max_inflight 限额内开始处理，其余在处理中的批次完成后继续写出。
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._start(full_only=False)
+
+    def _start(self, full_only: bool) -> None:
+        items = self._items
+        loop = asyncio.get_running_loop()
+        while items and len(self._inflight) < self.max_inflight:
+            if full_only and len(items) < self.max_size:
+                break
+            batch = items[:self.max_size]
+            del items[:self.max_size]
+            task = loop.create_task(self._handle(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._done)
+        if len(items) < self.max_pending:
+            self._space.set()
+
+    def _done(self, task: asyncio.Task) -> None:
+        self._inflight.discard(task)
+        # 定时器已触发（无定时器）时剩余数据均已到期；否则只写出满批
+        if self._items:
+            self._start(full_only=self._timer is not None)
+
+    async def _handle(self, batch: List[T]) -> None:
+        try:
+            await self.handler(batch)
+            self.batches += 1
+            self.items += len(batch)
+        except Exception as e:
+            self.failures += 1
+            sampled_logger.error(self.name, "微批处理异常(%s)，%d 条: %s", self.name, len(batch), e)
+
+    async def stop(self) -> None:
+        """
+        写出全部数据并等待处理中的批次完成。
+        """
+        self._flush()
+        while self._inflight:
+            with contextlib.suppress(Exception):
+                await asyncio.gather(*self._inflight, return_exceptions=True)
+            self._flush()
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._items),
+            "inflight": len(self._inflight),
+            "batches": self.batches,
+            "items": self.items,
+            "failures": self.failures,
+            "throttled": self.throttled,
+        }
@@ -12,4 +12,15 @@ class HeartRateHighAlert(DomainBaseModel):
     device_id: str
     value: int
     timestamp: datetime
-    threshold: int
\ No newline at end of file
+    threshold: int
+
+class HeartRateAnomalyAlert(DomainBaseModel):
+    patient_id: str
+    device_id: str
+    value: int
+    timestamp: datetime
+    kind: str  # zscore / trend
+    score: float
+    mean: float
+    std: float
+    p95: float
@@ -0,0 +1,156 @@
+import math
+from array import array
+from collections import OrderedDict
+from typing import Optional
+
+
+class Anomaly:
+    """
+    单个采样的异常判定结果。
+        kind:  "zscore"（单点偏离）或 "trend"（短期均值持续偏离长期均值）
+        score: 偏离的标准差倍数，带符号
+    """
+
+    __slots__ = ("kind", "score", "mean", "std", "p95")
+
+    def __init__(self, kind: str, score: float, mean: float, std: float, p95: float):
+        self.kind = kind
+        self.score = score
+        self.mean = mean
+        self.std = std
+        self.p95 = p95
+
+    def __repr__(self) -> str:
+        return (
+            f"Anomaly(kind={self.kind!r}, score={self.score:.2f}, mean={self.mean:.2f}, "
+            f"std={self.std:.2f}, p95={self.p95:.2f})"
+        )
+
+
+class RollingStats:
+    """
+    单个患者单项指标的增量统计，每个采样 O(1) 更新:
+        mean / var: 指数加权（EWMA）均值与方差，平滑系数 alpha
+        fast:       更大平滑系数的短期 EWMA 均值，与 mean 的差反映趋势
+        ring:       最近 window 个采样的 float32 环形缓冲，用于按需计算滚动分位数
+    内存固定: 对象本身使用 __slots__，环形缓冲为定长 array。
+    """
+
+    __slots__ = ("count", "mean", "var", "fast", "ring", "pos", "cooldown")
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.mean = 0.0
+        self.var = 0.0
+        self.fast = 0.0
+        self.ring = array("f", bytes(4 * window))
+        self.pos = 0
+        self.cooldown = 0
+
+    def update(self, value: float, alpha: float, fast_alpha: float) -> None:
+        if self.count == 0:
+            self.mean = self.fast = value
+        else:
+            diff = value - self.mean
+            incr = alpha * diff
+            self.mean += incr
+            self.var = (1.0 - alpha) * (self.var + diff * incr)
+            self.fast += fast_alpha * (value - self.fast)
+        ring = self.ring
+        ring[self.pos] = value
+        self.pos = (self.pos + 1) % len(ring)
+        self.count += 1
+
+    def percentile(self, q: float) -> float:
+        """
+        最近 window 个采样的分位数（排序一次，O(window log window)，仅在需要时调用）。
+        """
+        n = min(self.count, len(self.ring))
+        if n == 0:
+            return 0.0
+        values = sorted(self.ring[:n]) if n < len(self.ring) else sorted(self.ring)
+        return values[min(n - 1, int(q * n))]
+
+
+class RollingStatsEngine:
+    """
+    按患者维护 RollingStats，并基于更新前的统计量判定异常:
+        zscore: |value - mean| / std >= z_threshold
+        trend:  |fast - mean| / std >= trend_threshold（短期均值持续偏离）
+    前 warmup 个采样只积累统计不判定；判定出异常后该患者 cooldown 个采样内不再重复告警。
+
+    患者数超过 max_patients 时淘汰最久未更新的患者，内存上界约为
+    max_patients * (对象 + 4 * window 字节)。
+    """
+
+    def __init__(
+        self,
+        window: int = 64,
+        alpha: float = 0.05,
+        fast_alpha: float = 0.3,
+        z_threshold: float = 4.0,
+        trend_threshold: float = 3.0,
+        warmup: int = 30,
+        cooldown: int = 60,
+        max_patients: int = 100000,
+        min_std: float = 1e-3,
+    ):
+        self.window = window
+        self.alpha = alpha
+        self.fast_alpha = fast_alpha
+        self.z_threshold = z_threshold
+        self.trend_threshold = trend_threshold
+        self.warmup = warmup
+        self.cooldown = cooldown
+        self.max_patients = max_patients
+        self.min_std = min_std
+        self._stats: "OrderedDict[str, RollingStats]" = OrderedDict()
+        self.evicted = 0
+        self.anomalies = 0
+
+    def __len__(self) -> int:
+        return len(self._stats)
+
+    def get(self, patient_id: str) -> Optional[RollingStats]:
+        return self._stats.get(patient_id)
+
+    def update(self, patient_id: str, value: float) -> Optional[Anomaly]:
+        """
+        用新采样更新患者统计，返回异常判定结果（无异常时为 None）。
+        """
+        stats = self._stats.get(patient_id)
+        if stats is None:
+            if len(self._stats) >= self.max_patients:
+                self._stats.popitem(last=False)
+                self.evicted += 1
+            stats = self._stats[patient_id] = RollingStats(self.window)
+        else:
+            self._stats.move_to_end(patient_id)
+
+        anomaly = None
+        if stats.count >= self.warmup:
+            if stats.cooldown:
+                stats.cooldown -= 1
+            else:
+                std = max(math.sqrt(stats.var), self.min_std)
+                z = (value - stats.mean) / std
+                if abs(z) >= self.z_threshold:
+                    anomaly = Anomaly("zscore", z, stats.mean, std, stats.percentile(0.95))
+                else:
+                    # 趋势按加入本采样后的短期均值判断
+                    fast = stats.fast + self.fast_alpha * (value - stats.fast)
+                    trend = (fast - stats.mean) / std
+                    if abs(trend) >= self.trend_threshold:
+                        anomaly = Anomaly("trend", trend, stats.mean, std, stats.percentile(0.95))
+                if anomaly is not None:
+                    stats.cooldown = self.cooldown
+                    self.anomalies += 1
+        stats.update(value, self.alpha, self.fast_alpha)
+        return anomaly
+
+    def stats(self) -> dict:
+        return {
+            "patients": len(self._stats),
+            "evicted": self.evicted,
+            "anomalies": self.anomalies,
+        }
@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import Optional
+
+
+class MetricSample:
+    """
+    网关上报的单个指标采样，字段与 *DataReceived 事件一致，可直接交给 Processor 处理。
+    高频路径使用 __slots__ 轻量对象，不做 pydantic 校验；类型转换在路由表中一次完成。
+    """
+
+    __slots__ = ("patient_id", "device_id", "value", "timestamp")
+
+    def __init__(self, patient_id: str, device_id: str, value, timestamp: datetime):
+        self.patient_id = patient_id
+        self.device_id = device_id
+        self.value = value
+        self.timestamp = timestamp
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(patient_id={self.patient_id!r}, device_id={self.device_id!r}, "
+            f"value={self.value!r}, timestamp={self.timestamp.isoformat()})"
+        )
+
+
+class SleepSample(MetricSample):
+    """
+    睡眠采样，value 即睡眠时长（分钟），字段与 SleepDataReceived 对齐。
+    """
+
+    __slots__ = ("sleep_quality",)
+
+    def __init__(
+        self,
+        patient_id: str,
+        device_id: str,
+        duration_minutes: int,
+        timestamp: datetime,
+        sleep_quality: Optional[str] = None,
+    ):
+        super().__init__(patient_id, device_id, duration_minutes, timestamp)
+        self.sleep_quality = sleep_quality
+
+    @property
+    def duration_minutes(self) -> int:
+        return self.value
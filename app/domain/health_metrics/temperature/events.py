@@ -12,4 +12,15 @@ class TemperatureHighAlert(DomainBaseModel):
     device_id: str
     value: float
     timestamp: datetime
-    threshold: float
\ No newline at end of file
+    threshold: float
+
+class TemperatureAnomalyAlert(DomainBaseModel):
+    patient_id: str
+    device_id: str
+    value: float
+    timestamp: datetime
+    kind: str  # zscore / trend
+    score: float
+    mean: float
+    std: float
+    p95: float
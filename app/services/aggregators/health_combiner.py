@@ -20,9 +20,10 @@ class HealthCombiner:
 
     async def start(self):
         logger.info("HealthCombiner 初始化，订阅健康警报事件")
-        event_bus.subscribe(HeartRateHighAlert.__name__, self.on_heart_rate_alert)
-        event_bus.subscribe(TemperatureHighAlert.__name__, self.on_temperature_alert)
-        event_bus.subscribe(SleepQualityAlert.__name__, self.on_sleep_alert)
+        # 队列模式: 处理器发布警报后立即返回，同一患者的警报按发布顺序处理
+        event_bus.subscribe(HeartRateHighAlert.__name__, self.on_heart_rate_alert, queued=True)
+        event_bus.subscribe(TemperatureHighAlert.__name__, self.on_temperature_alert, queued=True)
+        event_bus.subscribe(SleepQualityAlert.__name__, self.on_sleep_alert, queued=True)
         logger.info("HealthCombiner 事件订阅完成")
 
     async def on_heart_rate_alert(self, event: HeartRateHighAlert):
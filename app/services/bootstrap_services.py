@@ -2,11 +2,16 @@ from app.services.aggregators.health_combiner import HealthCombiner
 from app.services.health_metrics.heart_rate_processor import HeartRateProcessor
 from app.services.health_metrics.temperature_processor import TemperatureProcessor
 from app.services.health_metrics.sleep_processor import SleepProcessor
+from app.services.health_metrics.payload_router import payload_router
 from app.adapters.influx_repository.metrics_repo import MetricsRepo
 from app.adapters.pg_repository.heart_rate_repo import HeartRateRepo
 from app.adapters.pg_repository.temperature_repo import TemperatureRepo
+from app.adapters.pg_repository.sleep_repo import SleepRepo
 from app.adapters.influx_repository.influx_client import InfluxClient
 from app.adapters.pg_repository.pgsql_client import PgSQLClient
+from app.core.event_bus import event_bus
+from app.domain.health_metrics.heart_rate.events import HeartRateDataReceived
+from app.core.settings import settings
 
 # 统一初始化所有服务监听与事件订阅
 async def init_all_services():
@@ -24,6 +29,25 @@ async def init_all_services():
     pg_client = PgSQLClient()
     heart_rate_repo = HeartRateRepo(pg_client)
     temperature_repo = TemperatureRepo(pg_client)
-
-
-    # 其他服务初始化需求可在此扩展
+    sleep_repo = SleepRepo(pg_client)
+    for repo in (heart_rate_repo, temperature_repo, sleep_repo):
+        await repo.ensure_channel()
+
+    # TCP 网关 payload 按字段路由到各指标处理器
+    heart_rate_processor = HeartRateProcessor(influx_repo, heart_rate_repo)
+    payload_router.register_processors(
+        heart_rate=heart_rate_processor,
+        temperature=TemperatureProcessor(influx_repo, temperature_repo),
+        sleep=SleepProcessor(influx_repo, sleep_repo),
+        batch_delay=settings.metrics_batch_delay,
+        batch_size=settings.metrics_batch_size,
+        batch_inflight=settings.metrics_batch_max_inflight,
+        batch_pending=settings.metrics_batch_max_pending,
+    )
+    # 摄取队列经 publish_many 批量发布，整批分发
+    event_bus.subscribe("tcp_data_received", payload_router.dispatch_many, batch=True)
+    # MQTT 网关逐条发布的心率事件合并为批次后处理
+    event_bus.subscribe(HeartRateDataReceived.__name__, heart_rate_processor.handle_batch, coalesce=True)
+
+
+    # 其他服务初始化需求可在此扩展
\ No newline at end of file
@@ -0,0 +1,203 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.logger import get_sampled_logger
+from app.domain.health_metrics.samples import MetricSample, SleepSample
+from app.core.micro_batcher import MicroBatcher
+
+sampled_logger = get_sampled_logger("PayloadRouter", event_type="tcp")
+
+# (payload, 字段值, patient_id, device_id, timestamp) -> 采样对象
+SampleBuilder = Callable[[dict, object, str, str, datetime], MetricSample]
+SampleHandler = Callable[[MetricSample], Awaitable[None]]
+SampleBatchHandler = Callable[[List[MetricSample]], Awaitable[None]]
+
+
+def _heart_rate(payload: dict, value, patient_id: str, device_id: str, ts: datetime) -> MetricSample:
+    return MetricSample(patient_id, device_id, int(value), ts)
+
+
+def _temperature(payload: dict, value, patient_id: str, device_id: str, ts: datetime) -> MetricSample:
+    return MetricSample(patient_id, device_id, float(value), ts)
+
+
+def _sleep(payload: dict, value, patient_id: str, device_id: str, ts: datetime) -> MetricSample:
+    # sleep 可为时长（分钟），也可为 {"minutes": .., "quality": ..}
+    if type(value) is dict:
+        minutes, quality = value["minutes"], value.get("quality")
+    else:
+        minutes, quality = value, payload.get("sleep_quality")
+    # quality 会被 SleepProcessor 比较、编码为 Influx 字符串字段，只接受字符串
+    if quality is not None and type(quality) is not str:
+        raise TypeError(f"sleep quality 应为字符串: {quality!r}")
+    return SleepSample(patient_id, device_id, int(minutes), ts, quality)
+
+
+class PayloadRouter:
+    """
+    将 TCP 网关的原始 payload（"tcp_data_received" 事件）分发给各指标 Processor。
+
+    payload 约定:
+        sn:  设备序列号，作为 device_id
+        pid: 患者ID，缺省时以 sn 代替
+        ts:  采样时间（Unix 秒），缺省取接收时间
+        hr / temp / sleep: 指标字段，值的类型转换由路由表中的构造函数完成
+
+    路由表在 register() 时编译为 字段名 -> (构造函数, 处理函数)，
+    分发时只遍历 payload 自身的字段并查一次表，不为每个采样构造 pydantic 模型。
+    """
+
+    def __init__(self):
+        self._routes: Dict[str, Tuple[SampleBuilder, SampleHandler]] = {}
+        self._batchers: Dict[str, MicroBatcher] = {}
+        # 单条处理函数 -> 批量处理函数（微批聚合器的 submit -> extend）
+        self._many: Dict[SampleHandler, SampleBatchHandler] = {}
+        self.dispatched = 0
+        self.invalid = 0
+
+    def register(self, key: str, builder: SampleBuilder, handler: SampleHandler) -> None:
+        if key in self._routes:
+            raise ValueError(f"payload 字段 {key} 已注册")
+        self._routes[key] = (builder, handler)
+
+    def register_processors(
+        self,
+        heart_rate=None,
+        temperature=None,
+        sleep=None,
+        batch_delay: Optional[float] = None,
+        batch_size: int = 1000,
+        batch_inflight: int = 4,
+        batch_pending: Optional[int] = None,
+    ) -> None:
+        """
+        按约定字段注册三类指标 Processor。
+        batch_delay 大于 0 时经 MicroBatcher 聚合，攒满 batch_delay 秒或 batch_size 条后调用 handle_batch()；
+        同时处理中的批次不超过 batch_inflight，未处理数据超过 batch_pending 条时分发方等待；
+        否则逐条调用 handle_data_received()。
+        """
+        for key, builder, processor in (
+            ("hr", _heart_rate, heart_rate),
+            ("temp", _temperature, temperature),
+            ("sleep", _sleep, sleep),
+        ):
+            if processor is None:
+                continue
+            if batch_delay:
+                batcher = MicroBatcher(
+                    key,
+                    processor.handle_batch,
+                    max_delay=batch_delay,
+                    max_size=batch_size,
+                    max_inflight=batch_inflight,
+                    max_pending=batch_pending,
+                )
+                self._batchers[key] = batcher
+                self._many[batcher.submit] = batcher.extend
+                self.register(key, builder, batcher.submit)
+            else:
+                self.register(key, builder, processor.handle_data_received)
+
+    def route(self, payload: dict) -> List[Tuple[SampleHandler, MetricSample]]:
+        """
+        将 payload 转换为 (处理函数, 采样) 列表，非法字段计数后跳过。
+        """
+        routes = self._routes
+        device_id = str(payload["sn"])
+        patient_id = payload.get("pid")
+        patient_id = device_id if patient_id is None else str(patient_id)
+        ts = payload.get("ts")
+        try:
+            timestamp = (
+                datetime.now(timezone.utc) if ts is None else datetime.fromtimestamp(ts, timezone.utc)
+            )
+        except (TypeError, ValueError, OverflowError, OSError) as e:
+            self.invalid += 1
+            sampled_logger.warning("ts", "payload时间戳非法: ts=%r, sn=%s, %s", ts, device_id, e)
+            return []
+        routed = []
+        for key, value in payload.items():
+            route = routes.get(key)
+            if route is None:
+                continue
+            builder, handler = route
+            try:
+                routed.append((handler, builder(payload, value, patient_id, device_id, timestamp)))
+            except (TypeError, ValueError, KeyError) as e:
+                self.invalid += 1
+                sampled_logger.warning(key, "payload字段非法: %s=%r, sn=%s, %s", key, value, device_id, e)
+        return routed
+
+    async def dispatch(self, payload: dict) -> None:
+        """
+        "tcp_data_received" 事件处理函数：一次解码、一次分发，多指标并发处理。
+        """
+        routed = self.route(payload)
+        if not routed:
+            return
+        self.dispatched += len(routed)
+        if len(routed) == 1:
+            handler, sample = routed[0]
+            await handler(sample)
+            return
+        results = await asyncio.gather(
+            *(handler(sample) for handler, sample in routed), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+
+    async def dispatch_many(self, payloads: List[dict]) -> None:
+        """
+        "tcp_data_received" 批量处理函数（订阅时 batch=True，配合 event_bus.publish_many）:
+        整批 payload 先按处理函数分组，微批聚合器一次追加整组采样，其余处理函数逐条并发调用。
+        """
+        if len(payloads) == 1:
+            await self.dispatch(payloads[0])
+            return
+        groups: Dict[SampleHandler, List[MetricSample]] = {}
+        for payload in payloads:
+            try:
+                routed = self.route(payload)
+            except (TypeError, KeyError) as e:
+                self.invalid += 1
+                sampled_logger.warning("payload", "payload非法: %r, %s", payload, e)
+                continue
+            for handler, sample in routed:
+                group = groups.get(handler)
+                if group is None:
+                    groups[handler] = [sample]
+                else:
+                    group.append(sample)
+        if not groups:
+            return
+        calls = []
+        for handler, samples in groups.items():
+            self.dispatched += len(samples)
+            many = self._many.get(handler)
+            if many is not None:
+                calls.append(many(samples))
+            else:
+                calls.extend(handler(sample) for sample in samples)
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+
+    async def stop(self) -> None:
+        """
+        写出各微批聚合器中尚未处理的数据。
+        """
+        for batcher in self._batchers.values():
+            await batcher.stop()
+
+    def stats(self) -> dict:
+        return {
+            "dispatched": self.dispatched,
+            "invalid": self.invalid,
+            "batchers": {key: batcher.stats() for key, batcher in self._batchers.items()},
+        }
+
+
+payload_router = PayloadRouter()
@@ -1,19 +1,24 @@
 from app.domain.health_metrics.sleep.events import SleepDataReceived, SleepQualityAlert
 from app.adapters.influx_repository.metrics_repo import MetricsRepo
-from app.adapters.pg_repository.temperature_repo import TemperatureRepo  # 假设复用体温 repo 结构
+from app.adapters.pg_repository.sleep_repo import SleepRepo
+from app.domain.health_metrics.samples import MetricSample
 from app.core.event_bus import event_bus
-from app.core.logger import get_logger
+from typing import List, Sequence, Union
+from app.core.logger import get_logger, get_sampled_logger
+import logging
 
 logger = get_logger("SleepProcessor", event_type="sleep")
+sampled_logger = get_sampled_logger("SleepProcessor", event_type="sleep")
 
 class SleepProcessor:
-    def __init__(self, influx_repo: MetricsRepo, pg_repo: TemperatureRepo, quality_threshold: str = "poor"):
+    def __init__(self, influx_repo: MetricsRepo, pg_repo: SleepRepo, quality_threshold: str = "poor"):
         self.influx_repo = influx_repo
         self.pg_repo = pg_repo
         self.quality_threshold = quality_threshold
 
-    async def handle_data_received(self, event: SleepDataReceived):
-        logger.info(f"处理睡眠数据: {event}")
+    async def handle_data_received(self, event: Union[SleepDataReceived, MetricSample]):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("处理睡眠数据: %s", event)
         await self.influx_repo.write_sleep(event)
         await self.pg_repo.write_event_log(event)
         if event.sleep_quality and event.sleep_quality.lower() == self.quality_threshold:
@@ -25,5 +30,33 @@ class SleepProcessor:
                 timestamp=event.timestamp,
                 threshold=self.quality_threshold
             )
-            logger.warning(f"睡眠质量警报: {alert}")
-            await event_bus.publish(SleepQualityAlert.__name__, alert)
\ No newline at end of file
+            sampled_logger.warning(event.patient_id, "睡眠质量警报: %s", alert)
+            await event_bus.publish(SleepQualityAlert.__name__, alert)
+
+    async def handle_batch(self, events: Sequence[Union[SleepDataReceived, MetricSample]]):
+        """
+        批量处理: 两个存储的写入缓冲各追加一次，睡眠质量为字符串，逐条比较后警报批量发布。
+        """
+        if not events:
+            return
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("批量处理睡眠数据: %d 条", len(events))
+        await self.influx_repo.write_sleep_batch(events)
+        await self.pg_repo.write_event_log_batch(events)
+        threshold = self.quality_threshold
+        alerts: List[SleepQualityAlert] = [
+            SleepQualityAlert(
+                patient_id=event.patient_id,
+                device_id=event.device_id,
+                duration_minutes=event.duration_minutes,
+                sleep_quality=event.sleep_quality,
+                timestamp=event.timestamp,
+                threshold=threshold
+            )
+            for event in events
+            if event.sleep_quality and event.sleep_quality.lower() == threshold
+        ]
+        if not alerts:
+            return
+        sampled_logger.warning("batch", "睡眠质量警报 %d 条，首条: %s", len(alerts), alerts[0])
+        await event_bus.publish_many(SleepQualityAlert.__name__, alerts)
@@ -1,19 +1,37 @@
-from app.domain.health_metrics.temperature.events import TemperatureDataReceived, TemperatureHighAlert
+from app.domain.health_metrics.temperature.events import (
+    TemperatureAnomalyAlert,
+    TemperatureDataReceived,
+    TemperatureHighAlert,
+)
 from app.adapters.influx_repository.metrics_repo import MetricsRepo
 from app.adapters.pg_repository.temperature_repo import TemperatureRepo
+from app.domain.health_metrics.rolling_stats import Anomaly, RollingStatsEngine
+from app.domain.health_metrics.samples import MetricSample
 from app.core.event_bus import event_bus
-from app.core.logger import get_logger
+from app.services.health_metrics.thresholds import anomaly_engine, indices_at_or_above
+from typing import List, Optional, Sequence, Tuple, Union
+from app.core.logger import get_logger, get_sampled_logger
+import logging
 
 logger = get_logger("TemperatureProcessor", event_type="temperature")
+sampled_logger = get_sampled_logger("TemperatureProcessor", event_type="temperature")
 
 class TemperatureProcessor:
-    def __init__(self, influx_repo: MetricsRepo, pg_repo: TemperatureRepo, high_threshold: float = 38.0):
+    def __init__(
+        self,
+        influx_repo: MetricsRepo,
+        pg_repo: TemperatureRepo,
+        high_threshold: float = 38.0,
+        anomaly: Optional[RollingStatsEngine] = None,
+    ):
         self.influx_repo = influx_repo
         self.pg_repo = pg_repo
         self.high_threshold = high_threshold
+        self.anomaly = anomaly if anomaly is not None else anomaly_engine()
 
-    async def handle_data_received(self, event: TemperatureDataReceived):
-        logger.info(f"处理体温数据: {event}")
+    async def handle_data_received(self, event: Union[TemperatureDataReceived, MetricSample]):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("处理体温数据: %s", event)
         await self.influx_repo.write_temperature(event)
         await self.pg_repo.write_event_log(event)
         if event.value >= self.high_threshold:
@@ -24,5 +42,61 @@ class TemperatureProcessor:
                 timestamp=event.timestamp,
                 threshold=self.high_threshold
             )
-            logger.warning(f"体温高警报: {alert}")
-            await event_bus.publish(TemperatureHighAlert.__name__, alert)
\ No newline at end of file
+            sampled_logger.warning(event.patient_id, "体温高警报: %s", alert)
+            await event_bus.publish(TemperatureHighAlert.__name__, alert)
+        if self.anomaly is not None:
+            anomaly = self.anomaly.update(event.patient_id, event.value)
+            if anomaly is not None:
+                await self._publish_anomalies([(event, anomaly)])
+
+    async def handle_batch(self, events: Sequence[Union[TemperatureDataReceived, MetricSample]]):
+        """
+        批量处理: 两个存储的写入缓冲各追加一次，阈值按数值列统一比较，警报批量发布。
+        """
+        if not events:
+            return
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("批量处理体温数据: %d 条", len(events))
+        await self.influx_repo.write_temperature_batch(events)
+        await self.pg_repo.write_event_log_batch(events)
+        if self.anomaly is not None:
+            update = self.anomaly.update
+            anomalies = [
+                (event, anomaly) for event in events
+                if (anomaly := update(event.patient_id, event.value)) is not None
+            ]
+            if anomalies:
+                await self._publish_anomalies(anomalies)
+        hits = indices_at_or_above([event.value for event in events], self.high_threshold)
+        if not hits:
+            return
+        alerts: List[TemperatureHighAlert] = []
+        for i in hits:
+            event = events[i]
+            alerts.append(TemperatureHighAlert(
+                patient_id=event.patient_id,
+                device_id=event.device_id,
+                value=event.value,
+                timestamp=event.timestamp,
+                threshold=self.high_threshold
+            ))
+        sampled_logger.warning("batch", "体温高警报 %d 条，首条: %s", len(alerts), alerts[0])
+        await event_bus.publish_many(TemperatureHighAlert.__name__, alerts)
+
+    async def _publish_anomalies(self, anomalies: Sequence[Tuple[Union[TemperatureDataReceived, MetricSample], Anomaly]]):
+        alerts = [
+            TemperatureAnomalyAlert(
+                patient_id=event.patient_id,
+                device_id=event.device_id,
+                value=event.value,
+                timestamp=event.timestamp,
+                kind=anomaly.kind,
+                score=anomaly.score,
+                mean=anomaly.mean,
+                std=anomaly.std,
+                p95=anomaly.p95
+            )
+            for event, anomaly in anomalies
+        ]
+        sampled_logger.warning("anomaly", "体温异常 %d 条，首条: %s", len(alerts), alerts[0])
+        await event_bus.publish_many(TemperatureAnomalyAlert.__name__, alerts)
@@ -0,0 +1,38 @@
+from typing import List, Optional, Sequence
+from app.core.settings import settings
+from app.domain.health_metrics.rolling_stats import RollingStatsEngine
+
+try:
+    import numpy as np
+except ImportError:  # numpy 为可选依赖，缺失时逐个比较
+    np = None
+
+# 批次小于该条数时逐个比较，避免构造数组的固定开销
+NUMPY_MIN_BATCH = 32
+
+
+def indices_at_or_above(values: Sequence[float], threshold: float) -> List[int]:
+    """
+    返回 values 中大于等于 threshold 的下标；批量足够大且安装了 numpy 时按列向量化比较。
+    """
+    if np is not None and len(values) >= NUMPY_MIN_BATCH:
+        return np.flatnonzero(np.asarray(values, dtype=np.float64) >= threshold).tolist()
+    return [i for i, value in enumerate(values) if value >= threshold]
+
+
+def anomaly_engine() -> Optional[RollingStatsEngine]:
+    """
+    按配置创建患者滚动统计异常检测引擎，未启用时返回 None。
+    """
+    if not settings.anomaly_enabled:
+        return None
+    return RollingStatsEngine(
+        window=settings.anomaly_window,
+        alpha=settings.anomaly_alpha,
+        fast_alpha=settings.anomaly_fast_alpha,
+        z_threshold=settings.anomaly_z_threshold,
+        trend_threshold=settings.anomaly_trend_threshold,
+        warmup=settings.anomaly_warmup,
+        cooldown=settings.anomaly_cooldown,
+        max_patients=settings.anomaly_max_patients,
+    )
@@ -0,0 +1,39 @@
+"""
+CRC-8 基准: 对比各实现的吞吐（正确性校验见 tests/test_crc.py）。
+
+运行: python -m benchmarks.bench_crc8 --frames 100000
+"""
+import argparse
+import random
+import time
+
+from app.adapters.tcp_gateway.crc import crc8, crc8_py
+
+
+def _timeit(name: str, func, n: int):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<16} {n / elapsed:>14,.0f} frames/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CRC-8 基准")
+    parser.add_argument("--frames", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    frames = [rng.randbytes(rng.randint(1, 255)) for _ in range(args.frames)]
+
+    print("random 1~255 bytes")
+    _timeit("crc8 (crcmod)", lambda: [crc8(f) for f in frames], len(frames))
+    _timeit("crc8_py", lambda: [crc8_py(f) for f in frames], len(frames))
+    for size in (16, 48, 128, 255):
+        fixed = [rng.randbytes(size) for _ in range(args.frames)]
+        print(f"{size} bytes")
+        _timeit("crc8 (crcmod)", lambda: [crc8(f) for f in fixed], len(fixed))
+        _timeit("crc8_py", lambda: [crc8_py(f) for f in fixed], len(fixed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+TCP 网关端到端摄取基准: 多个并发客户端经回环连接回放合成帧流，
+经 handle_client(stream 模式) 或 GatewayProtocol(protocol 模式) 解析、摄取队列、事件总线，
+最终由 PayloadRouter 分发到各指标 Processor（存储库替换为内存实现）。
+
+帧流可配置噪声、损坏率与分片大小；报告 frames/s、发布延迟 p50/p99 与进程 RSS。
+延迟定义: 帧的最后一个字节写入 socket 到 "tcp_data_received" 事件发布之间的时间。
+
+运行: python -m benchmarks.bench_gateway_ingest --clients 100 --frames 2000 --noise 0.01 --corrupt 0.01
+"""
+import argparse
+import asyncio
+import logging
+import resource
+import time
+from typing import Dict, List
+
+from app.adapters.tcp_gateway.handler import handle_client
+from app.adapters.tcp_gateway.ingest import ingestion_queue
+from app.adapters.tcp_gateway.protocol import GatewayProtocol
+from app.adapters.tcp_gateway.registry import connection_registry
+from app.core.event_bus import event_bus
+from app.services.health_metrics.heart_rate_processor import HeartRateProcessor
+from app.services.health_metrics.payload_router import PayloadRouter
+from app.services.health_metrics.sleep_processor import SleepProcessor
+from app.services.health_metrics.temperature_processor import TemperatureProcessor
+from benchmarks.frame_gen import fragment, noisy_stream, synthetic_payloads
+
+
+class InMemoryMetricsRepo:
+    """
+    MetricsRepo 的内存替身，只计数不落库。
+    """
+
+    def __init__(self):
+        self.points = 0
+
+    async def write_heart_rate(self, event) -> None:
+        self.points += 1
+
+    async def write_temperature(self, event) -> None:
+        self.points += 1
+
+    async def write_sleep(self, event) -> None:
+        self.points += 1
+
+    async def write_heart_rate_batch(self, events) -> None:
+        self.points += len(events)
+
+    async def write_temperature_batch(self, events) -> None:
+        self.points += len(events)
+
+    async def write_sleep_batch(self, events) -> None:
+        self.points += len(events)
+
+
+class InMemoryEventLogRepo:
+    """
+    HeartRateRepo / TemperatureRepo / SleepRepo 的内存替身。
+    """
+
+    def __init__(self):
+        self.rows = 0
+
+    async def write_event_log(self, event) -> None:
+        self.rows += 1
+
+    async def write_event_log_batch(self, events) -> None:
+        self.rows += len(events)
+
+
+def _rss_mb() -> float:
+    """
+    当前 RSS（MB），非 Linux 平台退化为峰值 RSS。
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class LatencyProbe:
+    """
+    订阅 "tcp_data_received"，按 payload 中的 seq 计算发布延迟。
+    """
+
+    def __init__(self, expected: int):
+        self.sent_at: Dict[int, float] = {}
+        self.latencies: List[float] = []
+        self.expected = expected
+        self.last_at = 0.0
+
+    async def on_payload(self, payload: dict) -> None:
+        now = time.perf_counter()
+        sent = self.sent_at.get(payload["seq"])
+        if sent is not None:
+            self.latencies.append(now - sent)
+        self.last_at = now
+
+    async def wait(self, timeout: float) -> None:
+        """
+        等待全部合法帧发布；protocol 模式下被摄取队列丢弃的帧不再等待。
+        """
+        deadline = time.perf_counter() + timeout
+        while len(self.latencies) + ingestion_queue.dropped < self.expected:
+            if time.perf_counter() > deadline:
+                print(f"超时: 仅收到 {len(self.latencies)}/{self.expected} 帧")
+                return
+            await asyncio.sleep(0.01)
+
+
+async def _client(port: int, chunks: List[bytes], valid_ends: List[int], seqs: List[int], probe: LatencyProbe):
+    _, writer = await asyncio.open_connection("127.0.0.1", port)
+    written = 0
+    k = 0
+    for chunk in chunks:
+        writer.write(chunk)
+        written += len(chunk)
+        now = time.perf_counter()
+        # 记录本次写入完整覆盖的帧
+        while k < len(valid_ends) and valid_ends[k] <= written:
+            probe.sent_at[seqs[k]] = now
+            k += 1
+        await writer.drain()
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run(args) -> None:
+    n_total = args.clients * args.frames
+    payloads = synthetic_payloads(n_total, n_devices=args.clients, seed=args.seed)
+    plans = []
+    expected = 0
+    for c in range(args.clients):
+        batch = payloads[c * args.frames:(c + 1) * args.frames]
+        for i, p in enumerate(batch):
+            p["sn"] = f"DTH{c:06d}"
+            p["seq"] = c * args.frames + i
+        data, valid = noisy_stream(batch, args.noise, args.corrupt, seed=args.seed + c)
+        chunks = fragment(data, args.fragment_min, args.fragment_max, seed=args.seed + c)
+        plans.append((chunks, [end for _, end in valid], [batch[i]["seq"] for i, _ in valid]))
+        expected += len(valid)
+    stream_bytes = sum(len(chunk) for chunks, _, _ in plans for chunk in chunks)
+    print(
+        f"clients={args.clients} frames={n_total} valid={expected} bytes={stream_bytes} "
+        f"noise={args.noise} corrupt={args.corrupt} fragment={args.fragment_min}-{args.fragment_max} mode={args.mode}"
+    )
+
+    metrics_repo = InMemoryMetricsRepo()
+    log_repo = InMemoryEventLogRepo()
+    router = PayloadRouter()
+    router.register_processors(
+        heart_rate=HeartRateProcessor(metrics_repo, log_repo),
+        temperature=TemperatureProcessor(metrics_repo, log_repo),
+        sleep=SleepProcessor(metrics_repo, log_repo),
+        batch_delay=args.batch_delay,
+    )
+    probe = LatencyProbe(expected)
+    event_bus.subscribe("tcp_data_received", router.dispatch_many, batch=True)
+    event_bus.subscribe("tcp_data_received", probe.on_payload)
+
+    loop = asyncio.get_running_loop()
+    if args.mode == "protocol":
+        server = await loop.create_server(GatewayProtocol, "127.0.0.1", 0, backlog=4096)
+    else:
+        server = await asyncio.start_server(handle_client, "127.0.0.1", 0, backlog=4096)
+    port = server.sockets[0].getsockname()[1]
+    ingestion_queue.start()
+    connection_registry.start()
+    rss_before = _rss_mb()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(port, *plan, probe) for plan in plans))
+    await probe.wait(args.timeout)
+    elapsed = (probe.last_at or time.perf_counter()) - start
+    rss_after = _rss_mb()
+
+    server.close()
+    await server.wait_closed()
+    await connection_registry.stop()
+    await ingestion_queue.stop()
+    await router.stop()
+
+    latencies = sorted(probe.latencies)
+    received = len(latencies)
+    print(f"published={received}/{expected} elapsed={elapsed:.3f}s  {received / elapsed:,.0f} frames/s")
+    print(
+        f"publish latency p50={_percentile(latencies, 0.50) * 1e3:.2f}ms "
+        f"p99={_percentile(latencies, 0.99) * 1e3:.2f}ms max={latencies[-1] * 1e3 if latencies else float('nan'):.2f}ms"
+    )
+    print(
+        f"rss before={rss_before:.1f}MB after={rss_after:.1f}MB "
+        f"peak={resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f}MB"
+    )
+    print(f"processors: points={metrics_repo.points} event_logs={log_repo.rows} invalid={router.invalid}")
+    print(f"ingest: {ingestion_queue.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TCP 网关端到端摄取基准")
+    parser.add_argument("--clients", type=int, default=100, help="并发客户端（设备）数")
+    parser.add_argument("--frames", type=int, default=2000, help="每个客户端发送的帧数")
+    parser.add_argument("--noise", type=float, default=0.0, help="帧间插入垃圾数据的概率")
+    parser.add_argument("--corrupt", type=float, default=0.0, help="帧 CRC 损坏的概率")
+    parser.add_argument("--fragment-min", type=int, default=1, help="单次写入的最小字节数")
+    parser.add_argument("--fragment-max", type=int, default=1500, help="单次写入的最大字节数")
+    parser.add_argument("--mode", choices=("stream", "protocol"), default="stream")
+    parser.add_argument("--batch-delay", type=float, default=0.0, help="Processor 微批等待秒数，0 为逐条处理")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=60.0, help="等待全部帧发布的超时秒数")
+    args = parser.parse_args()
+
+    logging.getLogger("neoDTH").setLevel(logging.WARNING)
+    for name in ("tcp_gateway.decoder", "tcp_gateway.payload"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    for name in ("HeartRateProcessor", "TemperatureProcessor", "SleepProcessor"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Influx 数据点序列化微基准: 旧实现(dict 数据点 + ISO 时间字符串，由 influxdb_client 解析序列化)
+对比 LineProtocolEncoder(整数纳秒时间戳、缓存转义后的 tag 前缀、直接写入 bytearray)。
+
+运行: python -m benchmarks.bench_line_protocol --points 200000 --devices 1000
+"""
+import argparse
+import logging
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from influxdb_client.client.write.point import Point
+
+from app.adapters.influx_repository.line_protocol import LineProtocolEncoder
+
+
+def _samples(n_points: int, n_devices: int, seed: int = 0):
+    rng = random.Random(seed)
+    base = datetime.now(timezone.utc)
+    return [
+        (f"P{d:06d}", f"DTH{d:06d}", rng.randint(50, 140), base + timedelta(seconds=i))
+        for i, d in ((i, rng.randrange(n_devices)) for i in range(n_points))
+    ]
+
+
+def dict_path(samples) -> bytes:
+    """
+    复刻改造前 MetricsRepo.write_heart_rate 的数据点，按 write_api 对 dict 的处理方式序列化。
+    """
+    lines = []
+    for patient_id, device_id, value, ts in samples:
+        point = {
+            "measurement": "heart_rate",
+            "tags": {"patient_id": patient_id, "device_id": device_id},
+            "fields": {"value": value},
+            "time": ts.isoformat(),
+        }
+        lines.append(Point.from_dict(point).to_line_protocol())
+    return "\n".join(lines).encode()
+
+
+def encoder_path(samples) -> bytes:
+    encoder = LineProtocolEncoder()
+    for patient_id, device_id, value, ts in samples:
+        encoder.heart_rate(patient_id, device_id, value, ts)
+    return encoder.take()[0]
+
+
+def _run(name: str, func, samples) -> float:
+    start = time.perf_counter()
+    data = func(samples)
+    elapsed = time.perf_counter() - start
+    rate = len(samples) / elapsed
+    print(f"{name:<8} points={len(samples):<8} bytes={len(data):<10} elapsed={elapsed:.3f}s  {rate:,.0f} points/s")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Influx 行协议序列化微基准")
+    parser.add_argument("--points", type=int, default=200_000)
+    parser.add_argument("--devices", type=int, default=1000)
+    args = parser.parse_args()
+
+    logging.getLogger("neoDTH").setLevel(logging.WARNING)
+    samples = _samples(args.points, args.devices)
+    # 两种实现输出的行协议须一致
+    assert dict_path(samples[:100]).split(b"\n") == encoder_path(samples[:100]).rstrip(b"\n").split(b"\n")
+
+    before = _run("dict", dict_path, samples)
+    after = _run("encoder", encoder_path, samples)
+    print(f"speedup: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
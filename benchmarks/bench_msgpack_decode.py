@@ -0,0 +1,98 @@
+"""
+帧解析 + msgpack 解码微基准: 旧实现(bytes 拼接 + 每帧 async unpackb) 对比
+FrameDecoder + decode_frames(同步、单次遍历批量解码 memoryview 切片)。
+
+运行: python -m benchmarks.bench_msgpack_decode --frames 200000 --chunk 4096
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+import msgpack
+
+from app.adapters.tcp_gateway.frame_decoder import FrameDecoder, MAGIC
+from app.adapters.tcp_gateway.handler import crc8
+from app.adapters.tcp_gateway.payload_decoder import decode_frames
+from benchmarks.frame_gen import synthetic_capture
+
+
+async def _legacy_unpack(data: bytes):
+    try:
+        return msgpack.unpackb(data, raw=False)
+    except Exception:
+        return None
+
+
+async def legacy_parse(chunks) -> int:
+    """
+    复刻改造前 handle_client 的解析循环。
+    """
+    count = 0
+    buf = b""
+    for chunk in chunks:
+        buf += chunk
+        while len(buf) >= 4:
+            if buf[:2] != MAGIC:
+                idx = buf.find(MAGIC)
+                if idx == -1:
+                    buf = b""
+                    break
+                buf = buf[idx:]
+                if len(buf) < 4:
+                    break
+            length = buf[2]
+            crc_val = buf[3]
+            if not (1 <= length <= 256):
+                buf = buf[4:]
+                continue
+            if len(buf) < 4 + length:
+                break
+            data = buf[4:4 + length]
+            if crc8(data) != crc_val:
+                buf = buf[4 + length:]
+                continue
+            payload = await _legacy_unpack(data)
+            if payload and payload.get("sn"):
+                count += 1
+            buf = buf[4 + length:]
+    return count
+
+
+def batched_parse(chunks) -> int:
+    count = 0
+    decoder = FrameDecoder(crc8)
+    for chunk in chunks:
+        decoder.feed(chunk)
+        count += len(decode_frames(decoder.frames()))
+    return count
+
+
+def _run(name: str, func, n_frames: int) -> float:
+    start = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed
+    print(f"{name:<10} frames={count:<8} elapsed={elapsed:.3f}s  {rate:,.0f} frames/s")
+    assert count == n_frames, f"{name} 解出帧数不符: {count} != {n_frames}"
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TCP 网关帧解码微基准")
+    parser.add_argument("--frames", type=int, default=200_000)
+    parser.add_argument("--chunk", type=int, default=4096, help="模拟单次 socket 读取的字节数")
+    args = parser.parse_args()
+
+    logging.getLogger("neoDTH").setLevel(logging.WARNING)
+    capture = synthetic_capture(args.frames)
+    chunks = [capture[i:i + args.chunk] for i in range(0, len(capture), args.chunk)]
+    print(f"capture: {len(capture)} bytes, {len(chunks)} chunks of {args.chunk} bytes")
+
+    before = _run("legacy", lambda: asyncio.run(legacy_parse(chunks)), args.frames)
+    after = _run("batched", lambda: batched_parse(chunks), args.frames)
+    print(f"speedup: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+指标 Processor 处理吞吐微基准: 逐条 handle_data_received 对比按微批 handle_batch，
+存储写入使用真实的 LineProtocolEncoder / EventLogWriter 缓冲（不连接数据库），警报经事件总线发布。
+
+运行: python -m benchmarks.bench_processor_batch --samples 200000 --batch 1000 --alert-rate 0.05
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.adapters.influx_repository.batch_writer import InfluxBatchWriter
+from app.adapters.influx_repository.metrics_repo import MetricsRepo
+from app.adapters.pg_repository.event_log_writer import EventLogWriter
+from app.adapters.pg_repository.heart_rate_repo import HeartRateRepo
+from app.domain.health_metrics.samples import MetricSample
+from app.services.health_metrics.heart_rate_processor import HeartRateProcessor
+
+
+def _samples(n: int, alert_rate: float, seed: int = 0):
+    rng = random.Random(seed)
+    base = datetime.now(timezone.utc)
+    return [
+        MetricSample(
+            f"P{i % 1000:06d}",
+            f"DTH{i % 1000:06d}",
+            rng.randint(121, 180) if rng.random() < alert_rate else rng.randint(50, 119),
+            base + timedelta(milliseconds=i),
+        )
+        for i in range(n)
+    ]
+
+
+def _processor(n: int) -> HeartRateProcessor:
+    influx = InfluxBatchWriter(None, "bench", batch_size=n, max_pending=n + 1)
+    pg_writer = EventLogWriter(None, batch_size=n, max_pending=n + 1)
+    return HeartRateProcessor(MetricsRepo(None, influx), HeartRateRepo(None, pg_writer))
+
+
+async def run(args) -> None:
+    samples = _samples(args.samples, args.alert_rate, args.seed)
+
+    processor = _processor(args.samples)
+    start = time.perf_counter()
+    for sample in samples:
+        await processor.handle_data_received(sample)
+    single = time.perf_counter() - start
+
+    processor = _processor(args.samples)
+    start = time.perf_counter()
+    for i in range(0, len(samples), args.batch):
+        await processor.handle_batch(samples[i:i + args.batch])
+    batched = time.perf_counter() - start
+
+    n = len(samples)
+    print(f"samples={n} batch={args.batch} alert_rate={args.alert_rate}")
+    print(f"handle_data_received: {single:.3f}s  {n / single:,.0f} samples/s")
+    print(f"handle_batch:         {batched:.3f}s  {n / batched:,.0f} samples/s  ({single / batched:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="指标 Processor 逐条/批量处理基准")
+    parser.add_argument("--samples", type=int, default=200000)
+    parser.add_argument("--batch", type=int, default=1000, help="每批条数")
+    parser.add_argument("--alert-rate", type=float, default=0.05, help="超过阈值的样本比例")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.getLogger("neoDTH").setLevel(logging.WARNING)
+    logging.getLogger("HeartRateProcessor").setLevel(logging.ERROR)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+合成 TCP 网关帧流（MAGIC|len|crc|msgpack），供基准测试使用。
+"""
+import random
+import time
+from typing import List, Tuple
+
+import msgpack
+
+from app.adapters.tcp_gateway.frame_decoder import MAGIC
+from app.adapters.tcp_gateway.handler import crc8
+
+
+def build_frame(payload: dict) -> bytes:
+    data = msgpack.packb(payload, use_bin_type=True)
+    return MAGIC + bytes((len(data), crc8(data))) + data
+
+
+def synthetic_payloads(n_frames: int, n_devices: int = 1000, seed: int = 0) -> List[dict]:
+    """
+    生成模拟可穿戴设备上报的 payload 列表。
+    """
+    rng = random.Random(seed)
+    now = int(time.time())
+    return [
+        {
+            "sn": f"DTH{rng.randrange(n_devices):06d}",
+            "ts": now + i,
+            "hr": rng.randint(50, 140),
+            "temp": round(rng.uniform(35.5, 39.5), 1),
+        }
+        for i in range(n_frames)
+    ]
+
+
+def synthetic_capture(n_frames: int, n_devices: int = 1000, seed: int = 0) -> bytes:
+    """
+    生成连续的合法帧字节流。
+    """
+    return b"".join(build_frame(p) for p in synthetic_payloads(n_frames, n_devices, seed))
+
+
+def noisy_stream(
+    payloads: List[dict],
+    noise_rate: float = 0.0,
+    corrupt_rate: float = 0.0,
+    seed: int = 0,
+) -> Tuple[bytes, List[Tuple[int, int]]]:
+    """
+    将 payload 编码为带噪声的帧流。
+        noise_rate:   每帧之前插入 1~32 字节随机垃圾数据的概率（不含 Magic 首字节）
+        corrupt_rate: 翻转 payload 中一个字节使 CRC 校验失败的概率
+    返回 (字节流, 合法帧列表[(在 payloads 中的下标, 帧结束偏移)])。
+    """
+    rng = random.Random(seed)
+    junk_alphabet = bytes(b for b in range(256) if b != MAGIC[0])
+    parts = []
+    valid = []
+    offset = 0
+    for i, payload in enumerate(payloads):
+        if noise_rate and rng.random() < noise_rate:
+            junk = bytes(rng.choice(junk_alphabet) for _ in range(rng.randint(1, 32)))
+            parts.append(junk)
+            offset += len(junk)
+        frame = build_frame(payload)
+        if corrupt_rate and rng.random() < corrupt_rate:
+            frame = bytearray(frame)
+            frame[rng.randrange(4, len(frame))] ^= 0xFF
+            frame = bytes(frame)
+        else:
+            valid.append((i, offset + len(frame)))
+        parts.append(frame)
+        offset += len(frame)
+    return b"".join(parts), valid
+
+
+def fragment(data: bytes, min_size: int = 1, max_size: int = 1500, seed: int = 0) -> List[bytes]:
+    """
+    按 [min_size, max_size] 随机长度切分字节流，模拟 TCP 分片与粘包。
+    """
+    rng = random.Random(seed)
+    chunks = []
+    pos = 0
+    while pos < len(data):
+        size = rng.randint(min_size, max_size)
+        chunks.append(data[pos:pos + size])
+        pos += size
+    return chunks
@@ -0,0 +1,120 @@
+import pytest
+
+from app.adapters.tcp_gateway.registry import ConnectionRegistry
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Closer:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def advance(registry: ConnectionRegistry, clock: FakeClock, seconds: float) -> None:
+    """
+    模拟后台任务: 每 tick 推进一次时钟与时间轮。
+    """
+    for _ in range(int(round(seconds / registry.tick))):
+        clock.now += registry.tick
+        registry._advance()
+
+
+def test_idle_connection_is_reaped(clock):
+    registry = ConnectionRegistry(idle_timeout=5.0, tick=1.0, clock=clock)
+    closer = Closer()
+    conn = registry.open("peer", closer)
+    registry.touch(conn, "DTH000001", 1)
+    advance(registry, clock, 4)
+    assert closer.calls == 0 and registry.get("DTH000001") is conn
+    advance(registry, clock, 1)
+    assert closer.calls == 1
+    assert registry.reaped == 1
+    assert registry.get("DTH000001") is None
+    assert registry.stats()["connections"] == 0
+
+
+def test_active_connection_is_rescheduled(clock):
+    registry = ConnectionRegistry(idle_timeout=5.0, tick=1.0, clock=clock)
+    closer = Closer()
+    conn = registry.open("peer", closer)
+    # 每 3 秒收到一帧: 到期检查时仍活跃，按剩余时间重新挂到后续格子
+    for _ in range(5):
+        advance(registry, clock, 3)
+        registry.touch(conn, "DTH000001", 1)
+    assert closer.calls == 0 and registry.reaped == 0
+    advance(registry, clock, 4)
+    assert closer.calls == 0
+    advance(registry, clock, 1)
+    assert closer.calls == 1
+
+
+def test_closed_connection_is_removed_lazily(clock):
+    registry = ConnectionRegistry(idle_timeout=5.0, tick=1.0, clock=clock)
+    closer = Closer()
+    conn = registry.open("peer", closer)
+    registry.touch(conn, "DTH000001", 1)
+    registry.close(conn)
+    assert registry.get("DTH000001") is None
+    assert any(conn in slot for slot in registry._slots)
+    advance(registry, clock, 6)
+    # 到期时发现已注销，直接丢弃，不再关闭或计入回收
+    assert closer.calls == 0 and registry.reaped == 0
+    assert not any(conn in slot for slot in registry._slots)
+
+
+def test_reconnect_keeps_index_on_newest_connection(clock):
+    registry = ConnectionRegistry(idle_timeout=5.0, tick=1.0, clock=clock)
+    old = registry.open("old", Closer())
+    registry.touch(old, "DTH000001", 1)
+    new = registry.open("new", Closer())
+    registry.touch(new, "DTH000001", 1)
+    assert registry.get("DTH000001") is new
+    registry.close(old)
+    assert registry.get("DTH000001") is new
+    assert registry.stats()["connections"] == 1
+
+
+def test_frame_rate_decays_when_device_goes_silent(clock):
+    registry = ConnectionRegistry(idle_timeout=300.0, tick=1.0, clock=clock)
+    busy = registry.open("busy", Closer())
+    quiet = registry.open("quiet", Closer())
+    for _ in range(20):
+        clock.now += 1.0
+        registry.touch(busy, "BUSY", 100)
+        registry.touch(quiet, "QUIET", 10)
+    top = registry.stats()["top_devices"]
+    assert [d["sn"] for d in top] == ["BUSY", "QUIET"]
+    assert top[0]["frame_rate"] == pytest.approx(100, rel=0.01)
+
+    # BUSY 停止上报，QUIET 继续每秒 10 帧
+    for _ in range(10):
+        clock.now += 1.0
+        registry.touch(quiet, "QUIET", 10)
+    top = registry.stats()["top_devices"]
+    assert [d["sn"] for d in top] == ["QUIET", "BUSY"]
+    assert top[1]["frame_rate"] < 5
+    assert top[1]["idle_seconds"] == 10.0
+    # stats() 只读计算，不修改连接状态
+    assert busy.frame_rate == pytest.approx(100, rel=0.01)
+
+
+def test_frame_rate_within_window_is_unchanged(clock):
+    registry = ConnectionRegistry(idle_timeout=300.0, tick=1.0, clock=clock)
+    conn = registry.open("peer", Closer())
+    conn.frame_rate = 50.0
+    clock.now += 0.5
+    assert registry.frame_rate(conn, clock.now) == 50.0
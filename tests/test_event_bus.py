@@ -0,0 +1,278 @@
+import asyncio
+import random
+import threading
+from types import SimpleNamespace
+
+from app.core.event_bus import EventBus, QueuedSubscriber
+
+
+def event(patient_id: str, seq: int):
+    return SimpleNamespace(patient_id=patient_id, seq=seq)
+
+
+def test_queued_preserves_per_patient_order():
+    async def main():
+        bus = EventBus()
+        rng = random.Random(0)
+        received = {}
+
+        async def handler(e):
+            # 随机让出事件循环，打乱不同患者之间的处理顺序
+            await asyncio.sleep(rng.random() / 1000)
+            received.setdefault(e.patient_id, []).append(e.seq)
+
+        bus.subscribe("Vital", handler, queued=True, shards=4, maxsize=100)
+        for seq in range(50):
+            for patient in ("p1", "p2", "p3", "p4", "p5"):
+                await bus.publish("Vital", event(patient, seq))
+        await bus.stop()
+        return received
+
+    received = asyncio.run(main())
+    assert sorted(received) == ["p1", "p2", "p3", "p4", "p5"]
+    for seqs in received.values():
+        assert seqs == list(range(50))
+
+
+def test_queued_publish_returns_before_handler_runs():
+    async def main():
+        bus = EventBus()
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def handler(e):
+            started.set()
+            await release.wait()
+
+        bus.subscribe("Vital", handler, queued=True, shards=1)
+        await bus.publish("Vital", event("p1", 0))
+        assert not started.is_set()
+        await asyncio.sleep(0)
+        assert started.is_set()
+        release.set()
+        await bus.stop()
+
+    asyncio.run(main())
+
+
+def test_queued_drop_overflow_counts():
+    async def main():
+        release = asyncio.Event()
+        processed = []
+
+        async def handler(e):
+            await release.wait()
+            processed.append(e.seq)
+
+        subscriber = QueuedSubscriber(handler, shards=1, maxsize=2, overflow="drop")
+        # worker 尚未运行: 0、1 入队，2~4 丢弃
+        for seq in range(5):
+            await subscriber.put(event("p1", seq))
+        # worker 取走 0 后阻塞，队列腾出一个位置: 5 入队，6、7 丢弃
+        await asyncio.sleep(0)
+        for seq in range(5, 8):
+            await subscriber.put(event("p1", seq))
+        release.set()
+        await subscriber.stop()
+        return subscriber, processed
+
+    subscriber, processed = asyncio.run(main())
+    assert processed == [0, 1, 5]
+    assert subscriber.dropped == 5
+    assert subscriber.processed == 3
+
+
+def test_queued_handler_errors_do_not_stop_worker():
+    async def main():
+        bus = EventBus()
+        seen = []
+
+        async def handler(e):
+            if e.seq == 1:
+                raise RuntimeError("boom")
+            seen.append(e.seq)
+
+        bus.subscribe("Vital", handler, queued=True, shards=1)
+        for seq in range(3):
+            await bus.publish("Vital", event("p1", seq))
+        await bus.stop()
+        return bus, seen
+
+    bus, seen = asyncio.run(main())
+    assert seen == [0, 2]
+    assert next(iter(bus.stats()["queued"].values()))["errors"] == 1
+
+
+def test_publish_many_calls_batch_subscriber_once():
+    async def main():
+        bus = EventBus()
+        batches, singles, queued = [], [], []
+
+        async def on_batch(events):
+            batches.append([e.seq for e in events])
+
+        async def on_event(e):
+            singles.append(e.seq)
+
+        async def on_queued(e):
+            queued.append(e.seq)
+
+        bus.subscribe("Vital", on_batch, batch=True)
+        bus.subscribe("Vital", on_event)
+        bus.subscribe("Vital", on_queued, queued=True, shards=2)
+        await bus.publish_many("Vital", [event("p1", seq) for seq in range(10)])
+        await bus.publish("Vital", event("p1", 10))
+        await bus.publish_many("Vital", [])
+        await bus.stop()
+        return batches, singles, queued
+
+    batches, singles, queued = asyncio.run(main())
+    assert batches == [list(range(10)), [10]]
+    assert sorted(singles) == list(range(11))
+    assert queued == list(range(11))
+
+
+def test_publish_many_coalesces_into_batches():
+    async def main():
+        bus = EventBus()
+        batches = []
+
+        async def on_batch(events):
+            batches.append([e.seq for e in events])
+
+        bus.subscribe("Vital", on_batch, coalesce=True, max_delay=10.0, max_size=4)
+        await bus.publish_many("Vital", [event("p1", seq) for seq in range(6)])
+        await bus.publish("Vital", event("p1", 6))
+        await asyncio.sleep(0)
+        # 满 max_size 的批次立即处理，剩余数据在 stop() 时写出
+        assert batches == [[0, 1, 2, 3]]
+        await bus.stop()
+        return batches
+
+    assert asyncio.run(main()) == [[0, 1, 2, 3], [4, 5, 6]]
+
+
+def test_sync_handler_runs_in_executor():
+    async def main():
+        bus = EventBus()
+        loop_thread = threading.get_ident()
+        threads = []
+
+        def on_event(e):
+            threads.append(threading.get_ident())
+
+        bus.subscribe("Vital", on_event)
+        await bus.publish_many("Vital", [event("p1", seq) for seq in range(3)])
+        await bus.stop()
+        return loop_thread, threads
+
+    loop_thread, threads = asyncio.run(main())
+    assert len(threads) == 3
+    assert loop_thread not in threads
+
+
+class Base:
+    def __init__(self, seq: int = 0):
+        self.seq = seq
+
+
+class Child(Base):
+    pass
+
+
+def collect(bus: EventBus, event_type, name: str, log: list) -> None:
+    async def handler(e):
+        log.append(name)
+
+    bus.subscribe(event_type, handler)
+
+
+def test_route_resolution_follows_class_hierarchy_and_aliases():
+    async def main():
+        bus = EventBus()
+        log = []
+        collect(bus, Base, "Base", log)
+        collect(bus, "Base", "'Base'", log)
+        collect(bus, Child, "Child", log)
+        collect(bus, "Child", "'Child'", log)
+        results = {}
+        for key in (Child, "Child", Base, "Base"):
+            log.clear()
+            await bus.publish(key, Child())
+            results[key] = sorted(log)
+        return results
+
+    results = asyncio.run(main())
+    everyone = sorted(["Base", "'Base'", "Child", "'Child'"])
+    assert results[Child] == everyone
+    assert results["Child"] == everyone
+    assert results[Base] == sorted(["Base", "'Base'"])
+    assert results["Base"] == sorted(["Base", "'Base'"])
+
+
+def test_unknown_string_matches_only_itself():
+    async def main():
+        bus = EventBus()
+        log = []
+        collect(bus, "tcp_data_received", "raw", log)
+        collect(bus, Base, "Base", log)
+        await bus.publish("tcp_data_received", {"sn": "DTH000001"})
+        await bus.publish("unknown", {})
+        return log
+
+    assert asyncio.run(main()) == ["raw"]
+
+
+def test_route_cache_is_invalidated():
+    async def main():
+        bus = EventBus()
+        log = []
+
+        async def first(e):
+            log.append("first")
+
+        bus.subscribe(Base, first)
+        await bus.publish(Child, Child())
+        assert log == ["first"]
+        # 新订阅者与取消订阅都会让已缓存的路由失效
+        collect(bus, "Child", "second", log)
+        await bus.publish(Child, Child())
+        assert sorted(log) == ["first", "first", "second"]
+        bus.unsubscribe(Base, first)
+        log.clear()
+        await bus.publish(Child, Child())
+        return log
+
+    assert asyncio.run(main()) == ["second"]
+
+
+def test_alias_of_subclass_learned_on_first_publish():
+    async def main():
+        bus = EventBus()
+        log = []
+        collect(bus, Base, "Base", log)
+        # "Child" 尚未出现过，作为未知字符串只匹配自身
+        await bus.publish("Child", Child())
+        assert log == []
+        await bus.publish(Child, Child())
+        await bus.publish("Child", Child())
+        return log
+
+    assert asyncio.run(main()) == ["Base", "Base"]
+
+
+def test_subscription_reached_through_several_keys_runs_once():
+    async def main():
+        bus = EventBus()
+        calls = []
+
+        async def handler(events):
+            calls.append(len(events))
+
+        bus.subscribe(Base, handler, batch=True)
+        await bus.publish_many(Child, [Child(i) for i in range(3)])
+        return bus, calls
+
+    bus, calls = asyncio.run(main())
+    assert calls == [3]
+    assert bus.stats()["routes"] == {"Child": 1}
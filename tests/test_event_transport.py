@@ -0,0 +1,200 @@
+import asyncio
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.adapters.event_transport.broker import LocalBroker
+from app.adapters.event_transport.broker_transport import BrokerTransport
+from app.adapters.event_transport.codec import EventCodec
+from app.core.event_bus import EventBus, EventTransport
+from app.domain.health_metrics.heart_rate.events import HeartRateHighAlert
+
+TOPIC = HeartRateHighAlert.__name__
+TS = datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc)
+
+
+class UrgentHeartRateAlert(HeartRateHighAlert):
+    level: int = 2
+
+
+def alert(patient_id: str, value: int, cls=HeartRateHighAlert, **extra) -> HeartRateHighAlert:
+    return cls(patient_id=patient_id, device_id="DTH000001", value=value, timestamp=TS, threshold=120, **extra)
+
+
+@pytest.fixture
+def socket_path():
+    # Unix socket 路径长度有限，使用短临时目录
+    with tempfile.TemporaryDirectory(prefix="neodth") as directory:
+        yield f"{directory}/broker.sock"
+
+
+async def wait_for(predicate, timeout: float = 5.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("等待事件投递超时")
+        await asyncio.sleep(0.01)
+
+
+async def consumer(path: str, group: str, log: list, name: str) -> EventBus:
+    bus = EventBus()
+
+    async def handler(e):
+        log.append((name, e.patient_id, e.value))
+
+    bus.subscribe(TOPIC, handler)
+    await bus.attach_transport(BrokerTransport(path, group), [TOPIC])
+    return bus
+
+
+def test_codec_round_trip():
+    codec = EventCodec()
+    event = alert("p1", 130)
+    decoded = codec.decode(codec.encode(event))
+    assert type(decoded) is HeartRateHighAlert
+    assert decoded.model_dump() == event.model_dump()
+
+    urgent = codec.decode(codec.encode(alert("p1", 150, UrgentHeartRateAlert, level=3)))
+    assert type(urgent) is UrgentHeartRateAlert and urgent.level == 3
+
+    naive = datetime(2026, 1, 2, 3, 4, 5, 678901)
+    local = TS.astimezone(timezone(timedelta(hours=8)))
+    payload = {"sn": "DTH000001", "hr": 72, "naive": naive, "aware": local, "raw": b"\x00"}
+    decoded = codec.decode(codec.encode(payload))
+    assert decoded == payload
+    assert decoded["naive"].tzinfo is None and decoded["aware"].tzinfo is not None
+
+
+def test_broker_round_trip_partitions_by_patient(socket_path):
+    async def main():
+        broker = LocalBroker(socket_path, partitions=8)
+        await broker.start()
+        log = []
+        consumers = [await consumer(socket_path, "workers", log, name) for name in ("a", "b")]
+        publisher = EventBus()
+        await publisher.attach_transport(BrokerTransport(socket_path, ""), [TOPIC])
+        patients = [f"P{i:03d}" for i in range(20)]
+        for value in range(10):
+            await publisher.publish_many(TOPIC, [alert(patient, value) for patient in patients])
+        await wait_for(lambda: len(log) == 200)
+        await asyncio.sleep(0.05)
+        stats = broker.stats()
+        for bus in (publisher, *consumers):
+            await bus.stop()
+        await broker.stop()
+        return log, stats, publisher.fallbacks
+
+    log, stats, fallbacks = asyncio.run(main())
+    assert len(log) == 200 and fallbacks == 0
+    assert stats["published"] == 200
+    owners = {}
+    for name, patient, value in log:
+        owners.setdefault(patient, set()).add(name)
+    # 每个患者只由组内一个进程处理，且按发布顺序
+    assert all(len(names) == 1 for names in owners.values())
+    assert {name for names in owners.values() for name in names} == {"a", "b"}
+    for patient in owners:
+        assert [value for _, p, value in log if p == patient] == list(range(10))
+
+
+def test_each_group_receives_every_event(socket_path):
+    async def main():
+        broker = LocalBroker(socket_path, partitions=4)
+        await broker.start()
+        log = []
+        consumers = [await consumer(socket_path, group, log, group) for group in ("alerts", "audit")]
+        await consumers[0].publish_many(TOPIC, [alert(f"P{i}", i) for i in range(10)])
+        await wait_for(lambda: len(log) == 20)
+        for bus in consumers:
+            await bus.stop()
+        await broker.stop()
+        return log
+
+    log = asyncio.run(main())
+    assert sorted(v for g, _, v in log if g == "alerts") == list(range(10))
+    assert sorted(v for g, _, v in log if g == "audit") == list(range(10))
+
+
+def test_subclass_uses_base_topic_and_is_rebuilt(socket_path):
+    async def main():
+        broker = LocalBroker(socket_path, partitions=4)
+        await broker.start()
+        received = []
+        bus = EventBus()
+
+        async def on_base(e):
+            received.append(("base", type(e).__name__))
+
+        async def on_urgent(e):
+            received.append(("urgent", e.level))
+
+        bus.subscribe(HeartRateHighAlert, on_base)
+        bus.subscribe(UrgentHeartRateAlert, on_urgent)
+        await bus.attach_transport(BrokerTransport(socket_path, "workers"), [HeartRateHighAlert])
+        await bus.publish(UrgentHeartRateAlert, alert("P1", 150, UrgentHeartRateAlert, level=3))
+        await wait_for(lambda: len(received) == 2)
+        stats = broker.stats()
+        await bus.stop()
+        await broker.stop()
+        return received, stats
+
+    received, stats = asyncio.run(main())
+    assert sorted(received) == [("base", "UrgentHeartRateAlert"), ("urgent", 3)]
+    assert list(stats["topics"]) == [TOPIC]
+    assert stats["dropped"] == 0 and not any(stats["pending"].values())
+
+
+def test_events_published_before_first_consumer_are_held(socket_path):
+    async def main():
+        broker = LocalBroker(socket_path, partitions=4)
+        await broker.start()
+        publisher = EventBus()
+        await publisher.attach_transport(BrokerTransport(socket_path, ""), [TOPIC])
+        await publisher.publish_many(TOPIC, [alert("P1", value) for value in range(5)])
+        await wait_for(lambda: broker.stats()["pending"].get(TOPIC) == 5)
+        log = []
+        late = await consumer(socket_path, "workers", log, "late")
+        await wait_for(lambda: len(log) == 5)
+        for bus in (publisher, late):
+            await bus.stop()
+        await broker.stop()
+        return log
+
+    assert [value for _, _, value in asyncio.run(main())] == list(range(5))
+
+
+class UnavailableTransport(EventTransport):
+    def __init__(self):
+        self.topics = []
+
+    async def start(self, topics, deliver):
+        self.topics = list(topics)
+
+    async def publish(self, topic, events):
+        return False
+
+    async def stop(self):
+        pass
+
+
+def test_unavailable_transport_falls_back_to_local_dispatch():
+    async def main():
+        bus = EventBus()
+        log = []
+
+        async def handler(e):
+            log.append(e.value)
+
+        bus.subscribe(TOPIC, handler)
+        transport = UnavailableTransport()
+        await bus.attach_transport(transport, [HeartRateHighAlert])
+        await bus.publish(UrgentHeartRateAlert, alert("P1", 1, UrgentHeartRateAlert))
+        await bus.publish_many(TOPIC, [alert("P1", 2), alert("P1", 3)])
+        await bus.stop()
+        return bus, transport, log
+
+    bus, transport, log = asyncio.run(main())
+    assert transport.topics == [TOPIC]
+    assert log == [1, 2, 3]
+    assert bus.fallbacks == 3
@@ -0,0 +1,139 @@
+import msgpack
+
+from app.adapters.tcp_gateway.crc import crc8
+from app.adapters.tcp_gateway.frame_decoder import MAGIC, FrameDecoder
+from app.adapters.tcp_gateway.payload_decoder import decode_frames
+
+
+def build_frame(payload: dict) -> bytes:
+    data = msgpack.packb(payload, use_bin_type=True)
+    return MAGIC + bytes((len(data), crc8(data))) + data
+
+
+def corrupt(frame: bytes) -> bytes:
+    # 翻转 payload 最后一个字节，长度不变、CRC 不再匹配
+    return frame[:-1] + bytes((frame[-1] ^ 0xFF,))
+
+
+def decode(decoder: FrameDecoder) -> list:
+    return decode_frames(decoder.frames())
+
+
+def payloads(n: int, start: int = 0) -> list:
+    return [{"sn": f"DTH{i:06d}", "hr": 60 + i % 80} for i in range(start, start + n)]
+
+
+def test_single_frame():
+    decoder = FrameDecoder(crc8)
+    decoder.feed(build_frame({"sn": "DTH000001", "hr": 72}))
+    assert decode(decoder) == [{"sn": "DTH000001", "hr": 72}]
+    assert len(decoder) == 0
+
+
+def test_multiple_frames_in_one_buffer():
+    expected = payloads(50)
+    decoder = FrameDecoder(crc8)
+    decoder.feed(b"".join(build_frame(p) for p in expected))
+    assert decode(decoder) == expected
+    assert len(decoder) == 0
+
+
+def test_partial_frames_wait_for_rest():
+    expected = payloads(3)
+    stream = b"".join(build_frame(p) for p in expected)
+    decoder = FrameDecoder(crc8)
+    decoded = []
+    # 逐字节到达: 每个帧只在最后一个字节到达后产出一次
+    for i in range(len(stream)):
+        decoder.feed(stream[i:i + 1])
+        decoded.extend(decode(decoder))
+    assert decoded == expected
+    assert len(decoder) == 0
+
+
+def test_partial_header_is_kept():
+    frame = build_frame({"sn": "DTH000001"})
+    decoder = FrameDecoder(crc8)
+    decoder.feed(frame[:3])
+    assert decode(decoder) == []
+    assert len(decoder) == 3
+    decoder.feed(frame[3:])
+    assert decode(decoder) == [{"sn": "DTH000001"}]
+
+
+def test_corrupted_frame_is_skipped():
+    good = payloads(3)
+    frames = [build_frame(p) for p in good]
+    decoder = FrameDecoder(crc8)
+    decoder.feed(frames[0] + corrupt(build_frame({"sn": "BAD"})) + frames[1] + frames[2])
+    assert decode(decoder) == good
+    assert decoder.crc_errors == 1
+
+
+def test_garbage_between_frames_is_discarded():
+    good = payloads(2)
+    decoder = FrameDecoder(crc8)
+    decoder.feed(b"\x00\x01\x02" + build_frame(good[0]) + b"\xff\xfe" + build_frame(good[1]))
+    assert decode(decoder) == good
+    assert decoder.discarded_bytes == 5
+
+
+def test_trailing_magic_byte_is_kept():
+    frame = build_frame({"sn": "DTH000001"})
+    decoder = FrameDecoder(crc8)
+    decoder.feed(b"\x00\x00\x00\x00" + MAGIC[:1])
+    assert decode(decoder) == []
+    assert len(decoder) == 1
+    decoder.feed(frame[1:])
+    assert decode(decoder) == [{"sn": "DTH000001"}]
+
+
+def test_invalid_length_resyncs():
+    good = {"sn": "DTH000001"}
+    decoder = FrameDecoder(crc8)
+    decoder.feed(MAGIC + b"\x00\x00" + build_frame(good))
+    assert decode(decoder) == [good]
+    assert decoder.length_errors == 1
+
+
+def test_invalid_msgpack_and_missing_sn_are_dropped():
+    raw = b"\xc1"  # msgpack 保留字节，解包失败
+    decoder = FrameDecoder(crc8)
+    decoder.feed(
+        MAGIC + bytes((len(raw), crc8(raw))) + raw
+        + build_frame({"hr": 72})
+        + build_frame({"sn": "DTH000001"})
+    )
+    assert decode(decoder) == [{"sn": "DTH000001"}]
+
+
+def test_buffered_protocol_interface():
+    expected = payloads(200)
+    stream = b"".join(build_frame(p) for p in expected)
+    decoder = FrameDecoder(crc8, compact_threshold=64, read_size=16, max_read_size=256)
+    decoded = []
+    pos = 0
+    while pos < len(stream):
+        buf = decoder.get_buffer()
+        n = min(len(buf), len(stream) - pos, 37)
+        buf[:n] = stream[pos:pos + n]
+        buf.release()
+        decoder.buffer_updated(n)
+        pos += n
+        decoded.extend(decode(decoder))
+    assert decoded == expected
+    assert len(decoder) == 0
+
+
+def test_compaction_keeps_partial_tail():
+    decoder = FrameDecoder(crc8, compact_threshold=32, read_size=64)
+    decoded = []
+    expected = payloads(100)
+    for p in expected:
+        frame = build_frame(p)
+        # 每帧分两次到达，压缩/扩容时缓冲区内总有半帧
+        decoder.feed(frame[:5])
+        decoded.extend(decode(decoder))
+        decoder.feed(frame[5:])
+        decoded.extend(decode(decoder))
+    assert decoded == expected
@@ -0,0 +1,162 @@
+import asyncio
+
+import pytest
+
+from app.adapters.tcp_gateway.ingest import IngestionQueue
+
+
+class StubTransport:
+    """
+    记录 pause_reading / resume_reading 调用的 transport 替身。
+    """
+
+    def __init__(self, queue: IngestionQueue = None, closing: bool = False):
+        self.queue = queue
+        self.closing = closing
+        self.calls = []
+
+    def pause_reading(self):
+        self.calls.append(("pause", self.queue._queue.qsize()))
+
+    def resume_reading(self):
+        self.calls.append(("resume", self.queue._queue.qsize()))
+
+    def is_closing(self) -> bool:
+        return self.closing
+
+
+def make_queue(**kwargs) -> IngestionQueue:
+    options = dict(maxsize=10, high_watermark=6, low_watermark=2)
+    options.update(kwargs)
+    return IngestionQueue(**options)
+
+
+def test_watermarks_are_validated():
+    with pytest.raises(ValueError):
+        make_queue(low_watermark=6)
+    with pytest.raises(ValueError):
+        make_queue(high_watermark=11)
+
+
+def test_pause_at_high_watermark_and_drop_when_full():
+    async def main():
+        queue = make_queue()
+        transport = StubTransport(queue)
+        results = [queue.put_nowait({"seq": i}, transport) for i in range(12)]
+        return queue, transport, results
+
+    queue, transport, results = asyncio.run(main())
+    # 第 6 条达到高水位时暂停一次，之后不重复暂停
+    assert transport.calls == [("pause", 6)]
+    assert results == [True] * 10 + [False] * 2
+    stats = queue.stats()
+    assert stats["dropped"] == 2 and stats["enqueued"] == 10
+    assert stats["max_depth"] == 10 and stats["paused_connections"] == 1 and stats["pause_events"] == 1
+
+
+def test_resume_at_low_watermark():
+    async def main():
+        queue = make_queue()
+        transport = StubTransport(queue)
+        closing = StubTransport(queue, closing=True)
+        for i in range(8):
+            queue.put_nowait({"seq": i}, transport if i % 2 else closing)
+        published = []
+
+        async def sink(payload):
+            published.append(payload["seq"])
+
+        queue.start(sink=sink)
+        await asyncio.wait_for(queue._queue.join(), 1.0)
+        await queue.stop()
+        return queue, transport, closing, published
+
+    queue, transport, closing, published = asyncio.run(main())
+    assert published == list(range(8))
+    assert transport.calls == [("pause", 6), ("resume", 2)]
+    # 已关闭的连接不再恢复读取
+    assert closing.calls == [("pause", 7)]
+    assert queue.stats()["paused_connections"] == 0
+
+
+def test_forget_removes_paused_transport():
+    async def main():
+        queue = make_queue(maxsize=4, high_watermark=2, low_watermark=0)
+        transport = StubTransport(queue)
+        for i in range(2):
+            queue.put_nowait({"seq": i}, transport)
+        queue.forget(transport)
+        return queue
+
+    assert asyncio.run(main()).stats()["paused_connections"] == 0
+
+
+def test_stream_mode_waits_until_drained():
+    async def main():
+        queue = make_queue()
+        for i in range(6):
+            await queue.put({"seq": i})
+        waiter = asyncio.create_task(queue.wait_writable())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        release = asyncio.Event()
+        published = []
+
+        async def sink(payload):
+            await release.wait()
+            published.append(payload["seq"])
+
+        queue.start(sink=sink)
+        await asyncio.sleep(0.01)
+        # worker 取出一条后深度为 5，仍高于低水位
+        assert not waiter.done()
+        release.set()
+        await asyncio.wait_for(waiter, 1.0)
+        await queue.stop()
+        return published
+
+    assert asyncio.run(main()) == list(range(6))
+
+
+def test_stream_put_waits_when_full():
+    async def main():
+        queue = make_queue(maxsize=3, high_watermark=2, low_watermark=0)
+        for i in range(3):
+            await queue.put({"seq": i})
+        blocked = asyncio.create_task(queue.put({"seq": 3}))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        published = []
+
+        async def sink(payload):
+            published.append(payload["seq"])
+
+        queue.start(sink=sink)
+        await asyncio.wait_for(blocked, 1.0)
+        await queue.stop()
+        return queue, published
+
+    queue, published = asyncio.run(main())
+    assert published == [0, 1, 2, 3]
+    assert queue.stats()["dropped"] == 0
+
+
+def test_batch_worker_publishes_batches_and_counts_errors():
+    async def main():
+        queue = make_queue(maxsize=20, high_watermark=15, low_watermark=5, batch_size=4)
+        batches = []
+
+        async def sink_many(payloads):
+            if any(p["seq"] == 9 for p in payloads):
+                raise RuntimeError("boom")
+            batches.append([p["seq"] for p in payloads])
+
+        for i in range(10):
+            queue.put_nowait({"seq": i})
+        queue.start(sink_many=sink_many)
+        await queue.stop()
+        return queue, batches
+
+    queue, batches = asyncio.run(main())
+    assert batches == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert queue.stats()["published"] == 8 and queue.stats()["publish_errors"] == 2
@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from influxdb_client import Point, WritePrecision
+
+from app.adapters.influx_repository.line_protocol import LineProtocolEncoder, format_field, timestamp_ns
+
+TS = datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc)
+
+
+def reference(measurement: str, patient_id: str, device_id: str, fields: dict, ts: datetime) -> str:
+    """
+    influxdb-client 自带的 Point 序列化结果，作为行协议的参考输出。
+    """
+    point = Point(measurement).tag("patient_id", patient_id).tag("device_id", device_id)
+    for key, value in fields.items():
+        point = point.field(key, value)
+    return point.time(ts, WritePrecision.NS).to_line_protocol()
+
+
+def lines(encoder: LineProtocolEncoder) -> list:
+    data, count = encoder.take()
+    result = data.decode().splitlines()
+    assert len(result) == count
+    return result
+
+
+@pytest.mark.parametrize("patient_id, device_id", [
+    ("P001", "DTH000001"),
+    ("p 1,=x", "d,ev ice"),
+    ("患者", "设备"),
+    ("p\n1", "d\t\r"),
+    ("p\\", "d\\x"),
+])
+def test_matches_influxdb_client(patient_id, device_id):
+    encoder = LineProtocolEncoder()
+    encoder.heart_rate(patient_id, device_id, 72, TS)
+    encoder.temperature(patient_id, device_id, 36.6, TS)
+    encoder.sleep(patient_id, device_id, 420, 'po"or\\', TS)
+    assert lines(encoder) == [
+        reference("heart_rate", patient_id, device_id, {"value": 72}, TS),
+        reference("temperature", patient_id, device_id, {"value": 36.6}, TS),
+        reference("sleep", patient_id, device_id, {"duration_minutes": 420, "sleep_quality": 'po"or\\'}, TS),
+    ]
+
+
+@pytest.mark.parametrize("value", [float("nan"), float("inf"), float("-inf")])
+def test_non_finite_temperature_is_skipped_like_influxdb_client(value):
+    assert reference("temperature", "p", "d", {"value": value}, TS) == ""
+    encoder = LineProtocolEncoder()
+    encoder.temperature("p", "d", value, TS)
+    encoder.temperature_many([("p", "d", value, TS), ("p", "d", 36.5, TS)])
+    encoder.point("vital", {"patient_id": "p"}, {"value": value}, TS)
+    encoder.point("vital", {"patient_id": "p"}, {"value": value, "count": 3}, TS)
+    assert lines(encoder) == [
+        reference("temperature", "p", "d", {"value": 36.5}, TS),
+        f"vital,patient_id=p count=3i {timestamp_ns(TS)}",
+    ]
+    assert encoder.skipped == 3
+
+
+def test_batch_methods_match_single():
+    rows = [(f"P{i}", f"D{i % 3}", 60 + i, TS + timedelta(seconds=i)) for i in range(20)]
+    single, batch = LineProtocolEncoder(), LineProtocolEncoder()
+    for row in rows:
+        single.heart_rate(*row)
+        single.temperature(*row)
+    batch.heart_rate_many(rows)
+    batch.temperature_many(rows)
+    assert sorted(lines(single)) == sorted(lines(batch))
+
+
+def test_value_types_are_coerced():
+    encoder = LineProtocolEncoder()
+    encoder.heart_rate("p", "d", 72.9, TS)
+    encoder.temperature("p", "d", 37, TS)
+    assert lines(encoder) == [
+        f"heart_rate,device_id=d,patient_id=p value=72i {timestamp_ns(TS)}",
+        f"temperature,device_id=d,patient_id=p value=37.0 {timestamp_ns(TS)}",
+    ]
+
+
+def test_empty_tags_and_sleep_quality_are_omitted():
+    encoder = LineProtocolEncoder()
+    encoder.heart_rate("", "d", 72, TS)
+    encoder.sleep("p", "", 30, None, TS)
+    assert lines(encoder) == [
+        f"heart_rate,device_id=d value=72i {timestamp_ns(TS)}",
+        f"sleep,patient_id=p duration_minutes=30i {timestamp_ns(TS)}",
+    ]
+
+
+def test_timestamp_ns():
+    assert timestamp_ns(TS) == 1767323045678901000
+    # 无时区视为 UTC，整数原样返回
+    assert timestamp_ns(TS.replace(tzinfo=None)) == timestamp_ns(TS)
+    assert timestamp_ns(TS.astimezone(timezone(timedelta(hours=8)))) == timestamp_ns(TS)
+    assert timestamp_ns(123) == 123
+
+
+def test_generic_point():
+    encoder = LineProtocolEncoder()
+    encoder.point(
+        "vital sign",
+        {"patient_id": "p", "device_id": "", "unit": "bpm"},
+        {"value": 1.5, "count": 3, "ok": True, "note": "a b", "skip": None},
+        TS,
+    )
+    assert lines(encoder) == [
+        f'vital\\ sign,patient_id=p,unit=bpm value=1.5,count=3i,ok=true,note="a b" {timestamp_ns(TS)}'
+    ]
+
+
+def test_format_field():
+    assert format_field(1) == "1i"
+    assert format_field(1.25) == "1.25"
+    assert format_field(False) == "false"
+    assert format_field('say "hi"') == '"say \\"hi\\""'
+    with pytest.raises(ValueError):
+        format_field(float("nan"))
+
+
+def test_take_resets_buffer():
+    encoder = LineProtocolEncoder()
+    encoder.heart_rate("p", "d", 72, TS)
+    assert len(encoder) == 1
+    data, count = encoder.take()
+    assert count == 1 and data.endswith(b"\n")
+    assert encoder.take() == (b"", 0)
+
+
+def test_prefix_cache_is_bounded():
+    encoder = LineProtocolEncoder(max_prefixes=4)
+    for i in range(10):
+        encoder.heart_rate(f"P{i}", "d", 72, TS)
+    assert len(encoder._prefixes) <= 4
+    assert lines(encoder)[-1] == f"heart_rate,device_id=d,patient_id=P9 value=72i {timestamp_ns(TS)}"
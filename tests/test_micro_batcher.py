@@ -0,0 +1,111 @@
+import asyncio
+
+from app.core.micro_batcher import MicroBatcher
+
+
+class SlowHandler:
+    """
+    记录批次与并发度的 handler，每批处理耗时 delay 秒。
+    """
+
+    def __init__(self, delay: float = 0.01):
+        self.delay = delay
+        self.batches = []
+        self.active = 0
+        self.peak = 0
+
+    async def __call__(self, batch):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(self.delay)
+        self.batches.append(list(batch))
+        self.active -= 1
+
+
+def test_flushes_on_size_and_delay():
+    async def main():
+        handler = SlowHandler(0)
+        batcher = MicroBatcher("t", handler, max_delay=0.02, max_size=3)
+        for i in range(4):
+            await batcher.submit(i)
+        await asyncio.sleep(0)
+        assert handler.batches == []  # 满批已开始处理，尚未完成
+        await asyncio.sleep(0.05)
+        return handler.batches
+
+    assert asyncio.run(main()) == [[0, 1, 2], [3]]
+
+
+def test_inflight_and_pending_are_bounded():
+    async def main():
+        handler = SlowHandler(0.005)
+        batcher = MicroBatcher("t", handler, max_delay=0.001, max_size=10, max_inflight=2, max_pending=25)
+        peak_pending = 0
+        for i in range(300):
+            await batcher.submit(i)
+            peak_pending = max(peak_pending, batcher.stats()["pending"])
+        await batcher.extend(list(range(300, 600)))
+        await batcher.stop()
+        return handler, batcher, peak_pending
+
+    handler, batcher, peak_pending = asyncio.run(main())
+    assert handler.peak <= 2
+    assert peak_pending <= 25
+    assert batcher.throttled > 0
+    assert all(len(batch) <= 10 for batch in handler.batches)
+    assert sorted(i for batch in handler.batches for i in batch) == list(range(600))
+    assert batcher.stats()["items"] == 600
+
+
+def test_extend_splits_oversized_input():
+    async def main():
+        handler = SlowHandler(0)
+        batcher = MicroBatcher("t", handler, max_delay=10.0, max_size=4, max_inflight=1, max_pending=8)
+        await batcher.extend(list(range(18)))
+        await batcher.stop()
+        return handler.batches
+
+    batches = asyncio.run(main())
+    assert [len(batch) for batch in batches] == [4, 4, 4, 4, 2]
+    assert [i for batch in batches for i in batch] == list(range(18))
+
+
+def test_due_batches_wait_for_inflight_slot():
+    async def main():
+        release = asyncio.Event()
+        batches = []
+
+        async def handler(batch):
+            await release.wait()
+            batches.append(list(batch))
+
+        batcher = MicroBatcher("t", handler, max_delay=0.01, max_size=100, max_inflight=1)
+        await batcher.submit(1)
+        await asyncio.sleep(0.03)
+        await batcher.submit(2)
+        await asyncio.sleep(0.03)
+        # 第二批已到期，但第一批仍在处理中
+        assert batcher.stats()["inflight"] == 1 and batcher.stats()["pending"] == 1
+        release.set()
+        await asyncio.sleep(0.01)
+        stats = batcher.stats()
+        await batcher.stop()
+        return batches, stats
+
+    batches, stats = asyncio.run(main())
+    assert batches == [[1], [2]]
+    assert stats["pending"] == 0
+
+
+def test_handler_errors_are_counted():
+    async def main():
+        async def handler(batch):
+            raise RuntimeError("boom")
+
+        batcher = MicroBatcher("t", handler, max_delay=10.0, max_size=2)
+        await batcher.extend([1, 2, 3])
+        await batcher.stop()
+        return batcher.stats()
+
+    stats = asyncio.run(main())
+    assert stats["failures"] == 2 and stats["items"] == 0
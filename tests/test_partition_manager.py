@@ -0,0 +1,206 @@
+import asyncio
+import contextlib
+from datetime import date, datetime
+
+import pytest
+
+from app.adapters.pg_repository.partition_manager import PartitionManager
+
+TABLE = "heart_rate_event_log"
+
+
+class StubConnection:
+    """
+    记录 SQL 执行顺序的 asyncpg 连接替身；partitions 为 pg_inherits 中已挂载的子表名。
+    """
+
+    def __init__(self, partitions=(), moved: int = 0, relkind=None, fail_on: str = None):
+        self.partitions = list(partitions)
+        self.moved = moved
+        self.relkind = relkind
+        self.fail_on = fail_on
+        self.log = []
+
+    @contextlib.asynccontextmanager
+    async def transaction(self):
+        self.log.append(("BEGIN",))
+        try:
+            yield
+        except Exception:
+            self.log.append(("ROLLBACK",))
+            raise
+        self.log.append(("COMMIT",))
+
+    async def execute(self, sql: str, *args) -> str:
+        sql = " ".join(sql.split())
+        self.log.append((sql, *args))
+        if self.fail_on and self.fail_on in sql:
+            raise RuntimeError("execute failed")
+        if sql.startswith("WITH moved"):
+            return f"INSERT 0 {self.moved}"
+        if sql.startswith("ALTER TABLE") and "ATTACH" in sql:
+            self.partitions.append(sql.split()[5])
+        elif sql.startswith("DROP TABLE"):
+            self.partitions.remove(sql.split()[-1])
+        return "OK"
+
+    async def fetch(self, sql: str, *args) -> list:
+        return [{"relname": name} for name in self.partitions]
+
+    async def fetchval(self, sql: str, *args):
+        return self.relkind
+
+
+class StubPool:
+    def __init__(self, conn: StubConnection):
+        self.conn = conn
+
+    @contextlib.asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+class StubClient:
+    def __init__(self, conn: StubConnection):
+        self.pool = StubPool(conn)
+
+    async def get_pool(self) -> StubPool:
+        return self.pool
+
+
+def make_manager(conn: StubConnection, **kwargs) -> PartitionManager:
+    return PartitionManager(StubClient(conn), **kwargs)
+
+
+def statements(conn: StubConnection) -> list:
+    return [entry[0] for entry in conn.log]
+
+
+def test_invalid_interval_is_rejected():
+    with pytest.raises(ValueError):
+        PartitionManager(StubClient(StubConnection()), interval="month")
+
+
+def test_daily_bounds_cross_month():
+    manager = make_manager(StubConnection(), interval="day", premake=2)
+    assert manager.bounds(TABLE, date(2026, 1, 30)) == [
+        (f"{TABLE}_p20260130", date(2026, 1, 30), date(2026, 1, 31)),
+        (f"{TABLE}_p20260131", date(2026, 1, 31), date(2026, 2, 1)),
+        (f"{TABLE}_p20260201", date(2026, 2, 1), date(2026, 2, 2)),
+    ]
+
+
+def test_weekly_bounds_start_on_monday():
+    manager = make_manager(StubConnection(), interval="week", premake=1)
+    # 2026-01-01 为周四，所在周从 2025-12-29（周一）开始
+    expected = [
+        (f"{TABLE}_p20251229", date(2025, 12, 29), date(2026, 1, 5)),
+        (f"{TABLE}_p20260105", date(2026, 1, 5), date(2026, 1, 12)),
+    ]
+    assert manager.bounds(TABLE, date(2026, 1, 1)) == expected
+    assert manager.bounds(TABLE, date(2025, 12, 29)) == expected
+    assert manager.bounds(TABLE, date(2026, 1, 4)) == expected
+
+
+def test_bounds_are_contiguous():
+    manager = make_manager(StubConnection(), interval="day", premake=30)
+    bounds = manager.bounds(TABLE, date(2024, 2, 20))
+    assert len(bounds) == 31
+    # 跨闰日仍首尾相接
+    assert all(prev[2] == cur[1] for prev, cur in zip(bounds, bounds[1:]))
+    assert (f"{TABLE}_p20240229", date(2024, 2, 29), date(2024, 3, 1)) in bounds
+
+
+@pytest.mark.parametrize("interval,lower,expired", [
+    # today = 2026-04-10，保留 10 天，cutoff = 2026-03-31
+    ("day", date(2026, 3, 29), True),
+    ("day", date(2026, 3, 30), True),
+    ("day", date(2026, 3, 31), False),
+    ("week", date(2026, 3, 23), True),
+    ("week", date(2026, 3, 30), False),
+])
+def test_is_expired_uses_partition_end(interval, lower, expired):
+    manager = make_manager(StubConnection(), interval=interval, retention_days=10)
+    assert manager.is_expired(lower, date(2026, 4, 10)) is expired
+
+
+def test_create_partitions_moves_default_rows_before_attach():
+    conn = StubConnection(moved=3)
+    manager = make_manager(conn, interval="day", premake=0)
+    assert asyncio.run(manager.create_partitions(TABLE, today=date(2026, 3, 1))) == 1
+    name = f"{TABLE}_p20260301"
+    assert statements(conn) == [
+        "BEGIN",
+        f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)",
+        f"WITH moved AS (DELETE FROM {TABLE}_default WHERE timestamp >= $1 AND timestamp < $2 "
+        f"RETURNING *) INSERT INTO {name} SELECT * FROM moved",
+        f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM ('2026-03-01') TO ('2026-03-02')",
+        "COMMIT",
+    ]
+    # 迁移的时间范围与 ATTACH 的分区边界一致
+    assert conn.log[2][1:] == (datetime(2026, 3, 1), datetime(2026, 3, 2))
+    assert manager.created == 1
+
+
+def test_create_partitions_skips_existing():
+    conn = StubConnection(partitions=[f"{TABLE}_default", f"{TABLE}_p20260301", f"{TABLE}_p20260303"])
+    manager = make_manager(conn, interval="day", premake=3)
+    assert asyncio.run(manager.create_partitions(TABLE, today=date(2026, 3, 1))) == 2
+    attached = [sql.split()[5] for sql in statements(conn) if "ATTACH" in sql]
+    assert attached == [f"{TABLE}_p20260302", f"{TABLE}_p20260304"]
+    # 再次维护时全部已存在，不执行任何 DDL
+    conn.log.clear()
+    assert asyncio.run(manager.create_partitions(TABLE, today=date(2026, 3, 1))) == 0
+    assert conn.log == []
+
+
+def test_failed_attach_rolls_back_and_stops():
+    conn = StubConnection(fail_on="ATTACH PARTITION")
+    manager = make_manager(conn, interval="day", premake=2)
+    with pytest.raises(RuntimeError):
+        asyncio.run(manager.create_partitions(TABLE, today=date(2026, 3, 1)))
+    assert statements(conn)[-1] == "ROLLBACK"
+    assert sum(sql == "BEGIN" for sql in statements(conn)) == 1
+    assert manager.created == 0
+
+
+def test_drop_expired_only_drops_old_partitions():
+    conn = StubConnection(partitions=[
+        f"{TABLE}_default",
+        f"{TABLE}_p20260329",
+        f"{TABLE}_p20260330",
+        f"{TABLE}_p20260331",
+        f"{TABLE}_p20260410",
+        f"{TABLE}_legacy",
+    ])
+    manager = make_manager(conn, interval="day", retention_days=10)
+    assert asyncio.run(manager.drop_expired(TABLE, today=date(2026, 4, 10))) == 2
+    assert statements(conn) == [
+        f"DROP TABLE IF EXISTS {TABLE}_p20260329",
+        f"DROP TABLE IF EXISTS {TABLE}_p20260330",
+    ]
+    assert manager.dropped == 2
+
+
+def test_ensure_table_renames_legacy_table_and_creates_partitions():
+    conn = StubConnection(relkind="r")
+    manager = make_manager(conn, interval="day", premake=1)
+    asyncio.run(manager.ensure_table(TABLE, "patient_id VARCHAR NOT NULL"))
+    sqls = statements(conn)
+    assert sqls[1] == f"ALTER TABLE {TABLE} RENAME TO {TABLE}_legacy"
+    assert sqls[2].startswith(f"CREATE TABLE IF NOT EXISTS {TABLE} (") and "PARTITION BY RANGE (timestamp)" in sqls[2]
+    assert sqls[4] == f"CREATE TABLE IF NOT EXISTS {TABLE}_default PARTITION OF {TABLE} DEFAULT"
+    assert sum("ATTACH PARTITION" in sql for sql in sqls) == 2
+    assert manager.stats()["tables"] == [TABLE]
+    with pytest.raises(ValueError):
+        asyncio.run(manager.ensure_table("bad; DROP", "patient_id VARCHAR"))
+
+
+def test_maintain_continues_after_table_error():
+    conn = StubConnection(fail_on="CREATE TABLE a_log_p")
+    manager = make_manager(conn, interval="day", premake=0)
+    manager._tables = {"a_log": "", "b_log": ""}
+    asyncio.run(manager.maintain())
+    # a_log 创建分区失败只记录日志，b_log 照常维护
+    assert any(sql.startswith("ALTER TABLE b_log ATTACH PARTITION") for sql in statements(conn))
+    assert manager.created == 1
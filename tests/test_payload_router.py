@@ -0,0 +1,116 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from app.domain.health_metrics.samples import MetricSample, SleepSample
+from app.services.health_metrics.payload_router import PayloadRouter
+
+TS = 1767323045
+
+
+class RecordingProcessor:
+    def __init__(self):
+        self.events = []
+        self.batches = []
+
+    async def handle_data_received(self, event):
+        self.events.append(event)
+
+    async def handle_batch(self, events):
+        self.batches.append(list(events))
+
+
+def make_router(**kwargs):
+    processors = {name: RecordingProcessor() for name in ("heart_rate", "temperature", "sleep")}
+    router = PayloadRouter()
+    router.register_processors(**processors, **kwargs)
+    return router, processors
+
+
+def test_route_converts_fields():
+    router, _ = make_router()
+    routed = router.route({"sn": "DTH000001", "pid": 42, "ts": TS, "hr": "72", "temp": 36, "sleep": 420.0})
+    assert router.invalid == 0
+    # 按 payload 字段顺序输出
+    hr, temp, sleep = (sample for _, sample in routed)
+    assert type(hr) is MetricSample and hr.value == 72 and type(hr.value) is int
+    assert temp.value == 36.0 and type(temp.value) is float
+    assert type(sleep) is SleepSample and sleep.duration_minutes == 420 and sleep.sleep_quality is None
+    for _, sample in routed:
+        assert sample.patient_id == "42" and sample.device_id == "DTH000001"
+        assert sample.timestamp == datetime.fromtimestamp(TS, timezone.utc)
+
+
+def test_route_defaults_patient_and_timestamp():
+    router, _ = make_router()
+    before = datetime.now(timezone.utc)
+    [(_, sample)] = router.route({"sn": 12345, "hr": 60, "unknown": 1})
+    assert sample.patient_id == sample.device_id == "12345"
+    assert before <= sample.timestamp <= datetime.now(timezone.utc)
+
+
+def test_sleep_quality_forms():
+    router, _ = make_router()
+    [(_, nested)] = router.route({"sn": "d", "ts": TS, "sleep": {"minutes": "30", "quality": "poor"}})
+    [(_, flat)] = router.route({"sn": "d", "ts": TS, "sleep": 30, "sleep_quality": "good"})
+    assert (nested.duration_minutes, nested.sleep_quality) == (30, "poor")
+    assert (flat.duration_minutes, flat.sleep_quality) == (30, "good")
+
+
+@pytest.mark.parametrize("payload", [
+    {"sn": "d", "ts": TS, "sleep": {"minutes": 30, "quality": 3}},
+    {"sn": "d", "ts": TS, "sleep": 30, "sleep_quality": ["poor"]},
+    {"sn": "d", "ts": TS, "sleep": {"quality": "poor"}},
+    {"sn": "d", "ts": TS, "sleep": "long"},
+])
+def test_invalid_sleep_is_counted(payload):
+    router, _ = make_router()
+    assert router.route(payload) == []
+    assert router.invalid == 1
+
+
+def test_invalid_field_skips_only_that_field():
+    router, _ = make_router()
+    routed = router.route({"sn": "d", "ts": TS, "hr": "fast", "temp": None, "sleep": 30})
+    assert [type(sample) for _, sample in routed] == [SleepSample]
+    assert router.invalid == 2
+
+
+def test_invalid_timestamp_drops_payload():
+    router, _ = make_router()
+    assert router.route({"sn": "d", "ts": "yesterday", "hr": 60}) == []
+    assert router.route({"sn": "d", "ts": 1e20, "hr": 60}) == []
+    assert router.invalid == 2
+
+
+def test_duplicate_route_is_rejected():
+    router, _ = make_router()
+    with pytest.raises(ValueError):
+        router.register("hr", lambda *args: None, RecordingProcessor().handle_data_received)
+
+
+def test_dispatch_calls_processors_per_sample():
+    router, processors = make_router()
+    asyncio.run(router.dispatch({"sn": "d", "ts": TS, "hr": 60, "temp": 36.5}))
+    assert [e.value for e in processors["heart_rate"].events] == [60]
+    assert [e.value for e in processors["temperature"].events] == [36.5]
+    assert processors["sleep"].events == []
+    assert router.dispatched == 2
+
+
+def test_dispatch_many_batches_through_micro_batcher():
+    async def main():
+        router, processors = make_router(batch_delay=10.0, batch_size=100)
+        payloads = [{"sn": f"d{i}", "ts": TS, "hr": 60 + i, "temp": 36.0} for i in range(5)]
+        payloads.append({"pid": "no-sn", "hr": 60})
+        await router.dispatch_many(payloads)
+        await router.stop()
+        return router, processors
+
+    router, processors = asyncio.run(main())
+    assert [[e.value for e in batch] for batch in processors["heart_rate"].batches] == [[60, 61, 62, 63, 64]]
+    assert len(processors["temperature"].batches) == 1
+    assert processors["heart_rate"].events == []
+    assert router.dispatched == 10 and router.invalid == 1
+    assert router.stats()["batchers"]["hr"]["items"] == 5
@@ -0,0 +1,211 @@
+import asyncio
+import json
+from array import array
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.adapters.influx_repository import query_repo
+from app.adapters.influx_repository.query_repo import MetricsQueryRepo
+from app.api.routes import patient_metrics
+from app.services.health_metrics import thresholds
+from app.services.health_metrics.thresholds import NUMPY_MIN_BATCH, indices_at_or_above
+
+T0 = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+T0_MS = int(T0.timestamp() * 1000)
+
+
+class StubRecord:
+    def __init__(self, time: datetime, value):
+        self.time = time
+        self.value = value
+
+    def get_time(self) -> datetime:
+        return self.time
+
+    def get_value(self):
+        return self.value
+
+
+class StubQueryApi:
+    """
+    记录 Flux 查询与参数，按 records 逐条产出的 QueryApiAsync 替身。
+    """
+
+    def __init__(self, records, error: Exception = None):
+        self.records = records
+        self.error = error
+        self.calls = []
+
+    async def query_stream(self, query: str, params: dict = None):
+        self.calls.append((query, params))
+
+        async def _records():
+            for record in self.records:
+                yield record
+            if self.error is not None:
+                raise self.error
+
+        return _records()
+
+
+class StubClient:
+    def __init__(self, query_api: StubQueryApi):
+        self._query_api = query_api
+
+    async def get_async_client(self):
+        return self
+
+    def query_api(self) -> StubQueryApi:
+        return self._query_api
+
+
+def make_records(n: int, start: float = 60.0) -> list:
+    return [StubRecord(T0 + timedelta(seconds=i), start + i) for i in range(n)]
+
+
+@pytest.fixture(params=["numpy", "array"])
+def columns(request, monkeypatch):
+    """
+    分别在安装 / 未安装 numpy 两种情况下运行。
+    """
+    if request.param == "numpy" and query_repo.np is None:
+        pytest.skip("未安装 numpy")
+    if request.param == "array":
+        monkeypatch.setattr(query_repo, "np", None)
+    return request.param
+
+
+def collect(repo: MetricsQueryRepo, **kwargs) -> list:
+    async def main():
+        return [batch async for batch in repo.stream("heart_rate", "42", T0, T0 + timedelta(hours=1), **kwargs)]
+
+    return asyncio.run(main())
+
+
+def test_stream_yields_chunks_and_skips_nulls(columns):
+    records = make_records(5)
+    records.insert(2, StubRecord(T0, None))
+    query_api = StubQueryApi(records)
+    repo = MetricsQueryRepo(StubClient(query_api), bucket="b", chunk_size=2)
+
+    batches = collect(repo)
+    assert [len(b) for b in batches] == [2, 2, 1]
+    expected_type = query_repo.np.ndarray if columns == "numpy" else array
+    assert all(type(b.times) is expected_type and type(b.values) is expected_type for b in batches)
+    assert batches[0].times[1] - batches[0].times[0] == 1_000_000_000
+    assert [v for b in batches for v in b.values.tolist()] == [60.0, 61.0, 62.0, 63.0, 64.0]
+    [(query, params)] = query_api.calls
+    assert params == {"bucket": "b", "patient_id": "42", "start": T0, "stop": T0 + timedelta(hours=1)}
+    assert 'r._field == "value"' in query and "sort(" in query
+
+
+def test_query_merges_batches(columns):
+    repo = MetricsQueryRepo(StubClient(StubQueryApi(make_records(5))), bucket="b", chunk_size=2)
+    batch = asyncio.run(repo.query("heart_rate", "42", T0, T0 + timedelta(hours=1)))
+    assert len(batch) == 5
+    result = batch.to_dict()
+    assert result["measurement"] == "heart_rate" and result["field"] == "value" and result["count"] == 5
+    assert result["times"] == [T0_MS + i * 1000 for i in range(5)]
+    assert result["values"] == [60.0, 61.0, 62.0, 63.0, 64.0]
+
+
+def test_query_without_rows_is_empty(columns):
+    repo = MetricsQueryRepo(StubClient(StubQueryApi([])), bucket="b")
+    batch = asyncio.run(repo.query("sleep", "42", T0, T0 + timedelta(hours=1)))
+    assert batch.to_dict() == {"measurement": "sleep", "field": "duration_minutes", "count": 0, "times": [], "values": []}
+
+
+def test_stream_propagates_query_errors():
+    repo = MetricsQueryRepo(StubClient(StubQueryApi(make_records(3), error=ConnectionError("down"))), chunk_size=2)
+    with pytest.raises(ConnectionError):
+        collect(repo)
+
+
+def test_build_query_with_window():
+    query = MetricsQueryRepo.build_query("temperature", "value", window="5m", fn="max")
+    assert "aggregateWindow(every: 5m, fn: max, createEmpty: false)" in query
+    assert "sort(" not in query
+
+
+@pytest.mark.parametrize("args", [
+    ("blood_pressure", "value", None, "mean"),
+    ("heart_rate", 'value" or true', None, "mean"),
+    ("heart_rate", "value", "5 m", "mean"),
+    ("heart_rate", "value", "5m", "median"),
+])
+def test_build_query_rejects_invalid_input(args):
+    with pytest.raises(ValueError):
+        MetricsQueryRepo.build_query(*args)
+
+
+@pytest.fixture
+def api():
+    """
+    以 StubQueryApi 替换仓储依赖的测试客户端，返回 (client, query_api)。
+    """
+    query_api = StubQueryApi(make_records(3))
+    app = FastAPI()
+    app.include_router(patient_metrics.router, prefix="/patients")
+    app.dependency_overrides[patient_metrics.get_repo] = lambda: MetricsQueryRepo(
+        StubClient(query_api), bucket="b", chunk_size=2
+    )
+    return TestClient(app), query_api
+
+
+def test_api_returns_columns(api):
+    client, query_api = api
+    response = client.get(
+        "/patients/42/metrics/heart_rate",
+        params={"start": "2026-01-02T00:00:00", "stop": "2026-01-03T00:00:00", "window": "1m", "fn": "min"},
+    )
+    assert response.status_code == 200
+    assert response.json()["times"] == [T0_MS, T0_MS + 1000, T0_MS + 2000]
+    [(query, params)] = query_api.calls
+    assert "fn: min" in query
+    # 无时区的时间按 UTC 处理
+    assert params["start"] == datetime(2026, 1, 2, tzinfo=timezone.utc)
+
+
+def test_api_streams_ndjson(api):
+    client, _ = api
+    response = client.get("/patients/42/metrics/heart_rate/stream")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [line for line in response.text.splitlines() if line]
+    assert [len(json.loads(line)["values"]) for line in lines] == [2, 1]
+
+
+@pytest.mark.parametrize("path,params", [
+    ("/patients/42/metrics/blood_pressure", {}),
+    ("/patients/42/metrics/heart_rate", {"window": "1 m"}),
+    ("/patients/42/metrics/heart_rate", {"start": "2026-01-03T00:00:00", "stop": "2026-01-02T00:00:00"}),
+    ("/patients/42/metrics/heart_rate/stream", {"fn": "median"}),
+])
+def test_api_rejects_invalid_requests(api, path, params):
+    client, query_api = api
+    assert client.get(path, params=params).status_code == 422
+    assert query_api.calls == []
+
+
+def test_api_hides_backend_errors(api):
+    client, query_api = api
+    query_api.error = ConnectionError("influx down")
+    response = client.get("/patients/42/metrics/heart_rate")
+    assert response.status_code == 500
+    assert "influx" not in response.text
+
+
+@pytest.mark.parametrize("vectorized", [True, False], ids=["numpy", "python"])
+@pytest.mark.parametrize("size", [3, NUMPY_MIN_BATCH, 100])
+def test_indices_at_or_above(monkeypatch, vectorized, size):
+    if vectorized and thresholds.np is None:
+        pytest.skip("未安装 numpy")
+    if not vectorized:
+        monkeypatch.setattr(thresholds, "np", None)
+    values = [float(i % 7) for i in range(size)]
+    result = indices_at_or_above(values, 5.0)
+    assert type(result) is list and all(type(i) is int for i in result)
+    assert result == [i for i in range(size) if i % 7 >= 5]
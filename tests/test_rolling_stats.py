@@ -0,0 +1,97 @@
+import math
+
+import pytest
+
+from app.domain.health_metrics.rolling_stats import RollingStats, RollingStatsEngine
+
+# 交替的基线采样: 均值约 71，标准差约 1
+BASELINE = [70.0, 72.0]
+
+
+def feed(engine: RollingStatsEngine, patient_id: str, n: int) -> list:
+    return [engine.update(patient_id, BASELINE[i % 2]) for i in range(n)]
+
+
+def z_value(engine: RollingStatsEngine, patient_id: str, z: float) -> float:
+    """
+    相对患者当前统计量偏离 z 个标准差的采样值。
+    """
+    stats = engine.get(patient_id)
+    return stats.mean + z * max(math.sqrt(stats.var), engine.min_std)
+
+
+def test_warmup_suppresses_detection():
+    engine = RollingStatsEngine(warmup=10, cooldown=0)
+    assert feed(engine, "p", 5) == [None] * 5
+    # 预热期内即使偏离巨大也不判定，但会计入统计
+    assert engine.update("p", 500.0) is None
+    assert engine.get("p").count == 6
+    engine = RollingStatsEngine(warmup=10, cooldown=0)
+    assert feed(engine, "p", 10) == [None] * 10
+    anomaly = engine.update("p", 500.0)
+    assert anomaly is not None and anomaly.kind == "zscore" and anomaly.score > 0
+    assert engine.anomalies == 1
+
+
+def test_zscore_threshold():
+    engine = RollingStatsEngine(z_threshold=4.0, trend_threshold=1e9, warmup=40, cooldown=0)
+    feed(engine, "p", 40)
+    assert engine.update("p", z_value(engine, "p", 3.9)) is None
+    feed(engine, "p", 40)
+    anomaly = engine.update("p", z_value(engine, "p", -4.1))
+    assert anomaly.kind == "zscore"
+    assert anomaly.score == pytest.approx(-4.1)
+    assert anomaly.mean == pytest.approx(71.0, abs=0.5)
+
+
+def test_trend_detects_sustained_shift():
+    engine = RollingStatsEngine(z_threshold=1e9, trend_threshold=1.5, warmup=40, cooldown=0)
+    feed(engine, "p", 40)
+    results = [engine.update("p", 75.0) for _ in range(3)]
+    # 单个偏离采样只把短期均值拉动 fast_alpha，第二个采样起短期均值才持续偏离
+    assert results[0] is None
+    assert results[1].kind == "trend" and results[1].score >= 1.5
+
+
+def test_cooldown_suppresses_repeated_alerts():
+    engine = RollingStatsEngine(trend_threshold=1e9, warmup=20, cooldown=3)
+    feed(engine, "p", 20)
+    assert engine.update("p", z_value(engine, "p", 20.0)) is not None
+    # 冷却期 3 个采样内即使再次偏离也不告警
+    assert engine.update("p", z_value(engine, "p", 20.0)) is None
+    assert feed(engine, "p", 2) == [None, None]
+    assert engine.update("p", z_value(engine, "p", 20.0)) is not None
+    assert engine.anomalies == 2
+
+
+def test_ring_wraps_around():
+    stats = RollingStats(window=4)
+    for value in (1.0, 2.0, 3.0):
+        stats.update(value, 0.05, 0.3)
+    # 未写满时只使用已写入的采样
+    assert stats.percentile(0.0) == 1.0 and stats.percentile(0.99) == 3.0
+    for value in range(4, 11):
+        stats.update(float(value), 0.05, 0.3)
+    assert stats.count == 10 and stats.pos == 10 % 4
+    assert sorted(stats.ring) == [7.0, 8.0, 9.0, 10.0]
+    assert stats.percentile(0.0) == 7.0
+    assert stats.percentile(0.95) == 10.0
+    # 环形缓冲为 float32，精度约 7 位有效数字
+    stats.update(36.6, 0.05, 0.3)
+    assert stats.percentile(0.99) == pytest.approx(36.6, rel=1e-6)
+    assert stats.percentile(0.99) != 36.6
+
+
+def test_least_recently_updated_patient_is_evicted():
+    engine = RollingStatsEngine(max_patients=2)
+    engine.update("a", 70.0)
+    engine.update("b", 70.0)
+    engine.update("a", 71.0)
+    engine.update("c", 70.0)
+    assert engine.get("b") is None
+    assert engine.get("a").count == 2 and engine.get("c").count == 1
+    assert len(engine) == 2
+    assert engine.stats() == {"patients": 2, "evicted": 1, "anomalies": 0}
+    # 被淘汰的患者重新出现时从零开始统计
+    engine.update("b", 70.0)
+    assert engine.get("b").count == 1 and engine.get("a") is None
@@ -0,0 +1,100 @@
+import logging
+
+import pytest
+
+from app.core.logger import SampledLogger, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class RecordingLogger:
+    def __init__(self, level: int = logging.INFO):
+        self.level = level
+        self.records = []
+
+    def isEnabledFor(self, level: int) -> bool:
+        return level >= self.level
+
+    def log(self, level: int, msg: str, *args) -> None:
+        self.records.append(msg % args if args else msg)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_burst_capacity(clock):
+    bucket = TokenBucket(rate=1.0, burst=3, clock=clock)
+    assert [bucket.consume() for _ in range(5)] == [True, True, True, False, False]
+    assert bucket.suppressed == 2
+
+
+def test_refill_rate(clock):
+    bucket = TokenBucket(rate=2.0, burst=2, clock=clock)
+    assert bucket.consume() and bucket.consume()
+    assert not bucket.consume()
+    clock.now += 0.25
+    # 0.25s 只补充 0.5 个令牌
+    assert not bucket.consume()
+    clock.now += 0.25
+    assert bucket.consume()
+    assert not bucket.consume()
+
+
+def test_refill_is_capped_at_burst(clock):
+    bucket = TokenBucket(rate=10.0, burst=2, clock=clock)
+    clock.now += 60
+    assert [bucket.consume() for _ in range(3)] == [True, True, False]
+
+
+def test_suppressed_count_reported_on_next_emit(clock):
+    target = RecordingLogger()
+    sampled = SampledLogger(target, rate=1.0, burst=1, clock=clock)
+    for i in range(4):
+        sampled.warning("k", "写入失败 %d", i)
+    assert target.records == ["写入失败 0"]
+    clock.now += 1.0
+    sampled.warning("k", "写入失败 %d", 4)
+    sampled.warning("k", "写入失败 %d", 5)
+    clock.now += 1.0
+    sampled.warning("k", "写入失败 %d", 6)
+    assert target.records == [
+        "写入失败 0",
+        "写入失败 4 (已抑制 3 条)",
+        "写入失败 6 (已抑制 1 条)",
+    ]
+
+
+def test_keys_are_limited_independently(clock):
+    target = RecordingLogger()
+    sampled = SampledLogger(target, rate=1.0, burst=1, clock=clock)
+    sampled.error("a", "a1")
+    sampled.error("a", "a2")
+    sampled.error("b", "b1")
+    assert target.records == ["a1", "b1"]
+
+
+def test_disabled_level_does_not_consume_tokens(clock):
+    target = RecordingLogger(level=logging.WARNING)
+    sampled = SampledLogger(target, rate=1.0, burst=1, clock=clock)
+    for _ in range(5):
+        sampled.debug("k", "noise")
+    assert not sampled.allow(logging.INFO, "k")
+    sampled.warning("k", "kept")
+    assert target.records == ["kept"]
+
+
+def test_key_table_is_bounded(clock):
+    target = RecordingLogger()
+    sampled = SampledLogger(target, rate=1.0, burst=1, max_keys=3, clock=clock)
+    for i in range(10):
+        sampled.info(f"sn{i}", "msg")
+    assert len(sampled._buckets) <= 3
+    assert len(target.records) == 10
@@ -0,0 +1,177 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from app.adapters.spool.segment_spool import WriteAheadSpool
+
+
+def make_spool(directory, **kwargs) -> WriteAheadSpool:
+    spool = WriteAheadSpool(str(directory), segment_size=kwargs.pop("segment_size", 4096), **kwargs)
+    spool.open()
+    return spool
+
+
+def drain(spool: WriteAheadSpool) -> list:
+    records = []
+    while (record := spool.peek()) is not None:
+        records.append(record)
+        spool.commit()
+    return records
+
+
+def segment_files(directory) -> list:
+    return sorted(name for name in os.listdir(directory) if name.endswith(".seg"))
+
+
+@pytest.fixture
+def spool_dir(tmp_path):
+    return tmp_path / "spool"
+
+
+def test_append_and_drain_in_order(spool_dir):
+    spool = make_spool(spool_dir)
+    for i in range(10):
+        assert spool.append(i % 3, f"record-{i}".encode())
+    assert drain(spool) == [(i % 3, f"record-{i}".encode()) for i in range(10)]
+    assert spool.peek() is None
+    assert spool.backlog_bytes == 0
+    spool.close()
+
+
+def test_peek_without_commit_returns_same_record(spool_dir):
+    spool = make_spool(spool_dir)
+    spool.append(1, b"a")
+    spool.append(1, b"b")
+    assert spool.peek() == (1, b"a")
+    assert spool.peek() == (1, b"a")
+    spool.commit()
+    assert spool.peek() == (1, b"b")
+    spool.close()
+
+
+def test_reopen_resumes_after_committed_records(spool_dir):
+    spool = make_spool(spool_dir)
+    for i in range(5):
+        spool.append(1, bytes([i]) * 10)
+    assert spool.peek() == (1, bytes([0]) * 10)
+    spool.commit()
+    spool.peek()
+    spool.commit()
+    spool.close()
+
+    reopened = make_spool(spool_dir)
+    assert reopened.readable.is_set()
+    assert drain(reopened) == [(1, bytes([i]) * 10) for i in range(2, 5)]
+    reopened.close()
+
+
+def test_recovery_without_close(spool_dir):
+    # 子进程写入后不 close 直接退出（模拟崩溃）: mmap 写入的数据仍在页缓存中，锁随进程退出释放
+    script = textwrap.dedent(f"""
+        import os
+        from app.adapters.spool.segment_spool import WriteAheadSpool
+        spool = WriteAheadSpool({str(spool_dir)!r}, segment_size=4096)
+        spool.open()
+        spool.append(2, b"first")
+        spool.append(2, b"second")
+        os._exit(0)
+    """)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, "-c", script], check=True, cwd=root)
+    recovered = make_spool(spool_dir)
+    assert recovered.path == str(spool_dir)
+    assert drain(recovered) == [(2, b"first"), (2, b"second")]
+    recovered.close()
+
+
+def test_concurrent_open_uses_separate_slot(spool_dir):
+    first = make_spool(spool_dir)
+    second = make_spool(spool_dir)
+    assert first.path == str(spool_dir)
+    assert second.path == str(spool_dir / "1")
+    first.append(1, b"first")
+    second.append(1, b"second")
+    assert drain(first) == [(1, b"first")]
+    assert drain(second) == [(1, b"second")]
+    first.close()
+    # 释放后由下一个打开的实例接管
+    third = make_spool(spool_dir)
+    assert third.path == str(spool_dir)
+    third.close()
+    second.close()
+
+
+def test_open_fails_when_all_slots_are_locked(spool_dir):
+    first = make_spool(spool_dir, slots=1)
+    with pytest.raises(RuntimeError):
+        make_spool(spool_dir, slots=1)
+    first.close()
+    make_spool(spool_dir, slots=1).close()
+
+
+def test_torn_record_is_dropped_and_overwritten(spool_dir):
+    spool = make_spool(spool_dir)
+    spool.append(1, b"complete")
+    spool.append(1, b"torn-record")
+    spool.close()
+    # 模拟写了一半的最后一条记录: 破坏其负载，CRC 不再匹配
+    path = spool_dir / segment_files(spool_dir)[0]
+    data = bytearray(path.read_bytes())
+    offset = data.find(b"torn-record")
+    data[offset] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    reopened = make_spool(spool_dir)
+    assert reopened.peek() == (1, b"complete")
+    reopened.commit()
+    assert reopened.peek() is None
+    # 恢复后从最后一条完整记录之后继续写入，残缺记录被覆盖
+    reopened.append(1, b"after")
+    reopened.close()
+
+    again = make_spool(spool_dir)
+    assert drain(again) == [(1, b"after")]
+    again.close()
+
+
+def test_rolls_segments_and_deletes_consumed(spool_dir):
+    spool = make_spool(spool_dir, segment_size=256)
+    payloads = [bytes([i]) * 100 for i in range(10)]
+    for payload in payloads:
+        assert spool.append(7, payload)
+    assert len(segment_files(spool_dir)) > 1
+    spool.close()
+
+    reopened = make_spool(spool_dir, segment_size=256)
+    assert drain(reopened) == [(7, payload) for payload in payloads]
+    # 只保留最后一个（正在写入的）段
+    assert len(segment_files(spool_dir)) == 1
+    reopened.close()
+
+
+def test_oversized_record_gets_its_own_segment(spool_dir):
+    spool = make_spool(spool_dir, segment_size=128)
+    big = os.urandom(1000)
+    assert spool.append(1, b"small")
+    assert spool.append(1, big)
+    assert drain(spool) == [(1, b"small"), (1, big)]
+    spool.close()
+
+
+def test_full_spool_drops(spool_dir):
+    spool = make_spool(spool_dir, segment_size=256, max_bytes=512)
+    results = [spool.append(1, b"x" * 100) for _ in range(10)]
+    assert results[:4] == [True] * 4
+    assert not results[-1]
+    assert spool.dropped == results.count(False)
+    assert len(drain(spool)) == results.count(True)
+    spool.close()
+
+
+def test_append_when_closed_drops():
+    spool = WriteAheadSpool("/nonexistent")
+    assert not spool.append(1, b"x")
+    assert spool.dropped == 1
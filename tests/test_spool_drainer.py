@@ -0,0 +1,165 @@
+import asyncio
+import os
+
+import asyncpg
+import pytest
+from influxdb_client.rest import ApiException
+
+from app.adapters.influx_repository.batch_writer import InfluxBatchWriter
+from app.adapters.pg_repository.event_log_writer import EventLogWriter
+from app.adapters.spool.drainer import PermanentReplayError, SpoolDrainer
+from app.adapters.spool.segment_spool import WriteAheadSpool
+
+
+@pytest.fixture
+def spool(tmp_path):
+    spool = WriteAheadSpool(str(tmp_path / "spool"), segment_size=4096)
+    spool.open()
+    yield spool
+    spool.close()
+
+
+def read_dead_letters(spool: WriteAheadSpool) -> bytes:
+    with open(os.path.join(spool.path, "deadletter"), "rb") as f:
+        return f.read()
+
+
+class FlakyHandler:
+    """
+    按 outcomes 依次返回写入条数或抛出异常的重放函数。
+    """
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.payloads = []
+
+    async def __call__(self, payload: bytes) -> int:
+        self.payloads.append(payload)
+        outcome = self.outcomes.pop(0) if self.outcomes else 1
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def test_transient_failure_keeps_record_for_retry(spool):
+    handler = FlakyHandler(ConnectionError("down"), 3)
+    drainer = SpoolDrainer(spool)
+    drainer.register(1, handler)
+    spool.append(1, b"batch")
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(drainer.drain_once())
+    assert spool.peek() == (1, b"batch")
+    assert asyncio.run(drainer.drain_once()) == 3
+    assert spool.peek() is None
+    assert handler.payloads == [b"batch", b"batch"]
+    assert drainer.stats() == {"replayed": 3, "records": 1, "failures": 0, "skipped": 0}
+
+
+def test_permanent_failure_moves_record_to_dead_letter(spool):
+    handler = FlakyHandler(PermanentReplayError("bad line"), 2)
+    drainer = SpoolDrainer(spool)
+    drainer.register(1, handler)
+    spool.append(1, b"poison")
+    spool.append(1, b"good")
+
+    assert asyncio.run(drainer.drain_once()) == 0
+    assert asyncio.run(drainer.drain_once()) == 2
+    assert spool.peek() is None
+    assert drainer.skipped == 1 and drainer.replayed == 2
+    assert spool.dead_letters == 1
+    assert read_dead_letters(spool).endswith(b"poison")
+
+
+def test_record_is_dead_lettered_after_max_attempts(spool):
+    handler = FlakyHandler(*[ConnectionError("down")] * 3)
+    drainer = SpoolDrainer(spool, max_attempts=3)
+    drainer.register(1, handler)
+    spool.append(1, b"stuck")
+    spool.append(1, b"next")
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            asyncio.run(drainer.drain_once())
+    assert asyncio.run(drainer.drain_once()) == 0
+    assert spool.peek() == (1, b"next")
+    assert drainer.skipped == 1
+    # 计数按记录重置: 下一条记录首次失败不会立即转入死信
+    handler.outcomes = [ConnectionError("down")]
+    with pytest.raises(ConnectionError):
+        asyncio.run(drainer.drain_once())
+    assert spool.peek() == (1, b"next")
+
+
+def test_unregistered_kind_is_dead_lettered(spool):
+    drainer = SpoolDrainer(spool)
+    spool.append(9, b"unknown")
+    assert asyncio.run(drainer.drain_once()) == 0
+    assert spool.peek() is None
+    assert drainer.skipped == 1 and spool.dead_letters == 1
+
+
+def test_run_loop_skips_poison_record(spool):
+    async def main():
+        handler = FlakyHandler(PermanentReplayError("bad"), 1, 1)
+        drainer = SpoolDrainer(spool, rate=0, retry_interval=0.001)
+        drainer.register(1, handler)
+        for payload in (b"a", b"b", b"c"):
+            spool.append(1, payload)
+        drainer.start()
+        for _ in range(100):
+            if drainer.records == 2:
+                break
+            await asyncio.sleep(0.01)
+        await drainer.stop()
+        return drainer
+
+    drainer = asyncio.run(main())
+    assert drainer.records == 2 and drainer.skipped == 1
+    assert spool.peek() is None
+
+
+def test_influx_replay_classifies_errors():
+    writer = InfluxBatchWriter(None, "bucket", write_timeout=1.0)
+    payload = (1).to_bytes(4, "little") + b"heart_rate value=1i 1\n"
+
+    def reject(data):
+        raise ApiException(status=400, reason="Bad Request")
+
+    def unavailable(data):
+        raise ApiException(status=503, reason="Service Unavailable")
+
+    writer._write = reject
+    with pytest.raises(PermanentReplayError):
+        asyncio.run(writer.replay(payload))
+    writer._write = unavailable
+    with pytest.raises(ApiException):
+        asyncio.run(writer.replay(payload))
+    with pytest.raises(PermanentReplayError):
+        asyncio.run(writer.replay(b"\x01"))
+
+
+class FailingClient:
+    """
+    获取连接池时总是抛出 error 的 PgSQLClient 替身。
+    """
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+    async def get_pool(self):
+        raise self.error
+
+
+def test_event_log_replay_classifies_errors():
+    writer = EventLogWriter(FailingClient(asyncpg.DataError("invalid input")))
+    writer.register("t", ("a",))
+    with pytest.raises(PermanentReplayError):
+        asyncio.run(writer.replay(b"\xc1 not msgpack"))
+    with pytest.raises(PermanentReplayError):
+        asyncio.run(writer.replay(b"\x92\xa7unknown\x90"))
+    with pytest.raises(PermanentReplayError):
+        asyncio.run(writer.replay(b"\x92\xa1t\x91\x91\x01"))
+    writer.client = FailingClient(ConnectionRefusedError("down"))
+    with pytest.raises(ConnectionRefusedError):
+        asyncio.run(writer.replay(b"\x92\xa1t\x91\x91\x01"))
@@ -0,0 +1,190 @@
+import asyncio
+import threading
+import time
+
+from app.adapters.influx_repository.batch_writer import InfluxBatchWriter
+from app.adapters.pg_repository.event_log_writer import EventLogWriter
+from app.adapters.spool.segment_spool import WriteAheadSpool
+from app.core.metrics import get_histogram
+
+
+class FakePool:
+    """
+    asyncpg 连接池替身: copy_records_to_table 耗时 delay 秒，遵守 timeout 参数。
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.copied = []
+
+    def acquire(self, timeout=None):
+        pool = self
+
+        class Connection:
+            async def copy_records_to_table(self, table, records, columns, timeout=None):
+                await asyncio.wait_for(asyncio.sleep(pool.delay), timeout)
+                pool.copied.append((table, list(records)))
+
+        class Acquire:
+            async def __aenter__(self):
+                return Connection()
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Acquire()
+
+
+class FakeClient:
+    def __init__(self, pool: FakePool):
+        self.pool = pool
+
+    async def get_pool(self):
+        return self.pool
+
+
+def open_spool(tmp_path) -> WriteAheadSpool:
+    spool = WriteAheadSpool(str(tmp_path / "spool"), segment_size=64 * 1024)
+    spool.open()
+    return spool
+
+
+def test_influx_write_timeout_spools_batch(tmp_path):
+    spool = open_spool(tmp_path)
+    writer = InfluxBatchWriter(None, "bucket", max_retries=1, retry_interval=0.001, write_timeout=0.02, spool=spool)
+    writer._write = lambda data: time.sleep(0.1)
+    histogram = get_histogram("store_write.influx")
+    before = histogram.snapshot()["count"]
+
+    asyncio.run(writer._write_with_retry(b"heart_rate value=1i 1\n", 1))
+
+    stats = writer.stats()
+    assert stats["timeouts"] == 2 and stats["retries"] == 1
+    assert stats["spooled"] == 1 and stats["failed"] == 0
+    assert histogram.snapshot()["count"] - before == 2
+    kind, payload = spool.peek()
+    assert payload.endswith(b"heart_rate value=1i 1\n")
+    spool.close()
+
+
+def test_influx_flush_writes_sealed_batches():
+    written = []
+    writer = InfluxBatchWriter(None, "bucket", batch_size=2, write_timeout=1.0)
+    writer._write = written.append
+    for value in range(5):
+        assert writer.reserve()
+        writer.encoder.heart_rate("p", "d", value, value)
+
+    asyncio.run(writer.flush())
+
+    assert len(written) == 3
+    assert writer.stats()["written"] == 5 and writer.pending == 0
+
+
+def test_event_log_copy_timeout_spools_rows(tmp_path):
+    spool = open_spool(tmp_path)
+    pool = FakePool(delay=0.1)
+    writer = EventLogWriter(FakeClient(pool), batch_size=10, write_timeout=0.02, spool=spool)
+    writer.register("heart_rate_event_log", ("patient_id", "value"))
+    writer.extend("heart_rate_event_log", [("p", 1), ("p", 2)])
+    histogram = get_histogram("store_write.pgsql")
+    before = histogram.snapshot()["count"]
+
+    assert not asyncio.run(writer.flush())
+
+    stats = writer.stats()
+    assert stats["timeouts"] == 1 and stats["failures"] == 1
+    assert stats["spooled"] == 2 and stats["pending"] == 0
+    assert histogram.snapshot()["count"] - before == 1
+    assert pool.copied == []
+
+    # spool 重放经同一 COPY 路径
+    pool.delay = 0
+    kind, payload = spool.peek()
+    assert asyncio.run(writer.replay(payload)) == 2
+    assert pool.copied == [("heart_rate_event_log", [("p", 1), ("p", 2)])]
+    spool.close()
+
+
+def test_event_log_failure_without_spool_keeps_rows():
+    pool = FakePool(delay=0.1)
+    writer = EventLogWriter(FakeClient(pool), batch_size=10, write_timeout=0.02)
+    writer.register("t", ("a",))
+    writer.extend("t", [(1,), (2,)])
+
+    assert not asyncio.run(writer.flush())
+    assert writer.stats()["tables"] == {"t": 2}
+
+    pool.delay = 0
+    assert asyncio.run(writer.flush())
+    assert pool.copied == [("t", [(1,), (2,)])]
+    assert writer.stats()["pending"] == 0
+
+
+def encode_values(writer: InfluxBatchWriter, values) -> int:
+    encoder = writer.encoder
+    return writer.encode_many(list(values), lambda chunk: encoder.heart_rate_many(
+        ("p", "d", value, value) for value in chunk
+    ))
+
+
+def test_influx_encode_many_never_exceeds_batch_size():
+    writer = InfluxBatchWriter(None, "bucket", batch_size=4)
+    for value in range(3):
+        assert writer.reserve()
+        writer.encoder.heart_rate("p", "d", value, value)
+
+    assert encode_values(writer, range(3, 13)) == 10
+    writer._seal()
+
+    assert [count for _, count in writer._sealed] == [4, 4, 4, 1]
+    assert writer.pending == 13 and writer.dropped == 0
+    lines = b"".join(data for data, _ in writer._sealed).splitlines()
+    assert [int(line.rsplit(b" ", 1)[1]) for line in lines] == list(range(13))
+
+
+def test_influx_encode_many_drops_beyond_max_pending():
+    writer = InfluxBatchWriter(None, "bucket", batch_size=4, max_pending=10)
+    assert encode_values(writer, range(15)) == 10
+    assert writer.dropped == 5 and writer.pending == 10
+
+
+def test_influx_encode_many_spools_oldest_batch_when_full(tmp_path):
+    spool = open_spool(tmp_path)
+    writer = InfluxBatchWriter(None, "bucket", batch_size=4, max_pending=8, spool=spool)
+    assert encode_values(writer, range(12)) == 12
+    assert writer.dropped == 0
+    assert writer.spooled == 4 and writer.pending == 8
+    spool.close()
+
+
+def test_influx_writes_run_on_dedicated_threads():
+    threads = []
+    writer = InfluxBatchWriter(None, "bucket", batch_size=2, write_threads=1)
+    writer._write = lambda data: threads.append(threading.current_thread().name)
+    encode_values(writer, range(5))
+
+    async def main():
+        await writer.flush()
+        await writer.stop()
+
+    asyncio.run(main())
+    assert len(threads) == 3
+    assert all(name.startswith("influx-write") for name in threads)
+    assert writer.stats()["written"] == 5 and writer._executor is None
+
+
+def test_influx_timed_out_write_does_not_block_default_executor():
+    release = threading.Event()
+    writer = InfluxBatchWriter(None, "bucket", max_retries=0, write_timeout=0.02, write_threads=1)
+    writer._write = lambda data: release.wait(1.0)
+
+    async def main():
+        await writer._write_with_retry(b"heart_rate value=1i 1\n", 1)
+        # 超时的写入仍占用专用线程，默认线程池不受影响
+        await asyncio.wait_for(asyncio.to_thread(lambda: None), 0.5)
+        release.set()
+        await writer.stop()
+
+    asyncio.run(main())
+    assert writer.stats()["timeouts"] == 1 and writer.stats()["failed"] == 1